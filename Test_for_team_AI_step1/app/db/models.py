@@ -1,5 +1,5 @@
-import uuid
-from sqlalchemy import Column, String, Float, TIMESTAMP, ForeignKey, Text
+import os, uuid
+from sqlalchemy import Column, String, Float, Integer, TIMESTAMP, ForeignKey, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from pgvector.sqlalchemy import Vector
@@ -10,6 +10,11 @@ class Video(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     filename = Column(String, nullable=False)
     duration_sec = Column(Float, nullable=True)
+    content_hash = Column(String, nullable=True, index=True)
+    fps = Column(Float, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    codec = Column(String, nullable=True)
     created_at = Column(TIMESTAMP, nullable=True)
     highlights = relationship("Highlight", back_populates="video", cascade="all, delete-orphan")
 
@@ -21,6 +26,6 @@ class Highlight(Base):
     end_sec = Column(Float, nullable=False)
     title = Column(Text, nullable=False)
     summary = Column(Text, nullable=False)
-    embedding = Column(Vector(384), nullable=False)
+    embedding = Column(Vector(int(os.getenv("EMBEDDING_DIM", "384"))), nullable=False)
     created_at = Column(TIMESTAMP, nullable=True)
     video = relationship("Video", back_populates="highlights")
@@ -1,4 +1,6 @@
-from typing import List
+import uuid
+from typing import Dict, List, Sequence
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from .models import Video, Highlight
 
@@ -10,5 +12,29 @@ def add_highlight(db: Session, video_id, start_sec: float, end_sec: float, title
     h = Highlight(video_id=video_id, start_sec=start_sec, end_sec=end_sec, title=title, summary=summary, embedding=embedding)
     db.add(h); db.commit(); db.refresh(h); return h
 
+def find_video_by_hash(db: Session, content_hash: str) -> Video | None:
+    return db.query(Video).filter(Video.content_hash == content_hash).first()
+
+def create_video_with_highlights(db: Session, filename: str, duration_sec: float | None,
+                                 highlights: Sequence[Dict], content_hash: str | None = None,
+                                 **video_fields) -> uuid.UUID:
+    """Insert a video and all of its highlights in one transaction.
+
+    `highlights` are dicts with start_sec, end_sec, title, summary, embedding; `video_fields`
+    are extra Video columns (fps, width, height, codec). Rows go out as a single executemany
+    (multi-row VALUES) with client-side ids, so nothing is refreshed.
+    """
+    video_id = uuid.uuid4()
+    try:
+        db.execute(insert(Video), [{"id": video_id, "filename": filename, "duration_sec": duration_sec,
+                                    "content_hash": content_hash, **video_fields}])
+        if highlights:
+            db.execute(insert(Highlight), [{"id": uuid.uuid4(), "video_id": video_id, **h} for h in highlights])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return video_id
+
 def list_highlights(db: Session, video_id) -> List[Highlight]:
     return db.query(Highlight).filter(Highlight.video_id == video_id).order_by(Highlight.start_sec).all()
@@ -1,31 +1,89 @@
-import os, typer
+import os, time, typer
 from dotenv import load_dotenv
-from app.processors.video_processor import VideoProcessor
+from app.processors.batch import iter_video_paths, run_batch, run_pipelined, format_summary
 
 app = typer.Typer()
 
-@app.command()
-def main(input: str = typer.Option("input_videos", help="Folder or video file"),
-         max_highlights: int = typer.Option(int(os.getenv("MAX_HIGHLIGHTS","10")))):
+@app.callback(invoke_without_command=True)
+def main(ctx: typer.Context,
+         input: str = typer.Option("input_videos", help="Folder or video file"),
+         max_highlights: int = typer.Option(int(os.getenv("MAX_HIGHLIGHTS","10"))),
+         workers: int = typer.Option(int(os.getenv("WORKERS","1")), min=1, help="Videos processed in parallel"),
+         recursive: bool = typer.Option(False, help="Walk sub-folders of --input"),
+         queue: bool = typer.Option(os.getenv("INGEST_QUEUE","0") == "1",
+                                    help="Go through the durable job queue (resumable, retried)"),
+         trace: str = typer.Option("", help="Append per-stage spans to this JSON lines file and print p50/p95"),
+         profile: str = typer.Option("", help="Run under cProfile and write a sorted report here")):
+    if ctx.invoked_subcommand is not None:
+        return
     load_dotenv()
-    proc = VideoProcessor()
-    paths = []
-    if os.path.isdir(input):
-        for name in os.listdir(input):
-            if name.lower().endswith((".mp4",".mov",".m4v",".mkv")):
-                paths.append(os.path.join(input, name))
-    elif os.path.isfile(input):
-        paths = [input]
-    else:
-        typer.echo(f"No input found at {input}"); 
+    if not os.path.exists(input):
+        typer.echo(f"No input found at {input}");
         raise typer.Exit(code=1)
-    for p in paths[:10]:
-        typer.echo(f"Processing: {p}")
-        try:
-            result = proc.process(p, max_highlights=max_highlights)
-            typer.echo(f"Done: {result['filename']} → {len(result['highlights'])} highlights")
-        except Exception as e:
-            typer.echo(f"Error: {e}")
+    # Heavy imports (cv2, torch, genai, SQLAlchemy engine) happen here, not at CLI start-up.
+    from app.processors.video_processor import VideoProcessor
+    from app import tracing
+    if trace:
+        tracing.enable(trace)
+    make_processor = VideoProcessor
+    profiler = tracing.ThreadProfiler() if profile else None
+    if profiler:
+        make_processor = lambda: profiler.instrument(VideoProcessor())
+    rows = []
+    start = time.perf_counter()
+    paths = iter_video_paths(input, recursive=recursive)
+    if queue:
+        from app.db import jobs
+        from app.processors.worker import run_queue
+        with jobs.JobsSession() as db:
+            typer.echo(f"Queued {jobs.enqueue(db, (os.path.abspath(p) for p in paths))} new videos")
+        results = run_queue(make_processor, workers=workers, max_highlights=max_highlights)
+    else:
+        from app.llm.backends import get_backend
+        llm = get_backend()
+        if hasattr(llm, "summarize_many") and not profiler:
+            # Uploads of the next videos overlap generation of the current ones.
+            results = run_pipelined(paths, lambda: VideoProcessor(llm=llm), llm, workers=workers,
+                                    max_highlights=max_highlights,
+                                    upload_workers=int(os.getenv("GEMINI_UPLOAD_WORKERS", "2")),
+                                    generate_workers=int(os.getenv("GEMINI_GENERATE_WORKERS", "4")))
+        else:
+            results = run_batch(paths, make_processor, workers=workers, max_highlights=max_highlights)
+    for row in results:
+        rows.append(row)
+        if row["status"] == "ok":
+            typer.echo(f"Done: {os.path.basename(row['path'])} → {row['highlights']} highlights")
+        else:
+            typer.echo(f"Error: {row['path']}: {row['error']}")
+    typer.echo(format_summary(rows, time.perf_counter() - start))
+    if trace:
+        tracing.disable()
+        typer.echo(tracing.summary_table())
+    if profiler:
+        profiler.write(profile)
+        typer.echo(f"Profile written to {profile}")
+
+@app.command()
+def worker(workers: int = typer.Option(int(os.getenv("WORKERS","1")), min=1),
+           max_highlights: int = typer.Option(int(os.getenv("MAX_HIGHLIGHTS","10"))),
+           follow: bool = typer.Option(False, help="Keep polling for new jobs instead of exiting when idle")):
+    """Attach extra workers to the job queue filled by `--queue` (any host sharing the jobs DB)."""
+    load_dotenv()
+    from app.processors.video_processor import VideoProcessor
+    from app.processors.worker import run_queue
+    rows = []
+    start = time.perf_counter()
+    for row in run_queue(VideoProcessor, workers=workers, max_highlights=max_highlights, exit_when_idle=not follow):
+        rows.append(row)
+        typer.echo(f"{row['status']}: {row['path']}" + (f": {row['error']}" if row["error"] else ""))
+    typer.echo(format_summary(rows, time.perf_counter() - start))
+
+@app.command()
+def warmup():
+    """Download and cache the embedding model so the first ingest does not pay for it."""
+    load_dotenv()
+    from app import embeddings
+    typer.echo(f"Embedding model {embeddings.EMBEDDING_MODEL} ({embeddings.EMBEDDING_BACKEND}) ready in {embeddings.warmup()}")
 
 if __name__ == "__main__":
-    app()
\ No newline at end of file
+    app()
@@ -0,0 +1,36 @@
+import os, sys, threading
+
+try:
+    from embedding_models import load_model as _load_model
+except ImportError:  # a checkout rather than the image: shared/ sits next to this project
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "shared"))
+    from embedding_models import load_model as _load_model
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR") or os.path.join(os.getenv("OUTPUT_DIR", "output"), "models")
+# torch (fp32 PyTorch) | onnx (ONNX Runtime) | int8 (ONNX Runtime, dynamically quantized weights)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+# Instruction set the int8 model is quantized for: avx2 | avx512 | avx512_vnni | arm64
+EMBEDDING_QUANT_CONFIG = os.getenv("EMBEDDING_QUANT_CONFIG", "avx2")
+
+_model = None
+_lock = threading.Lock()
+
+def load_model(name: str = EMBEDDING_MODEL, backend: str = EMBEDDING_BACKEND, cache_dir: str = MODEL_CACHE_DIR,
+               quant_config: str = EMBEDDING_QUANT_CONFIG):
+    """shared/embedding_models.load_model (the same loader the chat API uses) with this process's settings."""
+    return _load_model(name, backend, cache_dir, quant_config)
+
+def get_embedder():
+    """Process-wide embedder (EMBEDDING_BACKEND), imported and loaded on first use."""
+    global _model
+    if _model is None:
+        with _lock:
+            if _model is None:
+                _model = load_model()
+    return _model
+
+def warmup() -> str:
+    """Download/export the model into MODEL_CACHE_DIR (if needed) and run one encode."""
+    get_embedder().encode(["warmup"])
+    return MODEL_CACHE_DIR
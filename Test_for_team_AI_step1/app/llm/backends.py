@@ -0,0 +1,109 @@
+import os, json, time, random
+from typing import Any, Dict, List, Protocol
+from .cache import file_sha256
+from .gemini_client import GEMINI_MODEL, GeminiClient, get_client, normalize_highlights, PROMPT_VERSION
+
+class LLMBackend(Protocol):
+    """What VideoProcessor needs from an LLM: highlights for one video file."""
+    def summarize(self, path: str, max_highlights: int = 10, on_stage=None) -> List[Dict[str, Any]]: ...
+
+def record_name(digest: str, model: str, max_highlights: int) -> str:
+    """Recordings are keyed like the result cache: file hash, model, prompt version and max_highlights."""
+    return f"{digest}.{model.replace('/', '_')}.p{PROMPT_VERSION}.n{int(max_highlights)}.json"
+
+class RecordingBackend:
+    """Calls Gemini and saves each raw response under <store_dir>/record_name(...) for later replay."""
+    def __init__(self, store_dir: str, client: GeminiClient | None = None):
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        self.client = client or get_client()
+
+    def missing_record(self, path: str, max_highlights: int = 10) -> bool:
+        """True until this file has been recorded with these parameters. VideoProcessor then skips
+        its result cache and duplicate-content shortcut, so re-seen videos still get recorded."""
+        name = record_name(file_sha256(path), self.client.model, max_highlights)
+        return not os.path.exists(os.path.join(self.store_dir, name))
+
+    def summarize(self, path: str, max_highlights: int = 10, on_stage=None) -> List[Dict[str, Any]]:
+        uploaded = self.client.upload_active(path)
+        if on_stage:
+            on_stage("summarizing")
+        try:
+            raw = self.client.generate_raw(uploaded, max_highlights)
+        finally:
+            self.client.delete(uploaded)
+        record = {"model": self.client.model, "prompt_version": PROMPT_VERSION,
+                  "max_highlights": max_highlights, "raw": raw}
+        target = os.path.join(self.store_dir, record_name(file_sha256(path), self.client.model, max_highlights))
+        with open(f"{target}.tmp", "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(f"{target}.tmp", target)
+        return normalize_highlights(raw)
+
+_WORDS = ("crowd cheers goal launch countdown rocket speaker stage explosion car race crash dog runs "
+          "ball kick jump fireworks drone shot sunset wave surfer concert guitar solo interview laugh").split()
+
+class ReplayBackend:
+    """Offline stand-in: returns recorded responses, or synthetic highlights when none exist,
+    after an optional simulated latency (`latency_s` ± `jitter_s`)."""
+    # Keeps replayed/synthetic answers out of the result-cache entries of real Gemini calls.
+    cache_tag = "replay"
+
+    def __init__(self, store_dir: str | None = None, latency_s: float = 0.0, jitter_s: float = 0.0,
+                 synthetic: bool = True, duration_s: float = 60.0, model: str = GEMINI_MODEL):
+        self.store_dir = store_dir
+        self.model = model
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.synthetic = synthetic
+        self.duration_s = duration_s
+
+    def _recorded(self, digest: str, max_highlights: int) -> Any:
+        if not self.store_dir:
+            return None
+        for name in (record_name(digest, self.model, max_highlights), f"{digest}.json"):  # then pre-keyed recordings
+            try:
+                with open(os.path.join(self.store_dir, name), "r", encoding="utf-8") as f:
+                    record = json.load(f)
+            except FileNotFoundError:
+                continue
+            if (record.get("model"), record.get("prompt_version"), record.get("max_highlights")) == (
+                    self.model, PROMPT_VERSION, max_highlights):
+                return record["raw"]
+        return None
+
+    def _synthetic(self, digest: str, max_highlights: int) -> List[Dict[str, Any]]:
+        rng = random.Random(digest)
+        slot = self.duration_s / max(1, max_highlights)
+        items = []
+        for i in range(max_highlights):
+            start = round(i * slot + rng.uniform(0, slot / 2), 1)
+            words = rng.sample(_WORDS, 8)
+            items.append({"start_s": start, "end_s": round(start + rng.uniform(1.0, slot / 2 + 1.0), 1),
+                          "title": " ".join(words[:3]).capitalize(),
+                          "summary": f"{' '.join(words).capitalize()}.", "score": round(rng.random(), 2)})
+        return items
+
+    def summarize(self, path: str, max_highlights: int = 10, on_stage=None) -> List[Dict[str, Any]]:
+        if self.latency_s or self.jitter_s:
+            time.sleep(max(0.0, self.latency_s + random.uniform(-self.jitter_s, self.jitter_s)))
+        digest = file_sha256(path)
+        raw = self._recorded(digest, max_highlights)
+        if raw is None:
+            if not self.synthetic:
+                raise KeyError(f"no recorded response for {path} ({digest}, max_highlights={max_highlights})")
+            raw = self._synthetic(digest, max_highlights)
+        return normalize_highlights(raw)[:max_highlights]
+
+def get_backend(name: str | None = None) -> LLMBackend:
+    """LLM_BACKEND = gemini (default) | record | replay."""
+    name = (name or os.getenv("LLM_BACKEND", "gemini")).lower()
+    store = os.getenv("LLM_RECORD_DIR") or os.path.join(os.getenv("OUTPUT_DIR", "output"), "llm_records")
+    if name == "record":
+        return RecordingBackend(store)
+    if name == "replay":
+        return ReplayBackend(store, latency_s=float(os.getenv("LLM_REPLAY_LATENCY_S", "0")),
+                             jitter_s=float(os.getenv("LLM_REPLAY_JITTER_S", "0")))
+    if name != "gemini":
+        raise ValueError(f"unknown LLM_BACKEND {name!r}")
+    return get_client()
@@ -0,0 +1,131 @@
+import os, json, time, sqlite3, hashlib, threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+CHUNK_SIZE = 1 << 20
+
+def file_sha256(path: str, chunk_size: int = CHUNK_SIZE) -> str:
+    """Stream the file through sha256 in fixed-size chunks (never loads it whole).
+
+    Memoized on (path, size, mtime) so the processor and an LLM backend can both ask for it.
+    """
+    st = os.stat(path)
+    return _sha256(path, st.st_size, st.st_mtime_ns, chunk_size)
+
+@lru_cache(maxsize=4096)
+def _sha256(path: str, size: int, mtime_ns: int, chunk_size: int) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+def cache_key(content_hash: str, model: str, prompt_version: str, max_highlights: int, **extra) -> str:
+    parts = [content_hash, model, prompt_version, str(int(max_highlights))]
+    parts += [f"{k}={extra[k]}" for k in sorted(extra)]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+class SQLiteResultCache:
+    """Highlight lists keyed by cache_key(), evicted least-recently-used once over max_bytes."""
+    def __init__(self, path: str, max_bytes: int):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, highlights: List[Dict[str, Any]]) -> None:
+        value = json.dumps(highlights)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                               (key, value, len(value), time.time()))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = 0
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM results ORDER BY accessed DESC"):
+            total += size
+            if total > self.max_bytes:
+                stale.append((key,))
+        if stale:
+            self._conn.executemany("DELETE FROM results WHERE key = ?", stale)
+
+    def close(self):
+        self._conn.close()
+
+class JsonResultCache:
+    """One <key>.json file per entry; file mtime doubles as the LRU clock."""
+    def __init__(self, directory: str, max_bytes: int):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        os.utime(path)
+        return value
+
+    def put(self, key: str, highlights: List[Dict[str, Any]]) -> None:
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(highlights, f)
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for e in it:
+                if e.name.endswith(".json"):
+                    st = e.stat()
+                    entries.append((st.st_mtime, st.st_size, e.path))
+        total = 0
+        for _, size, path in sorted(entries, reverse=True):
+            total += size
+            if total > self.max_bytes:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def close(self):
+        pass
+
+def open_cache():
+    """Build the result cache configured by RESULT_CACHE (sqlite | json | off)."""
+    backend = os.getenv("RESULT_CACHE", "sqlite").lower()
+    max_bytes = int(float(os.getenv("RESULT_CACHE_MAX_MB", "256")) * 1024 * 1024)
+    base = os.getenv("OUTPUT_DIR", "output")
+    if backend == "sqlite":
+        return SQLiteResultCache(os.getenv("RESULT_CACHE_PATH", os.path.join(base, "result_cache.sqlite3")), max_bytes)
+    if backend == "json":
+        return JsonResultCache(os.getenv("RESULT_CACHE_PATH", os.path.join(base, "result_cache")), max_bytes)
+    return None
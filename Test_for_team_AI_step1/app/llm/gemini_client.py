@@ -1,10 +1,14 @@
-import os, json, time
-from typing import Dict, Any, List
-from google import genai
+import os, json, time, random, queue, threading, contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
+from ..tracing import span, current_video
 
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+# Bump whenever the prompt or response schema changes so cached results are not reused.
+PROMPT_VERSION = "2"
 
+# Schema: top-level ARRAY of highlight OBJECTs
 schema = {
   "type": "ARRAY",
   "items": {
@@ -14,97 +18,53 @@ schema = {
       "start_s": {"type": "NUMBER"},
       "end_s": {"type": "NUMBER"},
       "title": {"type": "STRING"},
-      "summary": {"type": "STRING"}
+      "summary": {"type": "STRING"},
+      "score": {"type": "NUMBER"}
     }
   }
 }
 
-def llm_summarize_video(filename: str, max_highlights: int = 10) -> Dict[str, Any]:
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
 
-    def _wait_file_active(file, timeout_s: float = 60.0, poll_s: float = 0.5):
-        start = time.time()
-        file_id = getattr(file, "name", None) or getattr(file, "id", None)
-        if not file_id:
-            file_id = file
-        while True:
-            f = client.files.get(name=file_id)
-            state = getattr(f, "state", None)
-            if state == "ACTIVE":
-                return f
-            if state in {"FAILED", "DELETED"}:
-                print(f"File {file_id} state={state}, cannot use.")
-                return None
-            if time.time() - start > timeout_s:
-                print(f"File {file_id} not ACTIVE after {timeout_s}s (last state={state}).")
-                return None
-            time.sleep(poll_s)
-
-    if not GOOGLE_API_KEY:
-        raise RuntimeError("GOOGLE_API_KEY is not set")
-    client = genai.Client(api_key=GOOGLE_API_KEY)
-    uploaded = _wait_file_active(client.files.upload(file=filename))
-    if not uploaded:
-        return []
-    prompt = (
+class LLMError(RuntimeError):
+    """The video could not be summarized (upload never became ACTIVE, or the answer was unusable).
+    Raised rather than returning no highlights, so the video is retried instead of stored empty."""
+
+def build_prompt(max_highlights: int) -> str:
+    return (
         "You analyze a single video and return highlights.\n"
         f"Return ONLY a JSON array with up to {max_highlights} items. "
-        "Each item is an object with keys: start_s, end_s, title, summary.\n"
+        "Each item is an object with keys: start_s, end_s, title, summary, score.\n"
         "Use seconds from 0.0 (e.g., 0.0, 7.5, 22.0, 135.3) for start_s/end_s. Be concise. "
         "Consider visual objects, spoken content, and motion.\n"
         "A highlight should be when something noteworthy happens "
         "(e.g., explosion, crowd cheer, person speaking clearly, high motion, unusual objects).\n"
+        "score is 0.0-1.0: how noteworthy the highlight is compared to the rest of the video.\n"
         "JSON only—no extra text."
     )
 
-    # Schema: top-level ARRAY of highlight OBJECTs
-    schema = {
-        "type": "ARRAY",
-        "items": {
-            "type": "OBJECT",
-            "required": ["start_s", "end_s", "title", "summary"],
-            "properties": {
-                "start_s": {"type": "NUMBER"},
-                "end_s": {"type": "NUMBER"},
-                "title": {"type": "STRING"},
-                "summary": {"type": "STRING"}
-            }
-        }
-    }
-
-    resp = client.models.generate_content(
-        model=GEMINI_MODEL,
-        contents=[prompt, uploaded],  # prompt + video
-        config=genai.types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema=schema,
-            temperature=0.1,
-        ),
-    )
-
+def parse_response(resp) -> Any:
     # Prefer structured parse
     if getattr(resp, "parsed", None) is not None:
-        raw = resp.parsed
-    else:
-        # Fallback: parse text (handle possible code fences)
-        text = (getattr(resp, "text", "") or "").strip()
-        if "```" in text:
-            block = text.split("```", 2)[1]
-            if block.lower().startswith("json"):
-                block = block.split("\n", 1)[1] if "\n" in block else ""
-            text = block.strip() or text
-        raw = json.loads(text)
+        return resp.parsed
+    # Fallback: parse text (handle possible code fences)
+    text = (getattr(resp, "text", "") or "").strip()
+    if "```" in text:
+        block = text.split("```", 2)[1]
+        if block.lower().startswith("json"):
+            block = block.split("\n", 1)[1] if "\n" in block else ""
+        text = block.strip() or text
+    return json.loads(text)
 
+def normalize_highlights(raw: Any) -> List[Dict[str, Any]]:
     # Validate/normalize
     highlights: List[Dict[str, Any]] = []
     if not isinstance(raw, list):
-        print("Model did not return a JSON array.")
-        return highlights
+        raise LLMError(f"model did not return a JSON array (got {type(raw).__name__})")
 
     for item in raw:
         if not isinstance(item, dict):
             continue
-        start_s = float(item.get("start_s", 0.0))
-        end_s = float(item.get("end_s", max(start_s, 0.0)))
         title = str(item.get("title", "")).strip()
         summary = str(item.get("summary", "")).strip()
         if not (title and summary):
@@ -118,10 +78,214 @@ def llm_summarize_video(filename: str, max_highlights: int = 10) -> Dict[str, An
         if not (0.0 <= start_s < end_s):
             continue
 
-        highlights.append({
+        h = {
             "start_s": start_s,
             "end_s": end_s,
             "title": title,
             "summary": summary,
-        })
-    return highlights
\ No newline at end of file
+        }
+        try:
+            h["score"] = min(1.0, max(0.0, float(item["score"])))
+        except (KeyError, TypeError, ValueError):
+            pass
+        highlights.append(h)
+    return highlights
+
+def _status_code(exc: Exception) -> int | None:
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return code if isinstance(code, int) else None
+
+def _is_retryable(exc: Exception) -> bool:
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # Transport failures (httpx / socket) are worth retrying; local errors such as a missing file are not.
+    return isinstance(exc, (ConnectionError, TimeoutError)) or type(exc).__module__.startswith("httpx")
+
+def _retry_after_s(exc: Exception) -> float | None:
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if headers:
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    # google.rpc.RetryInfo, e.g. {"retryDelay": "13s"}
+    details = getattr(exc, "details", None)
+    if isinstance(details, dict):
+        for d in (details.get("error") or {}).get("details") or []:
+            delay = str(d.get("retryDelay", "")) if isinstance(d, dict) else ""
+            if delay.endswith("s"):
+                try:
+                    return float(delay[:-1])
+                except ValueError:
+                    pass
+    return None
+
+def _file_name(file) -> str:
+    return getattr(file, "name", None) or getattr(file, "id", None) or file
+
+class GeminiClient:
+    """Long-lived wrapper around `genai.Client` for upload → wait-active → generate → delete.
+
+    `client` may be any object exposing the `files` / `models` surface of `genai.Client`,
+    which is how the pipeline is exercised against a local fake.
+    """
+    def __init__(self, api_key: str | None = None, model: str = GEMINI_MODEL, client=None,
+                 max_retries: int = 5, base_delay_s: float = 0.5, max_delay_s: float = 30.0,
+                 active_timeout_s: float = 300.0, max_poll_s: float = 5.0):
+        self.api_key = api_key or GOOGLE_API_KEY
+        self.model = model
+        self.max_retries = max_retries
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.active_timeout_s = active_timeout_s
+        self.max_poll_s = max_poll_s
+        self._client = client
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    if not self.api_key:
+                        raise RuntimeError("GOOGLE_API_KEY is not set")
+                    from google import genai
+                    self._client = genai.Client(api_key=self.api_key)
+        return self._client
+
+    def _backoff_s(self, attempt: int) -> float:
+        # Exponential backoff with "equal jitter" so parallel workers do not retry in lockstep.
+        delay = min(self.max_delay_s, self.base_delay_s * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _call(self, fn, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                time.sleep(_retry_after_s(e) or self._backoff_s(attempt))
+
+    def upload(self, path: str):
+        return self._call(self.client.files.upload, file=path)
+
+    def wait_active(self, file, timeout_s: float | None = None):
+        timeout_s = self.active_timeout_s if timeout_s is None else timeout_s
+        file_id = _file_name(file)
+        start = time.monotonic()
+        delay = 0.25
+        while True:
+            f = self._call(self.client.files.get, name=file_id)
+            state = str(getattr(getattr(f, "state", None), "value", getattr(f, "state", None)))
+            if state == "ACTIVE":
+                return f
+            if state in {"FAILED", "DELETED"}:
+                print(f"File {file_id} state={state}, cannot use.")
+                return None
+            remaining = timeout_s - (time.monotonic() - start)
+            if remaining <= 0:
+                print(f"File {file_id} not ACTIVE after {timeout_s}s (last state={state}).")
+                return None
+            time.sleep(min(remaining, delay / 2 + random.uniform(0, delay / 2)))
+            delay = min(self.max_poll_s, delay * 2)
+
+    def generate_raw(self, file, max_highlights: int = 10) -> Any:
+        resp = self._call(
+            self.client.models.generate_content,
+            model=self.model,
+            contents=[build_prompt(max_highlights), file],  # prompt + video
+            config={
+                "response_mime_type": "application/json",
+                "response_schema": schema,
+                "temperature": 0.1,
+            },
+        )
+        return parse_response(resp)
+
+    def delete(self, file) -> None:
+        try:
+            self.client.files.delete(name=_file_name(file))
+        except Exception as e:
+            print(f"Could not delete remote file {_file_name(file)}: {e}")
+
+    def upload_active(self, path: str):
+        with span("upload"):
+            uploaded = self.upload(path)
+        with span("wait_active"):
+            active = self.wait_active(uploaded)
+        if active is None:
+            self.delete(uploaded)
+            raise LLMError(f"uploaded {path} never became ACTIVE")
+        return active
+
+    def _generate_and_delete(self, file, max_highlights: int) -> List[Dict[str, Any]]:
+        try:
+            with span("generate"):
+                raw = self.generate_raw(file, max_highlights)
+            return normalize_highlights(raw)
+        finally:
+            self.delete(file)
+
+    def summarize(self, path: str, max_highlights: int = 10, on_stage=None) -> List[Dict[str, Any]]:
+        uploaded = self.upload_active(path)
+        if on_stage:
+            on_stage("summarizing")
+        return self._generate_and_delete(uploaded, max_highlights)
+
+    def summarize_many(self, paths: Iterable[str], max_highlights: int = 10, upload_workers: int = 2,
+                       generate_workers: int = 4) -> Iterator[Tuple[str, List[Dict[str, Any]] | Exception]]:
+        """Yield (path, highlights or exception) in completion order.
+
+        Uploads (including the wait for ACTIVE) and generation run on separate pools, so
+        video N+1 is uploading while video N is generating. Admission is bounded, so `paths`
+        may be a lazy directory walk. Each video's stages run in a copy of the caller's context
+        with `tracing.current_video` set to its path.
+        """
+        results: queue.Queue = queue.Queue()
+        up = ThreadPoolExecutor(upload_workers, thread_name_prefix="gemini-upload")
+        gen = ThreadPoolExecutor(generate_workers, thread_name_prefix="gemini-generate")
+
+        def _finish(path, file):
+            try:
+                results.put((path, self._generate_and_delete(file, max_highlights)))
+            except Exception as e:
+                results.put((path, e))
+
+        def _after_upload(path, ctx, fut):
+            try:
+                file = fut.result()
+            except Exception as e:
+                results.put((path, e))
+                return
+            gen.submit(ctx.run, _finish, path, file)
+
+        submitted = done = 0
+        try:
+            for path in paths:
+                while submitted - done >= upload_workers + generate_workers:
+                    yield results.get(); done += 1
+                ctx = contextvars.copy_context()
+                ctx.run(current_video.set, path)
+                # The upload has left ctx by the time its callback hands ctx on to generation.
+                up.submit(ctx.run, self.upload_active, path).add_done_callback(
+                    lambda fut, path=path, ctx=ctx: _after_upload(path, ctx, fut))
+                submitted += 1
+            while done < submitted:
+                yield results.get(); done += 1
+        finally:
+            up.shutdown(wait=True, cancel_futures=True)
+            gen.shutdown(wait=True)
+
+_default_client: GeminiClient | None = None
+_default_lock = threading.Lock()
+
+def get_client() -> GeminiClient:
+    """Process-wide client shared by every VideoProcessor / worker thread."""
+    global _default_client
+    if _default_client is None:
+        with _default_lock:
+            if _default_client is None:
+                _default_client = GeminiClient()
+    return _default_client
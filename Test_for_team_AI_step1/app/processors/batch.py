@@ -0,0 +1,193 @@
+import os, queue, threading, time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from typing import Callable, Dict, Iterable, Iterator, List
+from ..tracing import current_video
+
+VIDEO_EXTS = (".mp4", ".mov", ".m4v", ".mkv")
+
+def iter_video_paths(input: str, recursive: bool = False) -> Iterator[str]:
+    """Yield video files under `input` lazily, so huge folders never sit in memory."""
+    if os.path.isfile(input):
+        yield input
+        return
+    if recursive:
+        for root, dirs, files in os.walk(input):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(VIDEO_EXTS):
+                    yield os.path.join(root, name)
+        return
+    with os.scandir(input) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.lower().endswith(VIDEO_EXTS):
+                yield entry.path
+
+class _Processors:
+    """One lazily built processor (and so one DB session) per worker thread."""
+    def __init__(self, make_processor: Callable):
+        self.make_processor = make_processor
+        self.local = threading.local()
+        self.all: List = []
+        self.lock = threading.Lock()
+
+    def get(self):
+        proc = getattr(self.local, "proc", None)
+        if proc is None:
+            proc = self.local.proc = self.make_processor()
+            with self.lock:
+                self.all.append(proc)
+        return proc
+
+    def close(self):
+        for proc in self.all:
+            close = getattr(proc, "close", None)
+            if close:
+                close()
+
+def _row(path: str, t0: float, result: Dict | None = None, error: Exception | None = None) -> Dict:
+    if error is not None:
+        return {"path": path, "status": "error", "highlights": 0,
+                "seconds": time.perf_counter() - t0, "error": str(error)}
+    return {"path": path, "status": "ok", "highlights": len(result["highlights"]),
+            "seconds": time.perf_counter() - t0, "error": None}
+
+def run_batch(paths: Iterable[str], make_processor: Callable, workers: int = 1,
+              max_highlights: int = 10) -> Iterator[Dict]:
+    """Run `processor.process` over `paths` on a bounded pool, yielding one status dict per file.
+
+    Each worker thread lazily builds its own processor (and so its own DB session);
+    at most `2 * workers` paths are in flight, so the directory walk is consumed as we go.
+    """
+    workers = max(1, int(workers))
+    procs = _Processors(make_processor)
+
+    def _work(path: str) -> Dict:
+        t0 = time.perf_counter()
+        try:
+            return _row(path, t0, procs.get().process(path, max_highlights=max_highlights))
+        except Exception as e:
+            return _row(path, t0, error=e)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as ex:
+            pending = set()
+            for p in paths:
+                pending.add(ex.submit(_work, p))
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for f in done:
+                        yield f.result()
+            for f in as_completed(pending):
+                yield f.result()
+    finally:
+        procs.close()
+
+def run_pipelined(paths: Iterable[str], make_processor: Callable, llm, workers: int = 1,
+                  max_highlights: int = 10, upload_workers: int = 2, generate_workers: int = 4) -> Iterator[Dict]:
+    """Like `run_batch`, but whole-file LLM calls go through `llm.summarize_many`, so video N+1
+    uploads while video N generates. Hashing, cache lookups, embedding and the DB write run on
+    `workers` threads; cache hits, duplicates and windowed videos never enter the LLM pipeline.
+
+    Processors need `prepare(path, max_highlights)`, `summarize(prep)` and `store(prep, highlights)`.
+    """
+    workers = max(1, int(workers))
+    procs = _Processors(make_processor)
+    rows: queue.Queue = queue.Queue()
+    to_llm: queue.Queue = queue.Queue()
+    waiting: Dict[str, tuple] = {}  # path -> (prep, t0) while in the LLM pipeline
+    llm_failed: List[Exception] = []  # set once summarize_many raises; nothing reads to_llm after that
+    llm_lock = threading.Lock()
+    slots = threading.Semaphore(2 * workers + upload_workers + generate_workers)
+
+    def _emit(row: Dict):
+        slots.release()
+        rows.put(row)
+
+    def _finish(prep, t0: float, highlights):
+        token = current_video.set(prep.video_path)
+        try:
+            _emit(_row(prep.video_path, t0, procs.get().store(prep, highlights)))
+        except Exception as e:
+            _emit(_row(prep.video_path, t0, error=e))
+        finally:
+            current_video.reset(token)
+
+    def _prepare(path: str):
+        t0 = time.perf_counter()
+        token = current_video.set(path)
+        try:
+            prep = procs.get().prepare(path, max_highlights)
+            if prep.result is not None:
+                return _emit(_row(path, t0, prep.result))
+            if prep.highlights is not None:
+                return _finish(prep, t0, prep.highlights)
+            if prep.windows:
+                return _finish(prep, t0, procs.get().summarize(prep))
+            with llm_lock:
+                if not llm_failed:
+                    waiting[path] = (prep, t0)
+                    to_llm.put(path)
+                    return
+            _emit(_row(path, t0, error=llm_failed[0]))
+        except Exception as e:
+            _emit(_row(path, t0, error=e))
+        finally:
+            current_video.reset(token)
+
+    def _llm_stage(ex: ThreadPoolExecutor):
+        try:
+            for path, result in llm.summarize_many(iter(to_llm.get, None), max_highlights,
+                                                   upload_workers=upload_workers, generate_workers=generate_workers):
+                with llm_lock:
+                    prep, t0 = waiting.pop(path)
+                if isinstance(result, Exception):
+                    _emit(_row(path, t0, error=result))
+                else:
+                    ex.submit(_finish, prep, t0, result)
+        except Exception as e:
+            with llm_lock:
+                llm_failed.append(RuntimeError(f"LLM pipeline stopped: {e}"))
+                stranded = list(waiting.items())
+                waiting.clear()
+            for path, (_, t0) in stranded:
+                _emit(_row(path, t0, error=llm_failed[0]))
+
+    submitted = emitted = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as ex:
+            llm_thread = threading.Thread(target=_llm_stage, args=(ex,), name="llm-pipeline", daemon=True)
+            llm_thread.start()
+            preps = set()
+            try:
+                for p in paths:
+                    slots.acquire()
+                    submitted += 1
+                    if llm_failed:
+                        # Fail the rest of the walk at once rather than hashing and probing it for nothing.
+                        _emit(_row(p, time.perf_counter(), error=llm_failed[0]))
+                    else:
+                        preps = {f for f in preps if not f.done()}
+                        preps.add(ex.submit(_prepare, p))
+                    while not rows.empty():
+                        yield rows.get(); emitted += 1
+                wait(preps)
+            finally:
+                to_llm.put(None)
+            while emitted < submitted:
+                yield rows.get(); emitted += 1
+            llm_thread.join()
+    finally:
+        procs.close()
+
+def format_summary(rows: List[Dict], elapsed_s: float) -> str:
+    ok = sum(1 for r in rows if r["status"] == "ok")
+    rate = len(rows) / elapsed_s * 60.0 if elapsed_s > 0 else 0.0
+    width = max([len("file")] + [len(r["path"]) for r in rows])
+    lines = [f"{'file':<{width}}  {'status':<6}  {'hl':>3}  {'sec':>7}  error",
+             "-" * (width + 30)]
+    for r in rows:
+        lines.append(f"{r['path']:<{width}}  {r['status']:<6}  {r['highlights']:>3}  "
+                     f"{r['seconds']:>7.2f}  {r['error'] or ''}".rstrip())
+    lines.append(f"{len(rows)} videos ({ok} ok, {len(rows) - ok} failed) in {elapsed_s:.1f}s "
+                 f"→ {rate:.1f} videos/min")
+    return "\n".join(lines)
@@ -0,0 +1,95 @@
+from typing import List, Tuple
+import numpy as np
+import cv2
+
+Segment = Tuple[float, float]
+
+def motion_profile(path: str, sample_fps: float = 2.0, width: int = 160,
+                   hist_bins: int = 16) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Per-second (motion, scene_cut) scores from downscaled, frame-skipped decoding.
+
+    Only every `fps / sample_fps`-th frame is retrieved and converted; the rest are
+    `grab()`bed. Motion is the mean absolute grey-level difference between consecutive
+    samples (0-1); scene cut is the L1 distance between their grey histograms (0-1).
+    Returns (motion, cuts, duration_s).
+    """
+    cap = cv2.VideoCapture(path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        step = max(1, int(round(fps / sample_fps)))
+        times, diffs, hists = [], [], []
+        prev = None
+        idx = 0
+        while True:
+            if idx % step:
+                if not cap.grab():
+                    break
+                idx += 1
+                continue
+            ok, frame = cap.read()
+            if not ok:
+                break
+            h, w = frame.shape[:2]
+            small = cv2.resize(frame, (width, max(1, h * width // w)), interpolation=cv2.INTER_AREA)
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            hist = np.bincount((gray >> (8 - int(np.log2(hist_bins)))).ravel(), minlength=hist_bins)
+            hists.append(hist / gray.size)
+            diffs.append(0.0 if prev is None else float(np.abs(gray.astype(np.int16) - prev).mean()) / 255.0)
+            prev = gray.astype(np.int16)
+            times.append(idx / fps)
+            idx += 1
+    finally:
+        cap.release()
+
+    duration = idx / fps
+    n_sec = int(np.ceil(duration)) or 1
+    if not times:
+        return np.zeros(n_sec, np.float32), np.zeros(n_sec, np.float32), duration
+    secs = np.minimum(np.asarray(times, dtype=np.float64).astype(np.int64), n_sec - 1)
+    hists = np.asarray(hists, dtype=np.float32)
+    cut = np.zeros(len(hists), np.float32)
+    cut[1:] = np.abs(np.diff(hists, axis=0)).sum(axis=1) / 2.0
+    motion = np.zeros(n_sec, np.float32)
+    cuts = np.zeros(n_sec, np.float32)
+    np.maximum.at(motion, secs, np.asarray(diffs, dtype=np.float32))
+    np.maximum.at(cuts, secs, cut)
+    return motion, cuts, duration
+
+def candidate_segments(motion: np.ndarray, cuts: np.ndarray, duration_s: float,
+                       motion_threshold: float | None = None, cut_threshold: float = 0.35,
+                       pad_s: float = 2.0, merge_gap_s: float = 3.0, max_segments: int = 8,
+                       max_keep_ratio: float = 0.8) -> List[Segment]:
+    """Padded time ranges worth sending to the LLM.
+
+    The default motion threshold adapts to the clip (median + 3·MAD). If nothing qualifies,
+    or more than `max_keep_ratio` of the clip does, the whole clip is returned.
+    """
+    whole = [(0.0, float(duration_s))]
+    if motion.size == 0:
+        return whole
+    if motion_threshold is None:
+        med = float(np.median(motion))
+        motion_threshold = med + 3.0 * float(np.median(np.abs(motion - med))) + 1e-3
+    hot = np.flatnonzero((motion >= motion_threshold) | (cuts >= cut_threshold))
+    if hot.size == 0:
+        return whole
+
+    # Consecutive hot seconds -> runs, padded, then merged when close together.
+    breaks = np.flatnonzero(np.diff(hot) > 1)
+    starts = np.concatenate(([hot[0]], hot[breaks + 1])).astype(np.float64) - pad_s
+    ends = np.concatenate((hot[breaks], [hot[-1]])).astype(np.float64) + 1.0 + pad_s
+    segments: List[List[float]] = []
+    for s, e in zip(np.clip(starts, 0, duration_s), np.clip(ends, 0, duration_s)):
+        if segments and s - segments[-1][1] <= merge_gap_s:
+            segments[-1][1] = max(segments[-1][1], e)
+        else:
+            segments.append([s, e])
+    while len(segments) > max_segments:
+        # Too many small uploads cost more than they save: close the narrowest gap.
+        i = int(np.argmin([segments[j + 1][0] - segments[j][1] for j in range(len(segments) - 1)]))
+        segments[i][1] = segments.pop(i + 1)[1]
+
+    kept = sum(e - s for s, e in segments)
+    if kept >= max_keep_ratio * duration_s:
+        return whole
+    return [(float(s), float(e)) for s, e in segments]
@@ -0,0 +1,272 @@
+import os, struct
+from dataclasses import dataclass, asdict
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+@dataclass
+class VideoMeta:
+    duration_sec: Optional[float]
+    fps: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    codec: Optional[str] = None
+    source: str = "header"
+
+    def columns(self) -> Dict:
+        d = asdict(self)
+        d.pop("source")
+        return d
+
+# ---------- MP4 / MOV (ISO BMFF) ----------
+_MP4_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+def _boxes(buf: bytes, start: int = 0, end: int | None = None) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield (type, payload_start, payload_end) for the boxes in buf[start:end]."""
+    end = len(buf) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", buf, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", buf, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            return
+        yield kind, pos + header, pos + size
+        pos += size
+
+def _read_moov(f: BinaryIO, file_size: int) -> bytes | None:
+    pos = 0
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        head = f.read(16)
+        if len(head) < 8:
+            return None
+        size, kind = struct.unpack_from(">I4s", head)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", head, 8)[0]
+            header = 16
+        elif size == 0:
+            size = file_size - pos
+        if size < header:
+            return None
+        if kind == b"moov":
+            f.seek(pos)
+            return f.read(size)
+        pos += size  # skip mdat & co. without reading them
+    return None
+
+def _full_box_times(buf: bytes, start: int) -> Tuple[int, int]:
+    """(timescale, duration) from an mvhd/mdhd payload."""
+    if buf[start] == 1:
+        return struct.unpack_from(">IQ", buf, start + 4 + 16)
+    return struct.unpack_from(">II", buf, start + 4 + 8)
+
+def _parse_mp4(f: BinaryIO, file_size: int) -> VideoMeta | None:
+    moov = _read_moov(f, file_size)
+    if not moov:
+        return None
+    meta = VideoMeta(duration_sec=None)
+    tracks = []
+
+    def walk(start: int, end: int, track: Dict, parent: bytes = b""):
+        for kind, s, e in _boxes(moov, start, end):
+            if kind == b"mvhd":
+                scale, dur = _full_box_times(moov, s)
+                if scale:
+                    meta.duration_sec = dur / scale
+            elif kind == b"tkhd":
+                off = s + (4 + 32 if moov[s] == 1 else 4 + 20) + 16 + 36
+                w, h = struct.unpack_from(">II", moov, off)
+                track["size"] = (w >> 16, h >> 16)
+            elif kind == b"hdlr":
+                # Only mdia's handler names the track type; QuickTime also puts a data handler
+                # ('url '/'alis') in minf, which must not overwrite 'vide'.
+                if parent == b"mdia":
+                    track["handler"] = moov[s + 8:s + 12]
+            elif kind == b"mdhd":
+                track["times"] = _full_box_times(moov, s)
+            elif kind == b"stsd":
+                # first sample entry: size, fourcc, 24 bytes of reserved/pre_defined, width, height
+                track["codec"] = moov[s + 12:s + 16]
+                track["stsd_size"] = struct.unpack_from(">HH", moov, s + 16 + 24)
+            elif kind == b"stts":
+                count = struct.unpack_from(">I", moov, s + 4)[0]
+                track["samples"] = sum(struct.unpack_from(">I", moov, s + 8 + 8 * i)[0] for i in range(count))
+            elif kind == b"trak":
+                t: Dict = {}
+                walk(s, e, t, kind)
+                tracks.append(t)
+            elif kind in _MP4_CONTAINERS:
+                walk(s, e, track, kind)
+
+    walk(0, len(moov), {})
+    video = next((t for t in tracks if t.get("handler") == b"vide"), None)
+    if video:
+        _apply_track(meta, video)
+    return meta
+
+def _apply_track(meta: VideoMeta, t: Dict) -> None:
+    w, h = t.get("size") or (0, 0)
+    if not (w and h) and t.get("stsd_size"):
+        w, h = t["stsd_size"]
+    meta.width, meta.height = (w or None), (h or None)
+    if t.get("codec"):
+        meta.codec = t["codec"].decode("latin-1").strip()
+    scale, dur = t.get("times") or (0, 0)
+    if scale and dur:
+        if t.get("samples"):
+            meta.fps = t["samples"] * scale / dur  # average rate, so VFR files get a sane value
+        if not meta.duration_sec:
+            meta.duration_sec = dur / scale
+
+# ---------- Matroska / WebM (EBML) ----------
+_EBML, _SEGMENT, _INFO, _TRACKS, _CLUSTER = 0x1A45DFA3, 0x18538067, 0x1549A966, 0x1654AE6B, 0x1F43B675
+_TIMECODE_SCALE, _DURATION = 0x2AD7B1, 0x4489
+_TRACK_ENTRY, _TRACK_TYPE, _CODEC_ID, _DEFAULT_DURATION = 0xAE, 0x83, 0x86, 0x23E383
+_VIDEO, _PIXEL_WIDTH, _PIXEL_HEIGHT = 0xE0, 0xB0, 0xBA
+
+def _vint(f: BinaryIO, keep_marker: bool) -> Tuple[int, int]:
+    """(value, length) of an EBML variable-size integer; value -1 means 'unknown size'."""
+    first = f.read(1)
+    if not first:
+        raise EOFError
+    b = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not (b & mask):
+        mask >>= 1; length += 1
+    if length > 8:
+        raise ValueError("invalid EBML vint")
+    value = b if keep_marker else b & (mask - 1)
+    rest = f.read(length - 1)
+    for c in rest:
+        value = (value << 8) | c
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return -1, length
+    return value, length
+
+def _ebml_children(f: BinaryIO, end: int) -> Iterator[Tuple[int, int, int]]:
+    """Yield (id, data_start, size) of elements up to `end`; size is -1 when unknown."""
+    while f.tell() < end:
+        try:
+            eid, _ = _vint(f, keep_marker=True)
+            size, _ = _vint(f, keep_marker=False)
+        except EOFError:
+            return
+        start = f.tell()
+        yield eid, start, size
+        if size < 0:
+            return
+        f.seek(start + size)
+
+def _uint(data: bytes) -> int:
+    return int.from_bytes(data, "big") if data else 0
+
+def _parse_mkv(f: BinaryIO, file_size: int) -> VideoMeta | None:
+    f.seek(0)
+    meta = VideoMeta(duration_sec=None)
+    scale, duration = 1_000_000, None
+    for eid, start, size in _ebml_children(f, file_size):
+        if eid == _EBML:
+            continue
+        if eid != _SEGMENT:
+            return None
+        seg_end = file_size if size < 0 else min(file_size, start + size)
+        for sid, s, ssize in _ebml_children(f, seg_end):
+            if sid == _CLUSTER or ssize < 0:
+                break  # metadata lives before the first cluster
+            if sid == _INFO:
+                for iid, i, isize in _ebml_children(f, s + ssize):
+                    data = f.read(isize)
+                    if iid == _TIMECODE_SCALE:
+                        scale = _uint(data)
+                    elif iid == _DURATION:
+                        duration = struct.unpack(">f" if isize == 4 else ">d", data)[0]
+                f.seek(s + ssize)
+            elif sid == _TRACKS:
+                for tid, t, tsize in _ebml_children(f, s + ssize):
+                    if tid == _TRACK_ENTRY and meta.codec is None:
+                        _parse_mkv_track(f, t + tsize, meta)
+                    f.seek(t + tsize)
+                f.seek(s + ssize)
+        break
+    if duration is not None:
+        meta.duration_sec = duration * scale / 1e9
+    return meta if (meta.duration_sec or meta.codec) else None
+
+def _parse_mkv_track(f: BinaryIO, end: int, meta: VideoMeta) -> None:
+    fields: Dict = {}
+    for eid, start, size in _ebml_children(f, end):
+        if eid == _VIDEO:
+            for vid, v, vsize in _ebml_children(f, start + size):
+                data = f.read(vsize)
+                if vid == _PIXEL_WIDTH:
+                    fields["width"] = _uint(data)
+                elif vid == _PIXEL_HEIGHT:
+                    fields["height"] = _uint(data)
+            f.seek(start + size)
+        else:
+            data = f.read(size)
+            if eid == _TRACK_TYPE:
+                fields["type"] = _uint(data)
+            elif eid == _CODEC_ID:
+                fields["codec"] = data.rstrip(b"\0").decode("ascii", "replace")
+            elif eid == _DEFAULT_DURATION:
+                fields["frame_ns"] = _uint(data)
+    if fields.get("type") != 1:
+        return
+    meta.codec = fields.get("codec")
+    meta.width, meta.height = fields.get("width"), fields.get("height")
+    if fields.get("frame_ns"):
+        meta.fps = 1e9 / fields["frame_ns"]
+
+# ---------- entry points ----------
+def probe_header(path: str) -> VideoMeta | None:
+    """Parse container metadata straight from the file header, without decoding."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        magic = f.read(12)
+        if magic[:4] == b"\x1a\x45\xdf\xa3":
+            return _parse_mkv(f, size)
+        if magic[4:8] in (b"ftyp", b"moov", b"free", b"wide", b"mdat", b"skip"):
+            return _parse_mp4(f, size)
+    return None
+
+def probe_cv2(path: str) -> VideoMeta:
+    import cv2
+    cap = cv2.VideoCapture(path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0.0
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC) or 0)
+        return VideoMeta(
+            duration_sec=float(frames / fps) if fps > 0 and frames > 0 else None,
+            fps=fps or None,
+            width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or None,
+            height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or None,
+            codec=(fourcc.to_bytes(4, "little").decode("latin-1").strip("\0 ") or None) if fourcc else None,
+            source="cv2",
+        )
+    finally:
+        cap.release()
+
+def probe_video(path: str) -> VideoMeta:
+    """Header probe first; open the file with cv2 only for what the header did not give
+    (duration, fps or frame size). Header values win where both have one."""
+    try:
+        meta = probe_header(path)
+    except (OSError, ValueError, EOFError, struct.error, IndexError):
+        meta = None
+    if meta is None:
+        return probe_cv2(path)
+    if meta.duration_sec and meta.fps and meta.width and meta.height:
+        return meta
+    fallback = probe_cv2(path)
+    for field in ("duration_sec", "fps", "width", "height", "codec"):
+        if not getattr(meta, field):
+            setattr(meta, field, getattr(fallback, field))
+    meta.source = "header+cv2"
+    return meta
@@ -0,0 +1,120 @@
+import os, subprocess, tempfile, contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Sequence, Tuple
+
+Window = Tuple[float, float]
+
+def plan_windows(duration_s: float, window_s: float, overlap_s: float) -> List[Window]:
+    """Split [0, duration_s] into windows of `window_s` that overlap by `overlap_s`."""
+    if not 0 <= overlap_s < window_s:
+        raise ValueError(f"window overlap ({overlap_s}s) must be >= 0 and shorter than the window ({window_s}s)")
+    if duration_s <= window_s:
+        return [(0.0, float(duration_s))]
+    step = window_s - overlap_s
+    windows, start = [], 0.0
+    while start < duration_s:
+        end = min(duration_s, start + window_s)
+        windows.append((start, end))
+        if end >= duration_s:
+            break
+        start += step
+    return windows
+
+def split_segments(segments: Sequence[Window], window_s: float, overlap_s: float) -> List[Window]:
+    """Split every segment longer than `window_s` into overlapping windows, in source time."""
+    return [(a + s, a + e) for a, b in segments for s, e in plan_windows(b - a, window_s, overlap_s)]
+
+def _ffprobe(*args: str) -> str:
+    return subprocess.run(["ffprobe", "-v", "error", *args], check=True, capture_output=True, text=True).stdout
+
+def cut_start_s(src: str, start_s: float) -> float:
+    """Source time that a stream-copy cut requested at `start_s` really starts from.
+
+    Input seeking with `-c copy` lands on the keyframe at or before `start_s`. ffprobe's
+    `-read_intervals` seeks the same way, so the first keyframe it reads is that one.
+    """
+    if start_s <= 0:
+        return 0.0
+    origin = _ffprobe("-show_entries", "format=start_time", "-of", "csv=p=0", src).strip()
+    origin = float(origin) if origin not in ("", "N/A") else 0.0  # ffmpeg -ss is relative to this
+    out = _ffprobe("-select_streams", "v:0", "-read_intervals", f"{origin + start_s:.3f}%+#16",
+                   "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", src)
+    for line in out.splitlines():
+        pts, _, flags = line.strip().partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            return min(start_s, max(0.0, float(pts) - origin))
+    return start_s
+
+def cut_segment(src: str, start_s: float, end_s: float, dst: str) -> None:
+    """Stream-copy [start_s, end_s] of `src` into `dst` (no re-encode).
+
+    The copy starts at the keyframe at or before `start_s` (see `cut_start_s`), and its
+    timestamps begin at 0 there.
+    """
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+           "-ss", f"{start_s:.3f}", "-i", src, "-t", f"{end_s - start_s:.3f}",
+           "-map", "0", "-c", "copy", "-avoid_negative_ts", "make_zero", dst]
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+def _overlap_ratio(a: Dict[str, Any], b: Dict[str, Any]) -> float:
+    inter = min(a["end_s"], b["end_s"]) - max(a["start_s"], b["start_s"])
+    if inter <= 0:
+        return 0.0
+    union = max(a["end_s"], b["end_s"]) - min(a["start_s"], b["start_s"])
+    return inter / union if union > 0 else 0.0
+
+def merge_highlights(per_window: Sequence[List[Dict[str, Any]]], max_highlights: int,
+                     iou_threshold: float = 0.5) -> List[Dict[str, Any]]:
+    """Drop near-duplicates from overlapping windows (best score wins), keep the global top-N."""
+    candidates = [h for hs in per_window for h in hs]
+    candidates.sort(key=lambda h: (h.get("score", 0.0), len(h["summary"])), reverse=True)
+    kept: List[Dict[str, Any]] = []
+    for h in candidates:
+        if all(_overlap_ratio(h, k) < iou_threshold for k in kept):
+            kept.append(h)
+        if len(kept) >= max_highlights:
+            break
+    return sorted(kept, key=lambda h: h["start_s"])
+
+def summarize_in_windows(llm, path: str, windows: Sequence[Window], max_highlights: int = 10,
+                         workers: int = 4, retries: int = 2) -> List[Dict[str, Any]]:
+    """Summarize each window of `path` concurrently and merge back onto the source timeline.
+
+    `llm` is anything with `summarize(path, max_highlights)`. A window that raises is
+    retried on its own; the others keep their results. Times are shifted by the window's
+    real (keyframe) start and clipped to the window.
+    """
+    ext = os.path.splitext(path)[1] or ".mp4"
+    with tempfile.TemporaryDirectory(prefix="segments-") as tmp:
+        def _one(i: int, window: Window) -> List[Dict[str, Any]]:
+            start, end = window
+            seg = os.path.join(tmp, f"seg{i:04d}{ext}")
+            offset = None
+            for attempt in range(retries + 1):
+                try:
+                    if offset is None:
+                        offset = cut_start_s(path, start)
+                    if not os.path.exists(seg):
+                        try:
+                            cut_segment(path, start, end, seg)
+                        except Exception:
+                            if os.path.exists(seg):
+                                os.remove(seg)
+                            raise
+                    found = llm.summarize(seg, max_highlights)
+                    break
+                except Exception as e:
+                    if attempt >= retries:
+                        raise RuntimeError(f"window {start:.1f}-{end:.1f}s failed: {e}") from e
+            shifted = []
+            for h in found:
+                h = dict(h, start_s=max(h["start_s"] + offset, start), end_s=min(h["end_s"] + offset, end))
+                if h["start_s"] < h["end_s"]:
+                    shifted.append(h)
+            return shifted
+
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="window") as ex:
+            # Each task runs in a copy of our context so tracing spans keep the video name.
+            futures = [ex.submit(contextvars.copy_context().run, _one, i, w) for i, w in enumerate(windows)]
+            per_window = [f.result() for f in futures]
+    return merge_highlights(per_window, max_highlights)
@@ -1,33 +1,145 @@
 import os
-from typing import Dict
-from sentence_transformers import SentenceTransformer
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
 from sqlalchemy.orm import Session
-import cv2
-from ..llm.gemini_client import llm_summarize_video
-from ..db.repository import create_video, add_highlight
+from ..llm.gemini_client import GEMINI_MODEL, PROMPT_VERSION
+from ..llm.backends import get_backend
+from ..llm.cache import file_sha256, cache_key, open_cache
+from ..db.repository import create_video_with_highlights, find_video_by_hash, list_highlights
 from ..db.database import SessionLocal
+from ..embeddings import get_embedder
+from ..tracing import span, current_video
+from .segments import plan_windows, split_segments, summarize_in_windows
+from .probe import VideoMeta, probe_video
 
-def _video_duration_seconds(path: str) -> float | None:
-    cap = cv2.VideoCapture(path)
-    try:
-        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
-        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0.0
-        if fps > 0 and frames > 0:
-            return float(frames / fps)
-        return None
-    finally:
-        cap.release()
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# Videos longer than CHUNK_WINDOW_S are summarized as overlapping windows (0 disables chunking).
+CHUNK_WINDOW_S = float(os.getenv("CHUNK_WINDOW_S", "0"))
+CHUNK_OVERLAP_S = float(os.getenv("CHUNK_OVERLAP_S", "10"))
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", "4"))
+# Only upload the high-motion / scene-cut parts of each video (padded by PREFILTER_PAD_S).
+PREFILTER = os.getenv("PREFILTER", "0") == "1"
+PREFILTER_PAD_S = float(os.getenv("PREFILTER_PAD_S", "2"))
+# Empty motion threshold = adaptive (median + 3·MAD of the clip's motion).
+PREFILTER_MOTION_THRESHOLD = float(os.getenv("PREFILTER_MOTION_THRESHOLD")) if os.getenv("PREFILTER_MOTION_THRESHOLD") else None
+PREFILTER_CUT_THRESHOLD = float(os.getenv("PREFILTER_CUT_THRESHOLD", "0.35"))
+
+@dataclass
+class Prepared:
+    """A video after everything that happens before the LLM call."""
+    video_path: str
+    filename: str
+    content_hash: str
+    max_highlights: int
+    meta: VideoMeta | None = None
+    windows: List | None = None
+    key: str | None = None
+    highlights: List[Dict[str, Any]] | None = None  # result-cache hit
+    result: Dict | None = None  # duplicate content: already stored, nothing left to do
 
 class VideoProcessor:
-    def __init__(self, db: Session | None = None):
+    def __init__(self, db: Session | None = None, embed_batch_size: int = EMBED_BATCH_SIZE, cache=None, llm=None):
         self.db = db or SessionLocal()
-        self.embedder = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        self.embed_batch_size = embed_batch_size
+        # cache=None → configured from the environment; cache=False → no result cache.
+        self.cache = open_cache() if cache is None else (cache or None)
+        self.llm = llm or get_backend()
+
+    @property
+    def embedder(self):
+        # Loaded on first encode, so runs that fail early never pay for torch.
+        return get_embedder()
+
+    def close(self):
+        self.db.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def process(self, video_path: str, max_highlights: int = 10,
+                on_stage: Callable[[str], None] | None = None) -> Dict:
+        """Summarize, embed and store one video. `on_stage` is told "uploading",
+        "summarizing" and "embedding" as the work progresses (used by the job queue)."""
+        token = current_video.set(video_path)
+        try:
+            return self._process(video_path, max_highlights, on_stage or (lambda state: None))
+        finally:
+            current_video.reset(token)
 
-    def process(self, video_path: str, max_highlights: int = 10) -> Dict:
+    def _process(self, video_path: str, max_highlights: int, on_stage: Callable[[str], None]) -> Dict:
+        prep = self.prepare(video_path, max_highlights)
+        if prep.result is not None:
+            return prep.result
+        highlights = prep.highlights
+        if highlights is None:
+            on_stage("uploading")
+            highlights = self.summarize(prep, on_stage)
+        return self.store(prep, highlights, on_stage)
+
+    def prepare(self, video_path: str, max_highlights: int = 10) -> Prepared:
+        """Hash, duplicate and result-cache lookups, probe and window planning (no network, except
+        that record mode still records a duplicate video)."""
         filename = os.path.basename(video_path)
-        duration = _video_duration_seconds(video_path)
-        video = create_video(self.db, filename=filename, duration_sec=duration)
-        highlights = llm_summarize_video(video_path, max_highlights)
+        with span("hash"):
+            content_hash = file_sha256(video_path)
+        prep = Prepared(video_path, filename, content_hash, max_highlights)
+        # Record mode must reach the LLM even for content it has already seen.
+        missing_record = getattr(self.llm, "missing_record", None)
+        recording = bool(missing_record and missing_record(video_path, max_highlights))
+        existing = find_video_by_hash(self.db, content_hash)
+        if existing is not None:
+            if recording:
+                self.llm.summarize(video_path, max_highlights)
+            # Same bytes already ingested: reuse the stored highlights, no upload and no new Video row.
+            prep.result = {
+                "filename": filename,
+                "video_id": str(existing.id),
+                "highlights": [
+                    {"start": h.start_sec, "end": h.end_sec, "title": h.title, "summary": h.summary}
+                    for h in list_highlights(self.db, existing.id)
+                ],
+            }
+            return prep
+
+        with span("probe"):
+            prep.meta = probe_video(video_path)
+        duration = prep.meta.duration_sec
+        extra = {}
+        if PREFILTER:
+            from .motion import motion_profile, candidate_segments
+            with span("prefilter"):
+                motion, cuts, probed = motion_profile(video_path)
+            segments = candidate_segments(motion, cuts, duration or probed, motion_threshold=PREFILTER_MOTION_THRESHOLD,
+                                          cut_threshold=PREFILTER_CUT_THRESHOLD, pad_s=PREFILTER_PAD_S)
+            # Long motion segments (or a clip with no quiet parts at all) are still chunked into windows.
+            windows = split_segments(segments, CHUNK_WINDOW_S, CHUNK_OVERLAP_S) if CHUNK_WINDOW_S > 0 else segments
+            if windows != [(0.0, float(duration or probed))]:
+                prep.windows = windows
+            # Keyed on the settings and on what was actually uploaded, so a threshold change never hits stale results.
+            extra = {"prefilter_pad_s": PREFILTER_PAD_S, "prefilter_motion": PREFILTER_MOTION_THRESHOLD,
+                     "prefilter_cut": PREFILTER_CUT_THRESHOLD,
+                     "prefilter_segments": ",".join(f"{a:.2f}-{b:.2f}" for a, b in windows)}
+        elif CHUNK_WINDOW_S > 0 and duration and duration > CHUNK_WINDOW_S:
+            prep.windows = plan_windows(duration, CHUNK_WINDOW_S, CHUNK_OVERLAP_S)
+            extra = {"window_s": CHUNK_WINDOW_S, "overlap_s": CHUNK_OVERLAP_S}
+        if getattr(self.llm, "cache_tag", None):
+            extra["llm"] = self.llm.cache_tag
+        prep.key = cache_key(content_hash, GEMINI_MODEL, PROMPT_VERSION, max_highlights, **extra)
+        prep.highlights = self.cache.get(prep.key) if self.cache is not None and not recording else None
+        return prep
+
+    def summarize(self, prep: Prepared, on_stage: Callable[[str], None] | None = None) -> List[Dict[str, Any]]:
+        """The LLM call for one prepared video (windowed when chunking or the pre-filter applies)."""
+        if prep.windows:
+            return summarize_in_windows(self.llm, prep.video_path, prep.windows, prep.max_highlights,
+                                        workers=CHUNK_WORKERS)
+        return self.llm.summarize(prep.video_path, prep.max_highlights, on_stage=on_stage)
+
+    def store(self, prep: Prepared, highlights: List[Dict[str, Any]],
+              on_stage: Callable[[str], None] | None = None) -> Dict:
+        """Cache fresh LLM output, embed it and write the video with all its highlights."""
+        # Failed uploads and unusable answers raise before this point, so an empty list is a real answer.
+        if prep.highlights is None and self.cache is not None:
+            self.cache.put(prep.key, highlights)
         results = []
 
         for item in highlights:
@@ -35,23 +147,33 @@ class VideoProcessor:
             end   = float(item.get("end_s",   item.get("end",   start)))
             title = str(item.get("title", "")).strip()
             summary = str(item.get("summary", "")).strip()
-            text_for_embed = f"{title}. {summary}"
-            vec = self.embedder.encode(text_for_embed).tolist()
-            add_highlight(
-                self.db,
-                video_id=video.id,
-                start_sec=start,
-                end_sec=end,
-                title=title,
-                summary=summary,
-                embedding=vec,
-            )
-
             results.append(
                 {"start": start, "end": end, "title": title, "summary": summary}
             )
 
+        # One forward pass per video, then one transaction for the video and all its highlights.
+        if on_stage:
+            on_stage("embedding")
+        vectors = []
+        if results:
+            texts = [f"{r['title']}. {r['summary']}" for r in results]
+            with span("embed"):
+                vectors = self.embedder.encode(texts, batch_size=self.embed_batch_size).tolist()
+        with span("db_write"):
+            video_id = create_video_with_highlights(
+                self.db,
+                filename=prep.filename,
+                content_hash=prep.content_hash,
+                **prep.meta.columns(),
+                highlights=[
+                    {"start_sec": r["start"], "end_sec": r["end"], "title": r["title"],
+                     "summary": r["summary"], "embedding": vec}
+                    for r, vec in zip(results, vectors)
+                ],
+            )
+
         return {
-            "filename": filename,
+            "filename": prep.filename,
+            "video_id": str(video_id),
             "highlights": results
         }
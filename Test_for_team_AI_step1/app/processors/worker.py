@@ -0,0 +1,102 @@
+import os, queue, socket, threading, time
+from typing import Callable, Dict, Iterator
+from ..db import jobs
+
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# A claimed job's heartbeat is refreshed every LEASE_S / 4 while it runs; after LEASE_S without one, others reclaim it.
+LEASE_S = float(os.getenv("JOB_LEASE_S", "120"))
+
+class _Heartbeat:
+    """Background lease renewal for the job being processed (own session: sessions are not thread-safe)."""
+    def __init__(self, job_id: int, worker_id: str, interval_s: float):
+        self.job_id, self.worker_id, self.interval_s = job_id, worker_id, interval_s
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"heartbeat-{job_id}")
+
+    def _run(self):
+        db = jobs.JobsSession()
+        try:
+            while not self._stop.wait(self.interval_s):
+                try:
+                    if not jobs.heartbeat(db, self.job_id, self.worker_id):
+                        print(f"Lost the lease on job {self.job_id}; another worker may redo it.")
+                        return
+                except Exception as e:
+                    db.rollback()
+                    print(f"Heartbeat for job {self.job_id} failed: {e}")
+        finally:
+            db.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+def work_queue(make_processor: Callable, worker_id: str, max_highlights: int = 10,
+               max_attempts: int = MAX_ATTEMPTS, lease_s: float = LEASE_S, poll_s: float = 2.0,
+               exit_when_idle: bool = True) -> Iterator[Dict]:
+    """Claim and process jobs until the queue is drained, yielding one status dict per attempt."""
+    db = jobs.JobsSession()
+    proc = None
+    try:
+        while True:
+            jobs.requeue_stale(db, lease_s, max_attempts)
+            job = jobs.claim(db, worker_id)
+            if job is None:
+                # In-progress jobs count too: if their worker dies, they come back once the lease expires.
+                if exit_when_idle and jobs.open_count(db) == 0:
+                    return
+                time.sleep(poll_s)  # remaining jobs are backing off or running elsewhere
+                continue
+            proc = proc or make_processor()
+            t0 = time.perf_counter()
+            try:
+                with _Heartbeat(job.id, worker_id, lease_s / 4):
+                    result = proc.process(job.path, max_highlights=max_highlights,
+                                          on_stage=lambda state, job_id=job.id: jobs.set_state(db, job_id, state))
+                jobs.complete(db, job.id, result.get("video_id"))
+                yield {"path": job.path, "status": "ok", "highlights": len(result["highlights"]),
+                       "seconds": time.perf_counter() - t0, "error": None}
+            except Exception as e:
+                state = jobs.fail(db, job, str(e), max_attempts)
+                yield {"path": job.path, "status": "error" if state == jobs.FAILED else "retry",
+                       "highlights": 0, "seconds": time.perf_counter() - t0, "error": str(e)}
+    finally:
+        db.close()
+        if proc is not None and hasattr(proc, "close"):
+            proc.close()
+
+def run_queue(make_processor: Callable, workers: int = 1, max_highlights: int = 10, **kwargs) -> Iterator[Dict]:
+    """Run `workers` queue consumers in this process and merge their status rows."""
+    rows: queue.Queue = queue.Queue()
+    done = object()
+    host = socket.gethostname()
+    prefix = f"{host}:{os.getpid()}"
+    with jobs.JobsSession() as db:
+        # Resume right away after a crash instead of waiting out the dead process's leases.
+        jobs.requeue_dead_local(db, host, kwargs.get("max_attempts", MAX_ATTEMPTS))
+
+    def _consume(i: int):
+        try:
+            for row in work_queue(make_processor, f"{prefix}:{i}", max_highlights, **kwargs):
+                rows.put(row)
+        except Exception as e:
+            rows.put({"path": f"<worker {i}>", "status": "error", "highlights": 0, "seconds": 0.0, "error": str(e)})
+        finally:
+            rows.put(done)
+
+    threads = [threading.Thread(target=_consume, args=(i,), daemon=True, name=f"queue-{i}")
+               for i in range(max(1, workers))]
+    for t in threads:
+        t.start()
+    remaining = len(threads)
+    while remaining:
+        row = rows.get()
+        if row is done:
+            remaining -= 1
+        else:
+            yield row
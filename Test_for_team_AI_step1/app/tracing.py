@@ -0,0 +1,110 @@
+import json, threading, time, contextvars
+from collections import defaultdict
+from typing import Dict, List
+
+current_video: contextvars.ContextVar = contextvars.ContextVar("current_video", default=None)
+
+_enabled = False
+_lock = threading.Lock()
+_out = None
+_durations: Dict[str, List[float]] = defaultdict(list)
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _NoopSpan()
+
+class _Span:
+    __slots__ = ("stage", "video", "t0", "wall")
+    def __init__(self, stage: str, video: str | None):
+        self.stage = stage
+        self.video = video if video is not None else current_video.get()
+
+    def __enter__(self):
+        self.wall = time.time()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = (time.perf_counter() - self.t0) * 1000.0
+        record = {"video": self.video, "stage": self.stage, "start": round(self.wall, 6),
+                  "ms": round(ms, 3), "thread": threading.current_thread().name, "ok": exc_type is None}
+        with _lock:
+            _durations[self.stage].append(ms)
+            if _out is not None:
+                _out.write(json.dumps(record) + "\n")
+        return False
+
+def span(stage: str, video: str | None = None):
+    """Time one ingestion stage. A shared no-op object is returned while tracing is off."""
+    if not _enabled:
+        return _NOOP
+    return _Span(stage, video)
+
+def enable(path: str | None = None) -> None:
+    """Start collecting spans; with `path`, also append them there as JSON lines."""
+    global _enabled, _out
+    with _lock:
+        if path:
+            _out = open(path, "a", buffering=1, encoding="utf-8")
+        _durations.clear()
+        _enabled = True
+
+def disable() -> None:
+    global _enabled, _out
+    with _lock:
+        _enabled = False
+        if _out is not None:
+            _out.close()
+            _out = None
+
+def _percentile(sorted_ms: List[float], q: float) -> float:
+    return sorted_ms[min(len(sorted_ms) - 1, int(q * len(sorted_ms)))]
+
+def summary_table() -> str:
+    with _lock:
+        stages = {k: sorted(v) for k, v in _durations.items() if v}
+    lines = [f"{'stage':<14} {'count':>6} {'p50_ms':>10} {'p95_ms':>10} {'total_s':>9}"]
+    for stage, ms in sorted(stages.items(), key=lambda kv: -sum(kv[1])):
+        lines.append(f"{stage:<14} {len(ms):>6} {_percentile(ms, 0.5):>10.1f} {_percentile(ms, 0.95):>10.1f} "
+                     f"{sum(ms) / 1000:>9.2f}")
+    return "\n".join(lines)
+
+class ThreadProfiler:
+    """cProfile across worker threads: each thread gets its own profile, merged on write."""
+    def __init__(self):
+        import cProfile
+        self._new = cProfile.Profile
+        self._local = threading.local()
+        self._profiles = []
+
+    def wrap(self, fn):
+        def _profiled(*args, **kwargs):
+            prof = getattr(self._local, "prof", None)
+            if prof is None:
+                prof = self._local.prof = self._new()
+                with _lock:
+                    self._profiles.append(prof)
+            prof.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                prof.disable()
+        return _profiled
+
+    def instrument(self, processor):
+        processor.process = self.wrap(processor.process)
+        return processor
+
+    def write(self, path: str, sort: str = "cumulative", limit: int = 80) -> None:
+        import pstats
+        if not self._profiles:
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            stats = pstats.Stats(self._profiles[0], stream=f)
+            for prof in self._profiles[1:]:
+                stats.add(prof)
+            stats.sort_stats(sort).print_stats(limit)
@@ -0,0 +1,40 @@
+"""Cold-start import cost of the CLI, parsed from `python -X importtime`.
+
+    python -m bench.bench_importtime --max-ms 400
+Exits non-zero when importing `app.demo` takes longer than --max-ms, so it can gate CI.
+"""
+import argparse, os, re, subprocess, sys
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def importtime(module: str) -> list:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         capture_output=True, text=True, env=env, check=True).stderr
+    rows = []
+    for line in out.splitlines():
+        m = LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--module", default="app.demo")
+    p.add_argument("--max-ms", type=float, default=400.0)
+    p.add_argument("--top", type=int, default=15)
+    args = p.parse_args()
+    rows = importtime(args.module)
+    total_ms = next((cum for name, _, cum, _ in rows if name == args.module), 0) / 1000.0
+    heaviest = sorted(rows, key=lambda r: r[1], reverse=True)
+    print(f"{'module':<40} {'self_ms':>8} {'cumulative_ms':>14}")
+    for name, self_us, cum_us, _ in heaviest[:args.top]:
+        print(f"{name:<40} {self_us / 1000:>8.1f} {cum_us / 1000:>14.1f}")
+    print(f"import {args.module}: {total_ms:.1f} ms (threshold {args.max_ms:.0f} ms)")
+    heavy = [r[0] for r in rows if r[0] in ("torch", "cv2", "sentence_transformers", "google.genai")]
+    if heavy:
+        print(f"heavy modules imported at start-up: {', '.join(heavy)}")
+    sys.exit(1 if total_ms > args.max_ms or heavy else 0)
+
+if __name__ == "__main__":
+    main()
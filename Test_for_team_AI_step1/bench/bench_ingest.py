@@ -0,0 +1,48 @@
+"""Offline ingestion throughput (hash → probe → replayed LLM → embed → DB) at several worker counts.
+
+Uses ReplayBackend, so no network or API spend; needs the local Postgres and the embedding model.
+    python -m bench.bench_ingest --videos 200 --latency 0.5 --workers 1,2,4,8
+"""
+import argparse, os, tempfile, time
+from app.db.database import SessionLocal
+from app.db.models import Video
+from app.llm.backends import ReplayBackend
+from app.processors.batch import run_batch
+from app.processors.video_processor import VideoProcessor
+
+def _make_inputs(root: str, n: int, size: int) -> list:
+    paths = []
+    for i in range(n):
+        path = os.path.join(root, f"bench_ingest_{i:05d}.mp4")
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))  # unique bytes → unique content hash, so nothing is de-duplicated
+        paths.append(path)
+    return paths
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--videos", type=int, default=100)
+    p.add_argument("--highlights", type=int, default=10)
+    p.add_argument("--latency", type=float, default=0.5, help="simulated LLM seconds per video")
+    p.add_argument("--jitter", type=float, default=0.1)
+    p.add_argument("--workers", default="1,2,4,8")
+    p.add_argument("--file-kb", type=int, default=256)
+    args = p.parse_args()
+    llm = ReplayBackend(latency_s=args.latency, jitter_s=args.jitter)
+    make = lambda: VideoProcessor(llm=llm, cache=False)
+    print(f"{'workers':>7} {'videos/s':>9} {'highlights/s':>13} {'errors':>6}")
+    for workers in [int(w) for w in args.workers.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = _make_inputs(tmp, args.videos, args.file_kb * 1024)
+            t0 = time.perf_counter()
+            rows = list(run_batch(paths, make, workers=workers, max_highlights=args.highlights))
+            dt = time.perf_counter() - t0
+        hl = sum(r["highlights"] for r in rows)
+        errors = sum(r["status"] != "ok" for r in rows)
+        print(f"{workers:>7} {len(rows) / dt:>9.2f} {hl / dt:>13.1f} {errors:>6}")
+        with SessionLocal() as db:
+            db.query(Video).filter(Video.filename.like("bench_ingest_%")).delete(synchronize_session=False)
+            db.commit()
+
+if __name__ == "__main__":
+    main()
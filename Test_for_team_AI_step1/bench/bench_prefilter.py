@@ -0,0 +1,41 @@
+"""Motion pre-filter: local decode speed and how much less video would be uploaded.
+
+    python -m bench.bench_prefilter input_videos/
+"""
+import os, sys, tempfile, time
+import cv2
+from app.processors.batch import iter_video_paths
+from app.processors.motion import motion_profile, candidate_segments
+from app.processors.segments import cut_segment
+
+def main():
+    root = sys.argv[1] if len(sys.argv) > 1 else "input_videos"
+    total_src = total_up = 0
+    print(f"{'file':<40} {'dur_s':>7} {'decode_fps':>10} {'segments':>8} {'kept_s':>7} {'upload':>7}")
+    for path in iter_video_paths(root, recursive=True):
+        t0 = time.perf_counter()
+        motion, cuts, duration = motion_profile(path)
+        dt = time.perf_counter() - t0
+        segments = candidate_segments(motion, cuts, duration)
+        src = os.path.getsize(path)
+        with tempfile.TemporaryDirectory() as tmp:
+            up = src
+            if segments != [(0.0, float(duration))]:
+                up = 0
+                for i, (s, e) in enumerate(segments):
+                    seg = os.path.join(tmp, f"{i}{os.path.splitext(path)[1]}")
+                    cut_segment(path, s, e, seg)
+                    up += os.path.getsize(seg)
+        total_src += src; total_up += up
+        # decode_fps counts source frames covered per wall second (skipped frames included).
+        cap = cv2.VideoCapture(path)
+        fps = duration * (cap.get(cv2.CAP_PROP_FPS) or 25.0) / dt if dt > 0 else 0.0
+        cap.release()
+        kept = sum(e - s for s, e in segments)
+        print(f"{os.path.basename(path)[:40]:<40} {duration:>7.1f} {fps:>10.0f} {len(segments):>8} "
+              f"{kept:>7.1f} {up / src:>6.0%}")
+    if total_src:
+        print(f"uploaded bytes: {total_up:,} of {total_src:,} ({1 - total_up / total_src:.0%} reduction)")
+
+if __name__ == "__main__":
+    main()
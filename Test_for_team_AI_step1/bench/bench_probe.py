@@ -0,0 +1,36 @@
+"""Header metadata probe vs. opening a cv2 decoder, across a folder of videos.
+
+    python -m bench.bench_probe input_videos/ --repeat 5
+"""
+import argparse, os, time
+from app.processors.batch import iter_video_paths
+from app.processors.probe import probe_header, probe_cv2
+
+def _time(fn, path, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn(path)
+    return (time.perf_counter() - t0) / repeat, out
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("root", nargs="?", default="input_videos")
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+    total_h = total_c = 0.0
+    n = misses = 0
+    print(f"{'file':<36} {'header_ms':>9} {'cv2_ms':>8} {'header_dur':>10} {'cv2_dur':>8}  codec")
+    for path in iter_video_paths(args.root, recursive=True):
+        th, h = _time(probe_header, path, args.repeat)
+        tc, c = _time(probe_cv2, path, args.repeat)
+        n += 1; total_h += th; total_c += tc
+        misses += h is None
+        hd = f"{h.duration_sec:.2f}" if h and h.duration_sec else "-"
+        cd = f"{c.duration_sec:.2f}" if c.duration_sec else "-"
+        print(f"{os.path.basename(path)[:36]:<36} {th * 1e3:>9.2f} {tc * 1e3:>8.2f} {hd:>10} {cd:>8}  {h.codec if h else '-'}")
+    if n:
+        print(f"{n} files: header {total_h / n * 1e3:.2f} ms/file, cv2 {total_c / n * 1e3:.2f} ms/file "
+              f"({total_c / max(total_h, 1e-9):.0f}x), header parse failed on {misses}")
+
+if __name__ == "__main__":
+    main()
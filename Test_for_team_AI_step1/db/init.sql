@@ -3,6 +3,11 @@ CREATE TABLE IF NOT EXISTS videos (
   id UUID PRIMARY KEY,
   filename TEXT NOT NULL,
   duration_sec DOUBLE PRECISION,
+  content_hash TEXT,
+  fps DOUBLE PRECISION,
+  width INTEGER,
+  height INTEGER,
+  codec TEXT,
   created_at TIMESTAMP DEFAULT NOW()
 );
 CREATE TABLE IF NOT EXISTS highlights (
@@ -15,3 +20,59 @@ CREATE TABLE IF NOT EXISTS highlights (
   embedding vector(384) NOT NULL,
   created_at TIMESTAMP DEFAULT NOW()
 );
+-- ANN index for /chat/ask (L2 distance, matches the `<->` operator). For IVFFlat instead, build after loading data:
+--   CREATE INDEX ix_highlights_embedding_ivfflat ON highlights USING ivfflat (embedding vector_l2_ops) WITH (lists = 100);
+CREATE INDEX IF NOT EXISTS ix_highlights_embedding_hnsw ON highlights
+  USING hnsw (embedding vector_l2_ops) WITH (m = 16, ef_construction = 64);
+-- Compact indexes for SEARCH_QUANTIZATION=halfvec|bit (the API re-ranks their candidates on `embedding`, reading it by
+-- id, so the HNSW index above is then unused; the API's migration 003 builds the compact one and drops it):
+--   CREATE INDEX ix_highlights_embedding_halfvec ON highlights USING hnsw ((embedding::halfvec(384)) halfvec_l2_ops);
+--   CREATE INDEX ix_highlights_embedding_bit ON highlights USING hnsw ((binary_quantize(embedding)::bit(384)) bit_hamming_ops);
+CREATE INDEX IF NOT EXISTS ix_highlights_created_at ON highlights (created_at);
+CREATE INDEX IF NOT EXISTS ix_highlights_video_start ON highlights (video_id, start_sec);
+CREATE INDEX IF NOT EXISTS ix_videos_filename_prefix ON videos (filename text_pattern_ops);
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+  id SERIAL PRIMARY KEY,
+  path TEXT NOT NULL UNIQUE,
+  state TEXT NOT NULL DEFAULT 'queued',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+  locked_by TEXT,
+  heartbeat_at TIMESTAMP,
+  last_error TEXT,
+  video_id TEXT,
+  created_at TIMESTAMP DEFAULT NOW(),
+  updated_at TIMESTAMP DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS ix_ingest_jobs_due ON ingest_jobs (state, next_attempt_at, id);
+-- Upgrades for databases created by an earlier version of this file.
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS fps DOUBLE PRECISION;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS width INTEGER;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS height INTEGER;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS codec TEXT;
+CREATE INDEX IF NOT EXISTS ix_videos_content_hash ON videos (content_hash);
+-- Change counters read by the chat API's caches (same as its migration 005_highlights_change_log).
+CREATE TABLE IF NOT EXISTS highlights_changes (
+  id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+  inserts BIGINT NOT NULL DEFAULT 0,
+  mutations BIGINT NOT NULL DEFAULT 0,
+  changed_at TIMESTAMP DEFAULT NOW()
+);
+INSERT INTO highlights_changes DEFAULT VALUES ON CONFLICT DO NOTHING;
+CREATE OR REPLACE FUNCTION highlights_changed() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF current_setting('app.skip_change_log', true) = 'on' THEN RETURN NULL; END IF;
+  IF TG_OP = 'INSERT' AND TG_TABLE_NAME = 'highlights' THEN
+    UPDATE highlights_changes SET inserts = inserts + 1, changed_at = NOW();
+  ELSE
+    UPDATE highlights_changes SET mutations = mutations + 1, changed_at = NOW();
+  END IF;
+  RETURN NULL;
+END $$;
+DROP TRIGGER IF EXISTS highlights_changed ON highlights;
+CREATE TRIGGER highlights_changed AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON highlights
+  FOR EACH STATEMENT EXECUTE FUNCTION highlights_changed();
+DROP TRIGGER IF EXISTS videos_changed ON videos;
+CREATE TRIGGER videos_changed AFTER UPDATE OR DELETE OR TRUNCATE ON videos
+  FOR EACH STATEMENT EXECUTE FUNCTION highlights_changed();
@@ -0,0 +1,66 @@
+"""In-process stand-in for the `files` / `models` surface of `google.genai.Client`."""
+import itertools, threading, time
+from types import SimpleNamespace
+
+class FakeAPIError(Exception):
+    def __init__(self, code: int, retry_after: str | None = None):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+class FakeGenai:
+    """Uploads take `upload_s`, files turn ACTIVE after `polls` gets, generation takes `generate_s`.
+
+    `events` records (stage, path, start, end) so tests can check which stages overlapped;
+    `fail_upload` / `fail_generate` hold errors raised once each before succeeding.
+    """
+    def __init__(self, upload_s: float = 0.0, generate_s: float = 0.0, polls: int = 1, final_state: str = "ACTIVE"):
+        self.upload_s, self.generate_s, self.polls, self.final_state = upload_s, generate_s, polls, final_state
+        self.events, self.calls = [], {"upload": 0, "get": 0, "generate": 0}
+        self.live, self.deleted = {}, []
+        self.fail_upload, self.fail_generate = [], []
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.files = SimpleNamespace(upload=self._upload, get=self._get, delete=self._delete)
+        self.models = SimpleNamespace(generate_content=self._generate)
+
+    def _record(self, stage, path, t0):
+        with self._lock:
+            self.events.append((stage, path, t0, time.perf_counter()))
+
+    def _upload(self, file):
+        t0 = time.perf_counter()
+        with self._lock:
+            self.calls["upload"] += 1
+            if self.fail_upload:
+                raise self.fail_upload.pop(0)
+            name = f"files/{next(self._ids)}"
+            self.live[name] = {"path": file, "gets": 0}
+        time.sleep(self.upload_s)
+        self._record("upload", file, t0)
+        return SimpleNamespace(name=name, state="PROCESSING")
+
+    def _get(self, name):
+        with self._lock:
+            self.calls["get"] += 1
+            f = self.live[name]
+            f["gets"] += 1
+            state = self.final_state if f["gets"] >= self.polls else "PROCESSING"
+        return SimpleNamespace(name=name, state=SimpleNamespace(value=state))
+
+    def _delete(self, name):
+        with self._lock:
+            self.deleted.append(name)
+            self.live.pop(name, None)
+
+    def _generate(self, model, contents, config):
+        t0 = time.perf_counter()
+        with self._lock:
+            self.calls["generate"] += 1
+            if self.fail_generate:
+                raise self.fail_generate.pop(0)
+            path = self.live[contents[1].name]["path"]
+        time.sleep(self.generate_s)
+        self._record("generate", path, t0)
+        return SimpleNamespace(parsed=[{"start_s": 1.0, "end_s": 3.0, "title": f"About {path}",
+                                        "summary": "Something happens.", "score": 0.5}])
@@ -0,0 +1,37 @@
+import json, os
+import pytest
+from app.llm.backends import RecordingBackend, ReplayBackend, record_name
+from app.llm.cache import file_sha256
+from app.llm.gemini_client import GeminiClient, PROMPT_VERSION
+from fake_genai import FakeGenai
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"not really a video")
+    return str(path)
+
+def test_record_then_replay_with_matching_parameters(tmp_path, video):
+    store = str(tmp_path / "records")
+    fake = FakeGenai()
+    rec = RecordingBackend(store, client=GeminiClient(api_key="test", client=fake, model="gemini-x"))
+    assert rec.missing_record(video, 5)
+    recorded = rec.summarize(video, max_highlights=5)
+    assert not rec.missing_record(video, 5) and rec.missing_record(video, 3)
+    assert os.listdir(store) == [record_name(file_sha256(video), "gemini-x", 5)]
+
+    replay = ReplayBackend(store, synthetic=False, model="gemini-x")
+    assert replay.summarize(video, max_highlights=5) == recorded
+    with pytest.raises(KeyError):
+        replay.summarize(video, max_highlights=3)  # recorded with different parameters
+    with pytest.raises(KeyError):
+        ReplayBackend(store, synthetic=False, model="gemini-y").summarize(video, max_highlights=5)
+
+def test_legacy_recordings_only_replay_when_parameters_match(tmp_path, video):
+    digest = file_sha256(video)
+    raw = [{"start_s": 0.0, "end_s": 2.0, "title": "Old", "summary": "Recorded before keys."}]
+    with open(tmp_path / f"{digest}.json", "w") as f:
+        json.dump({"model": "gemini-x", "prompt_version": PROMPT_VERSION, "max_highlights": 10, "raw": raw}, f)
+    replay = ReplayBackend(str(tmp_path), synthetic=False, model="gemini-x")
+    assert replay.summarize(video, max_highlights=10)[0]["title"] == "Old"
+    assert len(ReplayBackend(str(tmp_path), model="gemini-x").summarize(video, max_highlights=4)) == 4  # synthetic
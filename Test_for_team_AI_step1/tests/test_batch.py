@@ -0,0 +1,117 @@
+import os, struct, threading, time
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.database import Base
+from app.db.models import Highlight
+from app.processors import video_processor
+from app.processors.batch import iter_video_paths, run_batch, format_summary
+from app.processors.video_processor import VideoProcessor
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "tiny.mp4")
+
+class StubLLM:
+    """Stands in for the LLM backend only: a delay (and an optional failure) read from the file name."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = self.peak = 0
+        self.threads = set()
+
+    def summarize(self, path, max_highlights, on_stage=None):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.threads.add(threading.get_ident())
+        try:
+            name = os.path.basename(path)
+            time.sleep(float(name.split("_")[1]) / 1000)
+            if name.startswith("bad"):
+                raise RuntimeError("llm said no")
+            return [{"start_s": float(i), "end_s": i + 0.5, "title": f"t{i}", "summary": name}
+                    for i in range(max_highlights)]
+        finally:
+            with self.lock:
+                self.active -= 1
+
+class FakeEmbedder:
+    def encode(self, texts, batch_size=None):
+        return np.zeros((len(texts), Highlight.embedding.type.dim), dtype=np.float32)
+
+@pytest.fixture
+def ingest(tmp_path, monkeypatch):
+    """Real VideoProcessors over a throwaway SQLite database; only the LLM and the embedder are stubbed."""
+    monkeypatch.setattr(video_processor, "get_embedder", lambda: FakeEmbedder())
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingest.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    llm = StubLLM()
+    procs = []
+
+    def make_processor():
+        procs.append(VideoProcessor(db=Session(), cache=False, llm=llm))
+        return procs[-1]
+
+    def video(name):
+        # The tiny fixture plus a trailing `free` box naming the file, so every video hashes differently.
+        tag = name.encode()
+        path = tmp_path / f"{name}.mp4"
+        path.write_bytes(open(FIXTURE, "rb").read() + struct.pack(">I4s", 8 + len(tag), b"free") + tag)
+        return str(path)
+
+    yield make_processor, video, llm, procs, Session
+    engine.dispose()
+
+def test_runs_in_parallel_with_one_processor_per_worker(ingest):
+    make_processor, video, llm, procs, Session = ingest
+    paths = [video(f"ok_50_{i}") for i in range(8)]
+    rows = list(run_batch(paths, make_processor, workers=4, max_highlights=3))
+    assert sorted(r["path"] for r in rows) == sorted(paths)
+    assert all(r["status"] == "ok" and r["highlights"] == 3 for r in rows)
+    assert 1 < llm.peak <= 4
+    assert len(procs) == len(llm.threads) <= 4
+    assert Session().query(Highlight).count() == 8 * 3
+
+def test_bounded_lookahead_and_completion_order(ingest):
+    make_processor, video, llm, procs, Session = ingest
+    files = [video(name) for name in ["ok_600_slow"] + [f"ok_10_{i}" for i in range(20)]]
+    pulled = []
+
+    def paths():
+        for path in files:
+            pulled.append(path)
+            yield path
+
+    results = run_batch(paths(), make_processor, workers=2)
+    first = next(results)
+    assert len(pulled) <= 2 * 2  # the walk is consumed as work completes, not up front
+    assert first["path"] != files[0]  # fast files stream out while the slow one runs
+    rows = [first] + list(results)
+    assert len(rows) == 21 and rows[-1]["path"] == files[0]
+
+def test_errors_are_reported_not_raised(ingest):
+    make_processor, video, llm, procs, Session = ingest
+    ok, bad = video("ok_1_a"), video("bad_1_b")
+    rows = list(run_batch([ok, bad], make_processor, workers=2))
+    by_path = {r["path"]: r for r in rows}
+    assert by_path[ok]["status"] == "ok"
+    assert by_path[bad]["status"] == "error" and by_path[bad]["error"] == "llm said no"
+    assert Session().query(Highlight).count() == 10  # nothing stored for the failed video
+
+def test_summary_table():
+    rows = [{"path": "a.mp4", "status": "ok", "highlights": 4, "seconds": 1.5, "error": None},
+            {"path": "b.mp4", "status": "error", "highlights": 0, "seconds": 0.5, "error": "boom"}]
+    out = format_summary(rows, 30.0).splitlines()
+    assert out[0].split() == ["file", "status", "hl", "sec", "error"]
+    assert out[2].split() == ["a.mp4", "ok", "4", "1.50"]
+    assert out[3].split() == ["b.mp4", "error", "0", "0.50", "boom"]
+    assert out[-1] == "2 videos (1 ok, 1 failed) in 30.0s → 4.0 videos/min"
+
+def test_recursive_walk_is_sorted_and_filtered(tmp_path):
+    for rel in ["b/2.mp4", "b/1.MOV", "a/x.mkv", "a/notes.txt", "top.mp4"]:
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_bytes(b"")
+    found = [os.path.relpath(p, tmp_path) for p in iter_video_paths(str(tmp_path), recursive=True)]
+    assert found == ["top.mp4", os.path.join("a", "x.mkv"), os.path.join("b", "1.MOV"), os.path.join("b", "2.mp4")]
+    assert sorted(os.path.basename(p) for p in iter_video_paths(str(tmp_path))) == ["top.mp4"]
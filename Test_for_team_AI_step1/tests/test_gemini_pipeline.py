@@ -0,0 +1,124 @@
+import json, threading
+from types import SimpleNamespace
+import pytest
+from app import tracing
+from app.llm.gemini_client import GeminiClient, LLMError
+from app.processors.batch import run_pipelined
+from fake_genai import FakeAPIError, FakeGenai
+
+def _client(fake, **kwargs):
+    return GeminiClient(api_key="test", client=fake, base_delay_s=0.001, max_poll_s=0.001, **kwargs)
+
+def test_upload_overlaps_generation_and_files_are_deleted():
+    fake = FakeGenai(upload_s=0.05, generate_s=0.1)
+    paths = [f"v{i}.mp4" for i in range(4)]
+    out = dict(_client(fake).summarize_many(paths, max_highlights=3, upload_workers=1, generate_workers=1))
+    assert set(out) == set(paths)
+    assert all(hs[0]["title"] == f"About {p}" for p, hs in out.items())
+    spans = {(stage, path): (t0, t1) for stage, path, t0, t1 in fake.events}
+    first_gen = min(spans[("generate", p)] for p in paths)
+    # Some other video uploaded while the first one was generating.
+    assert any(spans[("upload", p)][0] < first_gen[1] and spans[("upload", p)][1] > first_gen[0] for p in paths)
+    assert len(fake.deleted) == 4 and not fake.live
+
+def test_retries_rate_limits_and_polls_until_active():
+    fake = FakeGenai(polls=3)
+    fake.fail_upload.append(FakeAPIError(429, retry_after="0.01"))
+    fake.fail_generate.append(FakeAPIError(503))
+    hs = _client(fake).summarize("a.mp4", max_highlights=2)
+    assert len(hs) == 1
+    assert fake.calls == {"upload": 2, "get": 3, "generate": 2}
+    assert fake.deleted == ["files/0"]
+
+def test_non_retryable_errors_surface_per_video():
+    fake = FakeGenai()
+    fake.fail_generate.append(FakeAPIError(400))
+    out = dict(_client(fake).summarize_many(["a.mp4", "b.mp4"], generate_workers=1))
+    errors = [r for r in out.values() if isinstance(r, Exception)]
+    assert len(errors) == 1 and errors[0].code == 400
+    assert len(fake.deleted) == 2  # deleted even when generation fails
+
+def test_failed_processing_raises_and_cleans_up():
+    # An empty list would be stored (and deduplicated) as "no highlights"; a failure must be retried instead.
+    fake = FakeGenai(final_state="FAILED")
+    with pytest.raises(LLMError):
+        _client(fake).summarize("a.mp4")
+    assert fake.calls["generate"] == 0 and fake.deleted == ["files/0"]
+    out = dict(_client(FakeGenai(final_state="FAILED")).summarize_many(["a.mp4"]))
+    assert isinstance(out["a.mp4"], LLMError)
+
+class StubProcessor:
+    """prepare/summarize/store without a DB or embedder; `dup_*` files count as already stored."""
+    def __init__(self, stored):
+        self.stored = stored
+        self.closed = False
+
+    def prepare(self, path, max_highlights=10):
+        with tracing.span("hash"):
+            pass
+        prep = SimpleNamespace(video_path=path, max_highlights=max_highlights, result=None, highlights=None,
+                               windows=None)
+        if path.startswith("dup_"):
+            prep.result = {"highlights": [{}, {}]}
+        return prep
+
+    def store(self, prep, highlights):
+        with tracing.span("db_write"):
+            self.stored.append(prep.video_path)
+        return {"highlights": highlights}
+
+    def close(self):
+        self.closed = True
+
+def test_pipelined_batch_sends_only_new_videos_to_the_llm():
+    fake = FakeGenai(upload_s=0.01, generate_s=0.02)
+    stored, procs = [], []
+
+    def make():
+        procs.append(StubProcessor(stored))
+        return procs[-1]
+
+    paths = [f"v{i}.mp4" for i in range(6)] + ["dup_x.mp4"]
+    rows = list(run_pipelined(iter(paths), make, _client(fake), workers=2, upload_workers=2, generate_workers=2))
+    by_path = {r["path"]: r for r in rows}
+    assert set(by_path) == set(paths) and all(r["status"] == "ok" for r in rows)
+    assert by_path["dup_x.mp4"]["highlights"] == 2 and by_path["v0.mp4"]["highlights"] == 1
+    assert fake.calls["upload"] == 6 and sorted(stored) == sorted(paths[:6])
+    assert procs and all(p.closed for p in procs)
+
+def test_pipelined_batch_reports_llm_errors():
+    fake = FakeGenai()
+    fake.fail_generate.append(FakeAPIError(400))
+    rows = list(run_pipelined(["a.mp4", "b.mp4"], lambda: StubProcessor([]), _client(fake), generate_workers=1))
+    assert sorted(r["status"] for r in rows) == ["error", "ok"]
+
+def test_pipelined_spans_name_their_video(tmp_path):
+    trace = tmp_path / "trace.jsonl"
+    paths = [f"v{i}.mp4" for i in range(3)]
+    tracing.enable(str(trace))
+    try:
+        list(run_pipelined(paths, lambda: StubProcessor([]), _client(FakeGenai()), workers=2))
+    finally:
+        tracing.disable()
+    spans = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert {s["stage"] for s in spans} == {"hash", "upload", "wait_active", "generate", "db_write"}
+    assert all(s["video"] in paths for s in spans)
+
+class BrokenLLM:
+    """summarize_many that takes one video and then dies, as on an unexpected client error."""
+    def summarize_many(self, paths, max_highlights=10, upload_workers=2, generate_workers=4):
+        next(paths)
+        raise RuntimeError("client crashed")
+        yield
+
+def test_pipelined_batch_fails_the_rest_when_the_llm_stage_dies():
+    paths = [f"v{i}.mp4" for i in range(20)] + ["dup_x.mp4"]
+    out = []
+    runner = threading.Thread(target=lambda: out.extend(
+        run_pipelined(iter(paths), lambda: StubProcessor([]), BrokenLLM(), workers=2, upload_workers=1,
+                      generate_workers=1)), daemon=True)
+    runner.start()
+    runner.join(10)
+    assert not runner.is_alive(), "batch hung after the LLM stage failed"
+    assert sorted(r["path"] for r in out) == sorted(paths)
+    assert all(r["status"] == "error" and "client crashed" in r["error"] for r in out if r["path"] != "dup_x.mp4")
@@ -0,0 +1,76 @@
+import socket, time
+import pytest
+from app.db import jobs
+from app.processors import worker
+
+@pytest.fixture(autouse=True)
+def sqlite_queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_DATABASE_URL", f"sqlite:///{tmp_path}/jobs.sqlite3")
+    monkeypatch.setattr(jobs, "_engine", None)
+    yield
+    jobs.get_jobs_engine().dispose()
+
+class StubProcessor:
+    def __init__(self, delay_s=0.0, during=None):
+        self.delay_s, self.during, self.done = delay_s, during, []
+
+    def process(self, path, max_highlights=10, on_stage=None):
+        on_stage("summarizing")
+        if self.during:
+            self.during()
+        time.sleep(self.delay_s)
+        self.done.append(path)
+        return {"video_id": f"id-{path}", "highlights": [{}]}
+
+def _dead_pid() -> int:
+    pid = 4_000_000
+    while jobs._pid_alive(pid):
+        pid += 1
+    return pid
+
+def _states():
+    with jobs.JobsSession() as db:
+        return {j.path: (j.state, j.attempts) for j in db.query(jobs.IngestJob)}
+
+def test_rerun_after_crash_resumes_in_progress_jobs():
+    with jobs.JobsSession() as db:
+        jobs.enqueue(db, ["a.mp4", "b.mp4", "c.mp4"])
+        crashed = jobs.claim(db, f"{socket.gethostname()}:{_dead_pid()}:0")  # left in "uploading"
+    proc = StubProcessor()
+    rows = list(worker.run_queue(lambda: proc, workers=2))
+    assert sorted(r["path"] for r in rows) == ["a.mp4", "b.mp4", "c.mp4"]
+    assert crashed.path in proc.done
+    assert all(state == jobs.STORED for state, _ in _states().values())
+
+def test_job_that_keeps_killing_workers_fails_after_max_attempts():
+    host = socket.gethostname()
+    with jobs.JobsSession() as db:
+        jobs.enqueue(db, ["poison.mp4"])
+        for _ in range(3):
+            jobs.claim(db, f"{host}:{_dead_pid()}:0")
+            assert jobs.requeue_dead_local(db, host, max_attempts=3) == 1
+    assert _states() == {"poison.mp4": (jobs.FAILED, 3)}
+
+def test_heartbeat_keeps_a_long_job_from_being_reclaimed():
+    with jobs.JobsSession() as db:
+        jobs.enqueue(db, ["long.mp4"])
+    reclaimed = []
+
+    def other_worker_checks():
+        time.sleep(0.4)  # well past the lease; only the timer heartbeat keeps it alive
+        with jobs.JobsSession() as other:
+            reclaimed.append(jobs.requeue_stale(other, lease_s=0.2, max_attempts=3))
+
+    proc = StubProcessor(during=other_worker_checks)
+    rows = list(worker.work_queue(lambda: proc, "me:1:0", lease_s=0.2, poll_s=0.01))
+    assert reclaimed == [0] and [r["status"] for r in rows] == ["ok"]
+    assert _states() == {"long.mp4": (jobs.STORED, 1)}
+
+def test_idle_check_waits_for_jobs_running_elsewhere():
+    with jobs.JobsSession() as db:
+        jobs.enqueue(db, ["remote.mp4"])
+        jobs.claim(db, "other-host:1:0")  # its worker vanished without a trace
+    proc = StubProcessor()
+    rows = list(worker.work_queue(lambda: proc, "me:1:0", lease_s=0.2, poll_s=0.02))
+    assert [r["path"] for r in rows] == ["remote.mp4"]
+    assert _states() == {"remote.mp4": (jobs.STORED, 2)}
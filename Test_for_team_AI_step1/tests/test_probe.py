@@ -0,0 +1,44 @@
+import os
+import pytest
+from app.processors import probe
+from app.processors.probe import VideoMeta, probe_header, probe_video
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def _fixture(name):
+    return os.path.join(FIXTURES, name)
+
+@pytest.mark.parametrize("name, codec", [("tiny.mp4", "mp4v"), ("tiny.mov", "mp4v"), ("tiny.mkv", "V_MJPEG")])
+def test_header_probe_reads_the_video_track(name, codec):
+    # 20 frames at 10 fps, 64x48, written by cv2.VideoWriter.
+    meta = probe_header(_fixture(name))
+    assert meta == VideoMeta(duration_sec=pytest.approx(2.0), fps=pytest.approx(10.0), width=64, height=48,
+                             codec=codec, source="header")
+
+def test_mov_data_handler_does_not_hide_the_video_track():
+    with open(_fixture("tiny.mov"), "rb") as f:
+        data = f.read()
+    assert data.count(b"hdlr") >= 2  # mdia's 'vide' plus minf's data handler
+    assert probe_header(_fixture("tiny.mov")).fps == pytest.approx(10.0)
+
+def test_unknown_or_truncated_files(tmp_path):
+    junk = tmp_path / "junk.mp4"
+    junk.write_bytes(b"not a video at all")
+    assert probe_header(str(junk)) is None
+    cut = tmp_path / "cut.mp4"
+    with open(_fixture("tiny.mp4"), "rb") as f:
+        cut.write_bytes(f.read(40))  # ftyp only, no moov
+    assert probe_header(str(cut)) is None
+
+def test_missing_header_fields_come_from_cv2(monkeypatch):
+    monkeypatch.setattr(probe, "probe_header", lambda path: VideoMeta(duration_sec=3.0, codec="avc1"))
+    monkeypatch.setattr(probe, "probe_cv2", lambda path: VideoMeta(duration_sec=2.9, fps=25.0, width=640, height=360,
+                                                                   codec="h264", source="cv2"))
+    assert probe_video("x.mov") == VideoMeta(duration_sec=3.0, fps=25.0, width=640, height=360, codec="avc1",
+                                             source="header+cv2")
+
+def test_complete_header_skips_cv2(monkeypatch):
+    def no_cv2(path):
+        raise AssertionError("cv2 should not be opened")
+    monkeypatch.setattr(probe, "probe_cv2", no_cv2)
+    assert probe_video(_fixture("tiny.mkv")).source == "header"
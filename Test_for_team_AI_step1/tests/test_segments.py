@@ -0,0 +1,73 @@
+import pytest
+from app.processors import segments
+from app.processors import motion, video_processor
+from app.processors.segments import cut_start_s, plan_windows, split_segments, summarize_in_windows
+
+def test_plan_windows_overlap_and_validation():
+    assert plan_windows(100, 40, 10) == [(0.0, 40), (30.0, 70), (60.0, 100)]
+    assert plan_windows(30, 40, 10) == [(0.0, 30.0)]
+    for overlap in (40, 50, -1):
+        with pytest.raises(ValueError):
+            plan_windows(100, 40, overlap)
+
+def _fake_ffprobe(keyframes, origin="0.000000"):
+    def run(*args):
+        if "format=start_time" in args:
+            return origin + "\n"
+        target = float(args[args.index("-read_intervals") + 1].split("%")[0])
+        k = max(t for t in keyframes if t <= target + 1e-9)  # seek lands on the keyframe at or before
+        return "".join(f"{t:.6f},{'K_' if t in keyframes else '__'}\n" for t in (k, k + 0.04, k + 0.08))
+    return run
+
+def test_split_segments_windows_only_the_long_ones():
+    assert split_segments([(5, 20), (50, 130)], 40, 10) == [(5, 20), (50.0, 90.0), (80.0, 120.0), (110.0, 130.0)]
+
+@pytest.mark.parametrize("found, expected", [
+    ([(0.0, 20.0), (50.0, 130.0)], [(0.0, 20.0), (50.0, 90.0), (80.0, 120.0), (110.0, 130.0)]),
+    ([(0.0, 130.0)], [(0.0, 40.0), (30.0, 70.0), (60.0, 100.0), (90.0, 130.0)]),  # nothing to cut away
+])
+def test_prefilter_still_chunks_long_segments(monkeypatch, found, expected):
+    monkeypatch.setattr(video_processor, "PREFILTER", True)
+    monkeypatch.setattr(video_processor, "CHUNK_WINDOW_S", 40.0)
+    monkeypatch.setattr(video_processor, "CHUNK_OVERLAP_S", 10.0)
+    monkeypatch.setattr(video_processor, "find_video_by_hash", lambda db, h: None)
+    monkeypatch.setattr(video_processor, "probe_video", lambda path: video_processor.VideoMeta(duration_sec=130.0))
+    monkeypatch.setattr(motion, "motion_profile", lambda path: ([], [], 130.0))
+    monkeypatch.setattr(motion, "candidate_segments", lambda *a, **kw: found)
+    proc = video_processor.VideoProcessor(db=object(), cache=False, llm=object())
+    assert proc.prepare(__file__).windows == expected
+
+def test_cut_start_is_the_keyframe_before(monkeypatch):
+    monkeypatch.setattr(segments, "_ffprobe", _fake_ffprobe([0.0, 4.0, 8.0]))
+    assert cut_start_s("v.mp4", 0) == 0.0
+    assert cut_start_s("v.mp4", 6.5) == 4.0
+    assert cut_start_s("v.mp4", 8.0) == 8.0
+    monkeypatch.setattr(segments, "_ffprobe", _fake_ffprobe([10.0, 14.0], origin="10.000000"))
+    assert cut_start_s("v.mp4", 5.0) == 4.0  # file timestamps start at 10s
+
+class WindowLLM:
+    def __init__(self, fail_once=()):
+        self.calls, self.fail_once = [], set(fail_once)
+
+    def summarize(self, path, max_highlights=10):
+        self.calls.append(path)
+        name = path.rsplit("/", 1)[-1]
+        if name in self.fail_once:
+            self.fail_once.discard(name)
+            raise RuntimeError("flaky")
+        # Segment-relative times; the first 2s of every segment are keyframe pre-roll.
+        return [{"start_s": 1.0, "end_s": 3.0, "title": "early", "summary": "pre-roll", "score": 0.2},
+                {"start_s": 5.0, "end_s": 7.0, "title": "mid", "summary": "inside", "score": 0.9}]
+
+def test_windows_shift_by_real_start_and_retry_alone(monkeypatch, tmp_path):
+    monkeypatch.setattr(segments, "_ffprobe", _fake_ffprobe([0.0, 28.0, 58.0]))
+    monkeypatch.setattr(segments, "cut_segment", lambda src, s, e, dst: open(dst, "wb").close())
+    llm = WindowLLM()
+    first = summarize_in_windows(llm, "v.mp4", [(0.0, 40.0), (30.0, 70.0), (60.0, 100.0)], workers=3)
+    llm = WindowLLM(fail_once=["seg0001.mp4"])
+    hs = summarize_in_windows(llm, "v.mp4", [(0.0, 40.0), (30.0, 70.0), (60.0, 100.0)], workers=3)
+    assert hs == first
+    assert len(llm.calls) == 4  # only the failed window ran twice
+    # Window 2 really starts at keyframe 28: "mid" is 33-35 (not 35-37), "early" 29-31 is clipped to the window.
+    assert [(h["start_s"], h["end_s"]) for h in hs] == [(1.0, 3.0), (5.0, 7.0), (30.0, 31.0), (33.0, 35.0),
+                                                         (60.0, 61.0), (63.0, 65.0)]
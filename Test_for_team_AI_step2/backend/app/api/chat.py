@@ -1,26 +1,105 @@
+from datetime import datetime
+from uuid import UUID
+import json
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
+from ..core.metrics import phase
 from ..db.session import SessionLocal
-from ..services.chat_service import answer_query
+from ..core.config import settings
+from ..db.session import pool_stats
+from ..repositories.highlights_repository import SearchFilters
+from ..services.chat_service import (answer_query, answer_query_async, answer_batch, stream_answer, cache_stats,
+                                     EmbeddingModelChanged)
 
 router = APIRouter()
 
 class AskRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=2000)
     top_k: int | None = Field(default=None, ge=1, le=20)
+    ef_search: int | None = Field(default=None, ge=1, le=1000)
+    probes: int | None = Field(default=None, ge=1, le=1000)
+    # Optional scope; all given filters must match.
+    video_ids: list[UUID] | None = Field(default=None, max_length=100)
+    filename_prefix: str | None = Field(default=None, min_length=1, max_length=500)
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+    start_sec: float | None = Field(default=None, ge=0)
+    end_sec: float | None = Field(default=None, ge=0)
+
+    def filters(self) -> SearchFilters | None:
+        f = SearchFilters(self.video_ids, self.filename_prefix, self.created_from, self.created_to,
+                          self.start_sec, self.end_sec)
+        return f if f.clauses()[0] else None
 
 class AskResponse(BaseModel):
     answer: str
     matches: list
 
+class BatchQuery(BaseModel):
+    query: str = Field(..., min_length=1, max_length=2000)
+    top_k: int | None = Field(default=None, ge=1, le=20)
+
+class AskBatchRequest(BaseModel):
+    queries: list[BatchQuery] = Field(..., min_length=1, max_length=settings.ASK_BATCH_MAX)
+    ef_search: int | None = Field(default=None, ge=1, le=1000)
+    probes: int | None = Field(default=None, ge=1, le=1000)
+
+class AskBatchResponse(BaseModel):
+    results: list[AskResponse]
+
 def get_db():
     db = SessionLocal()
     try:
+        with phase("db_checkout"):
+            db.connection()  # check the pooled connection out now so its wait is timed on its own
         yield db
     finally:
         db.close()
         
-@router.post("/ask", response_model=AskResponse)
-def ask(req: AskRequest, db: Session = Depends(get_db)):
-    return answer_query(db, req.query, req.top_k)
+if settings.DB_ASYNC:
+    @router.post("/ask", response_model=AskResponse)
+    async def ask(req: AskRequest):
+        return await answer_query_async(req.query, req.top_k, ef_search=req.ef_search, probes=req.probes,
+                                        filters=req.filters())
+else:
+    @router.post("/ask", response_model=AskResponse)
+    def ask(req: AskRequest, db: Session = Depends(get_db)):
+        return answer_query(db, req.query, req.top_k, ef_search=req.ef_search, probes=req.probes,
+                            filters=req.filters())
+
+
+def _ndjson(events):
+    try:
+        for e in events:
+            yield json.dumps(e) + "\n"
+    except Exception as e:
+        # The 200 status is already sent, so a failure mid-stream is reported in-band instead of "done".
+        print(f"ask_stream failed: {e}")
+        detail = str(e) if isinstance(e, EmbeddingModelChanged) else "search failed"
+        yield json.dumps({"type": "error", "detail": detail}) + "\n"
+
+
+@router.post("/ask_stream")
+def ask_stream(req: AskRequest):
+    """NDJSON: one {"type": "match"} line per highlight as soon as it is read, then {"type": "done"}
+    (or {"type": "error"} if the search fails part way)."""
+    events = stream_answer(req.query, req.top_k, ef_search=req.ef_search, probes=req.probes, filters=req.filters())
+    return StreamingResponse(_ndjson(events), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+
+@router.post("/ask_batch", response_model=AskBatchResponse)
+def ask_batch(req: AskBatchRequest, db: Session = Depends(get_db)):
+    items = [(q.query, q.top_k) for q in req.queries]
+    return {"results": answer_batch(db, items, ef_search=req.ef_search, probes=req.probes)}
+
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    return cache_stats()
+
+
+@router.get("/pool/stats")
+def get_pool_stats():
+    return pool_stats()
@@ -0,0 +1,85 @@
+import threading, time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+class TTLCache:
+    """Thread-safe LRU with a per-entry time-to-live and hit/miss counters."""
+    def __init__(self, maxsize: int, ttl_s: float):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_s, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits,
+                    "misses": self.misses, "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+class VersionGate:
+    """Clears `cache` when the version of its source data changes.
+
+    `due()` lets one caller per `interval_s` re-read the version, then `observe(version)`
+    records it. Callers take `generation` before computing a value and store it with
+    `put(...)`, which drops values computed against data from before a clear.
+    """
+    def __init__(self, cache: TTLCache, interval_s: float):
+        self.cache = cache
+        self.interval_s = interval_s
+        self.version = None
+        self.generation = 0
+        self._checked = float("-inf")
+        self._lock = threading.Lock()
+
+    def due(self) -> bool:
+        now = time.monotonic()
+        if now - self._checked < self.interval_s:
+            return False
+        with self._lock:
+            if now - self._checked < self.interval_s:
+                return False
+            self._checked = now
+            return True
+
+    def observe(self, version: Any) -> bool:
+        """Record the latest version; True (and the cache is cleared) when it changed."""
+        with self._lock:
+            if version == self.version:
+                return False
+            self.cache.clear()
+            self.version = version
+            self.generation += 1
+            return True
+
+    def put(self, key: Hashable, value: Any, generation: int) -> None:
+        with self._lock:
+            if generation == self.generation:
+                self.cache.put(key, value)
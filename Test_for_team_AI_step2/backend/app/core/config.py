@@ -1,6 +1,58 @@
 import os
 class Settings:
     DATABASE_URL = os.getenv("DATABASE_URL","postgresql+psycopg2://postgres:postgres@db:5432/videos")
+    # DB_ASYNC=1 serves /chat/ask as `async def` over asyncpg; both engines share the pool settings below.
+    DB_ASYNC = os.getenv("DB_ASYNC","0") in ("1","true","True")
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL.replace("+psycopg2","+asyncpg",1)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE","10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW","20"))
+    DB_POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S","10"))
+    DB_POOL_RECYCLE_S = int(os.getenv("DB_POOL_RECYCLE_S","1800"))
+    # asyncpg prepared-statement cache per connection; set 0 behind pgbouncer in transaction mode.
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE","100"))
     TOP_K = int(os.getenv("TOP_K","10"))
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL","sentence-transformers/all-MiniLM-L6-v2")
+    # Must match EMBEDDING_MODEL's output and the highlights.embedding column (see app/tools/reembed.py).
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM","384"))
+    # torch | onnx | int8 (dynamic int8 ONNX for EMBEDDING_QUANT_CONFIG = avx2 | avx512 | avx512_vnni | arm64).
+    # Exports are cached under MODEL_CACHE_DIR. Step 1 reads the same variables for ingestion.
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND","torch").lower()
+    EMBEDDING_QUANT_CONFIG = os.getenv("EMBEDDING_QUANT_CONFIG","avx2")
+    MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR","models")
+    # Vector index: "hnsw" or "ivfflat" (used by `python -m app.db.migrate`); search knobs can be overridden per request.
+    VECTOR_INDEX = os.getenv("VECTOR_INDEX","hnsw").lower()
+    HNSW_M = int(os.getenv("HNSW_M","16"))
+    HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION","64"))
+    HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH","40"))
+    IVFFLAT_LISTS = int(os.getenv("IVFFLAT_LISTS","100"))
+    IVFFLAT_PROBES = int(os.getenv("IVFFLAT_PROBES","10"))
+    # SEARCH_QUANTIZATION=halfvec|bit searches a compact ANN index first (migration 003 builds it) and re-ranks
+    # top_k * RERANK_FACTOR candidates with the full float32 embedding; "none" searches the float32 index directly.
+    SEARCH_QUANTIZATION = os.getenv("SEARCH_QUANTIZATION","none").lower()
+    RERANK_FACTOR = int(os.getenv("RERANK_FACTOR","4"))
+    # Filtered searches: relaxed_order | strict_order (pgvector >= 0.8), or off for older pgvector.
+    ANN_ITERATIVE_SCAN = os.getenv("ANN_ITERATIVE_SCAN","relaxed_order").lower()
+    # Query text → embedding, and (query, search params) → answer. Answers are dropped whenever the
+    # highlights_changes counters move (any insert/update/delete), checked at most every ANSWER_CACHE_WATERMARK_S seconds.
+    EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE","2048"))
+    EMBED_CACHE_TTL_S = float(os.getenv("EMBED_CACHE_TTL_S","3600"))
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE","512"))
+    ANSWER_CACHE_TTL_S = float(os.getenv("ANSWER_CACHE_TTL_S","300"))
+    ANSWER_CACHE_WATERMARK_S = float(os.getenv("ANSWER_CACHE_WATERMARK_S","2"))
+    # Concurrent embed_text calls are coalesced into one encode() of up to EMBED_BATCH_MAX_SIZE texts,
+    # waiting at most EMBED_BATCH_MAX_WAIT_MS for the batch to fill.
+    EMBED_BATCHING = os.getenv("EMBED_BATCHING","1") not in ("0","false","False")
+    EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE","64"))
+    EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS","5"))
+    # SEARCH_BACKEND=memory answers from an in-process NumPy replica of highlights.embedding
+    # (see app/repositories/memory_index.py) and uses pgvector while it is loading or stale.
+    SEARCH_BACKEND = os.getenv("SEARCH_BACKEND","pgvector").lower()
+    MEMORY_INDEX_DTYPE = os.getenv("MEMORY_INDEX_DTYPE","float32")
+    MEMORY_INDEX_SNAPSHOT = os.getenv("MEMORY_INDEX_SNAPSHOT","")
+    MEMORY_INDEX_REFRESH_S = float(os.getenv("MEMORY_INDEX_REFRESH_S","10"))
+    MEMORY_INDEX_MAX_STALE_S = float(os.getenv("MEMORY_INDEX_MAX_STALE_S","60"))
+    MEMORY_INDEX_OVERLAP_S = float(os.getenv("MEMORY_INDEX_OVERLAP_S","120"))
+    # /chat/ask_batch: at most ASK_BATCH_MAX queries per request, searched ASK_BATCH_CHUNK per SQL statement.
+    ASK_BATCH_MAX = int(os.getenv("ASK_BATCH_MAX","256"))
+    ASK_BATCH_CHUNK = int(os.getenv("ASK_BATCH_CHUNK","64"))
 settings = Settings()
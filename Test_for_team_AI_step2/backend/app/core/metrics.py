@@ -0,0 +1,133 @@
+"""Per-request phase timings (Server-Timing header) and a small Prometheus text exposition.
+
+Kept in-house so the hot path is a perf_counter() pair, a dict update and one bisect.
+"""
+import contextvars, threading, time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Tuple
+
+# Phase name -> accumulated ms for the request being served (None outside a request).
+_phases: contextvars.ContextVar = contextvars.ContextVar("phases", default=None)
+
+LATENCY_BUCKETS_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Iterable[float], labelnames: Tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            s[i] += 1
+            s[-1] += value
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for labels, s in sorted(series.items()):
+            base = ",".join(f'{n}="{v}"' for n, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), s[:-1]):
+                total += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                out.append(f'{self.name}_bucket{{{base}{sep}le="{le}"}} {total}')
+            out.append(f"{self.name}_sum{{{base}}} {s[-1]}" if base else f"{self.name}_sum {s[-1]}")
+            out.append(f"{self.name}_count{{{base}}} {total}" if base else f"{self.name}_count {total}")
+        return out
+
+_histograms: list[Histogram] = []
+_gauges: list[tuple] = []
+
+def histogram(name: str, help: str, buckets: Iterable[float] = LATENCY_BUCKETS_S,
+              labelnames: Tuple[str, ...] = ()) -> Histogram:
+    h = Histogram(name, help, buckets, labelnames)
+    _histograms.append(h)
+    return h
+
+def gauge(name: str, help: str, collect: Callable[[], Dict[tuple, float]], labelname: str = "",
+          kind: str = "gauge") -> None:
+    """Register a value read at scrape time; `collect` maps a label value (or ()) to a number."""
+    _gauges.append((name, help, labelname, collect, kind))
+
+REQUEST_SECONDS = histogram("http_request_duration_seconds", "Request latency by route.",
+                            labelnames=("method", "route", "status"))
+PHASE_SECONDS = histogram("chat_phase_duration_seconds", "Time spent per request phase.", labelnames=("phase",))
+
+class phase:
+    """Time one phase of the current request (db_checkout, embed, search, build, ...)."""
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        dt = time.perf_counter() - self.t0
+        PHASE_SECONDS.observe(dt, self.name)
+        phases = _phases.get()
+        if phases is not None:
+            phases[self.name] = phases.get(self.name, 0.0) + dt * 1000.0
+        return False
+
+def _server_timing(phases: Dict[str, float], total_ms: float) -> bytes:
+    parts = [f"{k};dur={v:.2f}" for k, v in phases.items()]
+    parts.append(f"total;dur={total_ms:.2f}")
+    return ", ".join(parts).encode("latin-1")
+
+class TimingMiddleware:
+    """Pure ASGI (no BaseHTTPMiddleware task hop): adds Server-Timing and records request latency.
+    Streaming responses send headers first, so their later phases only reach /metrics."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        phases: Dict[str, float] = {}
+        token = _phases.set(phases)
+        t0 = time.perf_counter()
+        status = [500]
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(phases, (time.perf_counter() - t0) * 1000.0)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _phases.reset(token)
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(time.perf_counter() - t0, scope["method"],
+                                    getattr(route, "path", "unmatched"), str(status[0]))
+
+def render() -> str:
+    lines = []
+    for h in _histograms:
+        lines += h.render()
+    for name, help, labelname, collect, kind in _gauges:
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        try:
+            values = collect()
+        except Exception:
+            continue
+        for label, value in values.items():
+            if value is None:
+                continue
+            lines.append(f'{name}{{{labelname}="{label}"}} {value}' if labelname else f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,150 @@
+"""Schema migrations for the shared videos/highlights database.
+
+    python -m app.db.migrate          # apply pending migrations
+    python -m app.db.migrate --list   # show what has been applied
+
+Each migration runs once and is recorded in `schema_migrations`. Statements run in
+autocommit mode so indexes can be built CONCURRENTLY without blocking ingestion. A failed
+concurrent build leaves an INVALID index behind; it is dropped and rebuilt on the next run
+(an index still being built also looks INVALID, so do not run two migrations at once).
+"""
+import argparse, re
+from sqlalchemy import text
+from .session import engine
+from ..core.config import settings
+
+_QUANTIZED = ("halfvec", "bit")
+_ANN_INDEXES = ("ix_highlights_embedding_hnsw", "ix_highlights_embedding_ivfflat")
+_QUANT_MIGRATION = f"003_highlights_embedding_{settings.SEARCH_QUANTIZATION}"
+_COMPACT_INDEXES = {"halfvec": "ix_highlights_embedding_halfvec", "bit": "ix_highlights_embedding_bit"}
+
+def _drop(names) -> list[str]:
+    return [f"DROP INDEX CONCURRENTLY IF EXISTS {name}" for name in names]
+
+def _ann_index(dim: int) -> list[str]:
+    # A quantized search only reads `embedding` by id when re-ranking, so the float32 index would be dead weight.
+    if settings.SEARCH_QUANTIZATION in _QUANTIZED:
+        return []
+    if settings.VECTOR_INDEX == "ivfflat":
+        return [f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_highlights_embedding_ivfflat ON highlights "
+                f"USING ivfflat (embedding vector_l2_ops) WITH (lists = {settings.IVFFLAT_LISTS})"]
+    return [f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_highlights_embedding_hnsw ON highlights "
+            f"USING hnsw (embedding vector_l2_ops) "
+            f"WITH (m = {settings.HNSW_M}, ef_construction = {settings.HNSW_EF_CONSTRUCTION})"]
+
+def _quantized_index(dim: int) -> list[str]:
+    """The index for SEARCH_QUANTIZATION, dropping the ones other modes built: the float32 ANN index
+    (or the compact indexes, when switching back to none). Other modes' 003 records are cleared, so
+    switching back to one of them runs it again."""
+    mode = settings.SEARCH_QUANTIZATION
+    forget = [f"DELETE FROM schema_migrations WHERE id LIKE '003\\_%' AND id <> '{_QUANT_MIGRATION}'"]
+    if mode not in _QUANTIZED:
+        return _ann_index(dim) + _drop(_COMPACT_INDEXES.values()) + forget
+    others = _drop(_ANN_INDEXES + tuple(v for k, v in _COMPACT_INDEXES.items() if k != mode)) + forget
+    # Expression indexes: existing rows are covered by the build and the table itself is not rewritten.
+    if mode == "halfvec":
+        return [f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_highlights_embedding_halfvec ON highlights "
+                f"USING hnsw ((embedding::halfvec({dim})) halfvec_l2_ops) "
+                f"WITH (m = {settings.HNSW_M}, ef_construction = {settings.HNSW_EF_CONSTRUCTION})"] + others
+    return [f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_highlights_embedding_bit ON highlights "
+            f"USING hnsw ((binary_quantize(embedding)::bit({dim})) bit_hamming_ops) "
+            f"WITH (m = {settings.HNSW_M}, ef_construction = {settings.HNSW_EF_CONSTRUCTION})"] + others
+
+# One row of counters bumped by statement-level triggers inside the writing transaction, so a new
+# value is visible exactly when the rows are. Caches compare it to notice inserts (`inserts`) and
+# in-place updates/deletes (`mutations`); app.skip_change_log = 'on' lets bulk tools opt out.
+CHANGE_LOG = [
+    "CREATE TABLE IF NOT EXISTS highlights_changes (id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id), "
+    "inserts BIGINT NOT NULL DEFAULT 0, mutations BIGINT NOT NULL DEFAULT 0, changed_at TIMESTAMP DEFAULT NOW())",
+    "INSERT INTO highlights_changes DEFAULT VALUES ON CONFLICT DO NOTHING",
+    """CREATE OR REPLACE FUNCTION highlights_changed() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF current_setting('app.skip_change_log', true) = 'on' THEN RETURN NULL; END IF;
+  IF TG_OP = 'INSERT' AND TG_TABLE_NAME = 'highlights' THEN
+    UPDATE highlights_changes SET inserts = inserts + 1, changed_at = NOW();
+  ELSE
+    UPDATE highlights_changes SET mutations = mutations + 1, changed_at = NOW();
+  END IF;
+  RETURN NULL;
+END $$""",
+    "DROP TRIGGER IF EXISTS highlights_changed ON highlights",
+    "CREATE TRIGGER highlights_changed AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON highlights "
+    "FOR EACH STATEMENT EXECUTE FUNCTION highlights_changed()",
+    # Answers show the filename; inserting a video changes nothing until its highlights arrive.
+    "DROP TRIGGER IF EXISTS videos_changed ON videos",
+    "CREATE TRIGGER videos_changed AFTER UPDATE OR DELETE OR TRUNCATE ON videos "
+    "FOR EACH STATEMENT EXECUTE FUNCTION highlights_changed()",
+]
+
+# Each entry builds its statements from the embedding dimension.
+MIGRATIONS = [
+    ("001_highlights_embedding_ann", _ann_index),
+    # max(created_at) is the answer-cache watermark, checked every couple of seconds.
+    ("002_highlights_created_at", lambda dim: [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_highlights_created_at ON highlights (created_at)"]),
+    # Keyed by mode so switching SEARCH_QUANTIZATION later builds the matching index and drops the others.
+    (_QUANT_MIGRATION, _quantized_index),
+    # Scoped search: per-video lookups with a time window, and filename prefix (LIKE 'abc%') matches.
+    ("004_search_filter_indexes", lambda dim: [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_highlights_video_start ON highlights (video_id, start_sec)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_videos_filename_prefix ON videos (filename text_pattern_ops)"]),
+    ("005_highlights_change_log", lambda dim: CHANGE_LOG),
+]
+
+def ensure_table(conn) -> None:
+    """Create schema_migrations; databases set up only from step 1's init.sql do not have it yet."""
+    conn.execute(text("CREATE TABLE IF NOT EXISTS schema_migrations "
+                      "(id TEXT PRIMARY KEY, applied_at TIMESTAMP DEFAULT NOW())"))
+
+def _applied(conn) -> set[str]:
+    ensure_table(conn)
+    return {r[0] for r in conn.execute(text("SELECT id FROM schema_migrations"))}
+
+_CREATE_INDEX = re.compile(r"CREATE INDEX CONCURRENTLY IF NOT EXISTS (\w+)")
+
+def _drop_invalid_index(conn, stmt: str) -> bool:
+    """IF NOT EXISTS would skip an index left INVALID by an interrupted build, so drop it first."""
+    m = _CREATE_INDEX.match(stmt)
+    if m is None:
+        return False
+    valid = conn.execute(text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+                         {"name": m.group(1)}).scalar()
+    if valid is not False:
+        return False
+    print(f"dropping invalid index {m.group(1)} left by an earlier failed build")
+    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {m.group(1)}"))
+    return True
+
+def migrate(dim: int | None = None) -> list[str]:
+    """Apply pending migrations; `dim` defaults to EMBEDDING_DIM (reembed passes the new model's)."""
+    dim = dim or settings.EMBEDDING_DIM
+    ran = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        done = _applied(conn)
+        for mig_id, statements in MIGRATIONS:
+            if mig_id in done:
+                # Runs before this check recorded migrations whose index had been skipped while INVALID.
+                for stmt in statements(dim):
+                    if _drop_invalid_index(conn, stmt):
+                        conn.execute(text(stmt))
+                        ran.append(f"{mig_id} (rebuilt invalid index)")
+                continue
+            for stmt in statements(dim):
+                _drop_invalid_index(conn, stmt)
+                conn.execute(text(stmt))
+            conn.execute(text("INSERT INTO schema_migrations (id) VALUES (:id)"), {"id": mig_id})
+            ran.append(mig_id)
+    return ran
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--list", action="store_true")
+    args = p.parse_args()
+    if args.list:
+        with engine.connect() as conn:
+            done = _applied(conn)
+            conn.commit()
+        for mig_id, _ in MIGRATIONS:
+            print(f"[{'x' if mig_id in done else ' '}] {mig_id}")
+    else:
+        print("\n".join(f"applied {m}" for m in migrate()) or "up to date")
@@ -1,8 +1,9 @@
 import uuid
-from sqlalchemy import Column, String, Float, TIMESTAMP, ForeignKey, Text
+from sqlalchemy import Column, String, Float, Integer, TIMESTAMP, ForeignKey, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import declarative_base, relationship
 from pgvector.sqlalchemy import Vector
+from ..core.config import settings
 
 Base = declarative_base()
 
@@ -11,6 +12,11 @@ class Video(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     filename = Column(String, nullable=False)
     duration_sec = Column(Float, nullable=True)
+    content_hash = Column(String, nullable=True, index=True)
+    fps = Column(Float, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    codec = Column(String, nullable=True)
     created_at = Column(TIMESTAMP, nullable=True)
     highlights = relationship("Highlight", back_populates="video")
     
@@ -22,6 +28,6 @@ class Highlight(Base):
     end_sec = Column(Float, nullable=False)
     title = Column(Text, nullable=False)
     summary = Column(Text, nullable=False)
-    embedding = Column(Vector(384), nullable=False)
+    embedding = Column(Vector(settings.EMBEDDING_DIM), nullable=False)
     created_at = Column(TIMESTAMP, nullable=True)
     video = relationship("Video", back_populates="highlights")
@@ -1,6 +1,39 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from ..core.config import settings
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, pool_size=settings.DB_POOL_SIZE,
+                       max_overflow=settings.DB_MAX_OVERFLOW, pool_timeout=settings.DB_POOL_TIMEOUT_S,
+                       pool_recycle=settings.DB_POOL_RECYCLE_S)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+_async_engine = None
+
+def get_async_engine():
+    """asyncpg engine (DB_ASYNC=1), built on first use so the sync-only path never imports asyncpg."""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from pgvector.asyncpg import register_vector
+        _async_engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL, pool_pre_ping=True, pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW, pool_timeout=settings.DB_POOL_TIMEOUT_S,
+            pool_recycle=settings.DB_POOL_RECYCLE_S,
+            connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+                          "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE})
+
+        @event.listens_for(_async_engine.sync_engine, "connect")
+        def _register_vector(dbapi_connection, connection_record):
+            # Binary codec for the vector type: query vectors go over the wire as float32, not text.
+            dbapi_connection.run_async(register_vector)
+    return _async_engine
+
+def _pool_stats(pool) -> dict:
+    return {"size": pool.size(), "checked_out": pool.checkedout(), "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(), "max_overflow": settings.DB_MAX_OVERFLOW, "timeout_s": settings.DB_POOL_TIMEOUT_S}
+
+def pool_stats() -> dict:
+    stats = {"sync": _pool_stats(engine.pool)}
+    if _async_engine is not None:
+        stats["async"] = _pool_stats(_async_engine.pool)
+    return stats
@@ -1,14 +1,34 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 import os, sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from app.api.chat import router as chat_router
+from app.core import metrics
+from app.db.session import pool_stats
+from app.services import embeddings
+from app.services.chat_service import cache_stats, stale_embedding_model, EmbeddingModelChanged
 
 from dotenv import load_dotenv
 load_dotenv() 
 
-app = FastAPI(title="Video Highlight Chat API", version="1.0")
+_ready = False
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load/export the embedder before traffic arrives; /health stays 503 until it has run.
+    global _ready
+    try:
+        await asyncio.to_thread(embeddings.warmup)
+        _ready = True
+    except Exception as e:
+        print(f"embedding warm-up failed: {e}")
+    yield
+
+app = FastAPI(title="Video Highlight Chat API", version="1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,12 +36,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+app.add_middleware(metrics.TimingMiddleware)
+
+metrics.gauge("db_pool_connections", "Connections in the sync pool by state.", lambda: {
+    k: pool_stats()["sync"][k] for k in ("size", "checked_out", "checked_in", "overflow")}, labelname="state")
+metrics.gauge("embedding_model_load_seconds", "Time taken to load the embedding model.",
+              lambda: {(): embeddings.model_load_seconds})
+metrics.gauge("cache_hits_total", "Cache hits by cache.", lambda: {
+    name: stats["hits"] for name, stats in cache_stats().items() if "hits" in stats}, labelname="cache", kind="counter")
+metrics.gauge("cache_misses_total", "Cache misses by cache.", lambda: {
+    name: stats["misses"] for name, stats in cache_stats().items() if "misses" in stats}, labelname="cache", kind="counter")
+
+@app.exception_handler(EmbeddingModelChanged)
+async def embedding_model_changed(request, exc):
+    return JSONResponse({"detail": str(exc)}, status_code=503)
 
 @app.get("/health")
 def health():
+    if not _ready:
+        return JSONResponse({"status": "warming"}, status_code=503)
+    if stale_embedding_model():
+        # Seen by the last change check: queries would be embedded with the old model.
+        return JSONResponse({"status": "stale_model", "model": stale_embedding_model()}, status_code=503)
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 app.include_router(chat_router, prefix="/chat", tags=["chat"])
 
 #app.include_router(chat_router, prefix="/api/chat", tags=["chat"])
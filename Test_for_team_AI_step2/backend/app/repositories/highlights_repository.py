@@ -1,35 +1,301 @@
 import math
-from sqlalchemy import text, bindparam
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from sqlalchemy import Integer, text, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Session
 from pgvector.sqlalchemy import Vector
 
-from sqlalchemy.orm import Session
+from ..core.config import settings
+
+SET_SEARCH_PARAMS = text("SELECT set_config('hnsw.ef_search', :ef, true), set_config('ivfflat.probes', :probes, true)")
+# pgvector >= 0.8: keep scanning the ANN index until enough rows pass the filters instead of
+# returning fewer than k (or letting the planner give up on the index).
+SET_ITERATIVE_SCAN = text("SELECT set_config('hnsw.iterative_scan', :mode, true), "
+                          "set_config('ivfflat.iterative_scan', :mode, true)")
+
+
+@dataclass
+class SearchFilters:
+    video_ids: list[str] | None = None
+    filename_prefix: str | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+    start_sec: float | None = None  # keep highlights overlapping [start_sec, end_sec] of the video
+    end_sec: float | None = None
+
+    def clauses(self) -> tuple[str, dict]:
+        """WHERE fragment over `h` plus its bind values; empty when no filter is set."""
+        where, params = [], {}
+        if self.video_ids:
+            where.append("h.video_id = ANY(CAST(:f_video_ids AS uuid[]))")
+            params["f_video_ids"] = [str(v) for v in self.video_ids]
+        if self.filename_prefix:
+            escaped = self.filename_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where.append("h.video_id IN (SELECT v.id FROM videos AS v WHERE v.filename LIKE :f_prefix)")
+            params["f_prefix"] = escaped + "%"
+        if self.created_from is not None:
+            where.append("h.created_at >= :f_created_from")
+            params["f_created_from"] = _naive_utc(self.created_from)
+        if self.created_to is not None:
+            where.append("h.created_at < :f_created_to")
+            params["f_created_to"] = _naive_utc(self.created_to)
+        if self.start_sec is not None:
+            where.append("h.end_sec >= :f_start_sec")
+            params["f_start_sec"] = float(self.start_sec)
+        if self.end_sec is not None:
+            where.append("h.start_sec <= :f_end_sec")
+            params["f_end_sec"] = float(self.end_sec)
+        return ("WHERE " + " AND ".join(where) if where else ""), params
+
+    def key(self) -> tuple:
+        return (tuple(sorted(map(str, self.video_ids or ()))), self.filename_prefix, self.created_from,
+                self.created_to, self.start_sec, self.end_sec)
+
+
+# (inserts, mutations) from the trigger-maintained counters (migration 005). Before that migration,
+# fall back to (count, max(created_at)): catches inserts and deletes, but not in-place updates.
+CHANGES_SQL = text("SELECT inserts, mutations FROM highlights_changes")
+CHANGES_FALLBACK_SQL = text("SELECT count(*), max(created_at) FROM highlights")
+HAS_CHANGES_SQL = text("SELECT to_regclass('highlights_changes') IS NOT NULL")
+_has_changes = [False]
+
+def _changes(row, table: bool) -> tuple:
+    # Without the table, any difference is treated as a mutation (full invalidation).
+    return (row[0], row[1]) if table else (None, (row[0], row[1]))
+
+def change_version(db) -> tuple:
+    """(inserts, mutations) counters for caches of highlights; compare whole tuples for "anything changed"."""
+    if not _has_changes[0]:
+        _has_changes[0] = bool(db.execute(HAS_CHANGES_SQL).scalar())
+    return _changes(db.execute(CHANGES_SQL if _has_changes[0] else CHANGES_FALLBACK_SQL).one(), _has_changes[0])
+
+async def change_version_async(conn) -> tuple:
+    if not _has_changes[0]:
+        _has_changes[0] = bool((await conn.execute(HAS_CHANGES_SQL)).scalar())
+    row = (await conn.execute(CHANGES_SQL if _has_changes[0] else CHANGES_FALLBACK_SQL)).one()
+    return _changes(row, _has_changes[0])
+
+# app.tools.reembed records the model behind highlights.embedding as the column comment (NULL until then).
+EMBEDDING_MODEL_SQL = text("SELECT col_description(attrelid, attnum) FROM pg_attribute "
+                           "WHERE attrelid = 'highlights'::regclass AND attname = 'embedding'")
+
+def embedding_model(db) -> str | None:
+    return db.execute(EMBEDDING_MODEL_SQL).scalar()
+
+async def embedding_model_async(conn) -> str | None:
+    return (await conn.execute(EMBEDDING_MODEL_SQL)).scalar()
+
+def _naive_utc(ts: datetime) -> datetime:
+    # highlights.created_at is TIMESTAMP WITHOUT TIME ZONE, written as server-local NOW() (UTC in our images).
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
+
+# ORDER BY distance + LIMIT on the bare table is the shape the HNSW/IVFFlat planner path needs;
+# the distance cutoff and the filename join are applied to those k rows afterwards.
+NEAREST_SQL = """
+      SELECT h.id, h.video_id, h.start_sec, h.end_sec, h.title, h.summary,
+             (h.embedding <-> :qvec) AS dist
+      FROM highlights AS h
+      {where}
+      ORDER BY h.embedding <-> :qvec
+      LIMIT :k
+"""
+
+# Two-stage search for SEARCH_QUANTIZATION=halfvec|bit: the ANN index on the compact expression
+# returns :candidates ids, which are re-ranked by exact distance on the full-precision column.
+_D = settings.EMBEDDING_DIM
+COARSE_ORDER = {
+    "halfvec": f"h.embedding::halfvec({_D}) <-> CAST(:qvec AS vector)::halfvec({_D})",
+    "bit": f"binary_quantize(h.embedding)::bit({_D}) <~> binary_quantize(CAST(:qvec AS vector))",
+}
+
+RERANK_SQL = """
+      SELECT h.id, h.video_id, h.start_sec, h.end_sec, h.title, h.summary,
+             (h.embedding <-> :qvec) AS dist
+      FROM (
+        SELECT h.id FROM highlights AS h
+        {where}
+        ORDER BY {order}
+        LIMIT :candidates
+      ) AS c
+      JOIN highlights AS h ON h.id = c.id
+      ORDER BY dist
+      LIMIT :k
+"""
+
+SEARCH_SQL = """
+    SELECT
+      nn.id,
+      nn.video_id,
+      nn.start_sec,
+      nn.end_sec,
+      nn.title,
+      nn.summary,
+      v.filename,
+      nn.dist
+    FROM ({inner}) AS nn
+    JOIN videos AS v ON v.id = nn.video_id
+    WHERE nn.dist <= :max_dist
+    ORDER BY nn.dist ASC
+"""
+
+# NEAREST_SQL for a streamed answer. SEARCH_SQL's outer ORDER BY dist (and a join that may reorder rows) would
+# make Postgres read all k rows before sending the first, so here rows leave the index scan in distance order
+# straight into the cursor: the filename is a per-row lookup and max_dist is applied by the reader.
+STREAM_SQL = """
+      SELECT h.id, h.video_id, h.start_sec, h.end_sec, h.title, h.summary,
+             (SELECT v.filename FROM videos AS v WHERE v.id = h.video_id) AS filename,
+             (h.embedding <-> :qvec) AS dist
+      FROM highlights AS h
+      {where}
+      ORDER BY h.embedding <-> :qvec
+      LIMIT :k
+"""
+
+
+def search_sql(quantization: str | None = None, where: str = "") -> str:
+    quantization = quantization or settings.SEARCH_QUANTIZATION
+    if quantization in COARSE_ORDER:
+        return SEARCH_SQL.format(inner=RERANK_SQL.format(order=COARSE_ORDER[quantization], where=where))
+    return SEARCH_SQL.format(inner=NEAREST_SQL.format(where=where))
+
 
+def _candidates(top_k: int) -> int:
+    return int(top_k) * max(1, settings.RERANK_FACTOR)
 
-def search_by_vector(db: Session, query_vec: list[float], top_k: int = 10, max_dist: float = 1.2):
+
+def _search_param_values(top_k: int, ef_search: int | None, probes: int | None) -> dict:
+    # HNSW never returns more than ef rows, and the coarse stage of a re-ranked search asks for more than top_k.
+    rows = _candidates(top_k) if settings.SEARCH_QUANTIZATION in COARSE_ORDER else int(top_k)
+    ef = max(int(ef_search or settings.HNSW_EF_SEARCH), rows)
+    return {"ef": str(ef), "probes": str(int(probes or settings.IVFFLAT_PROBES))}
+
+
+def set_search_params(db: Session, top_k: int, ef_search: int | None = None, probes: int | None = None):
+    """Transaction-local ANN knobs; whichever index type exists picks up its own setting."""
+    db.execute(SET_SEARCH_PARAMS, _search_param_values(top_k, ef_search, probes))
+
+
+def _iterative_scan(filters: SearchFilters | None) -> str | None:
+    if filters is None or settings.ANN_ITERATIVE_SCAN == "off":
+        return None
+    return settings.ANN_ITERATIVE_SCAN if filters.clauses()[0] else None
+
+
+def _prepare_search(db: Session, query_vec: list[float], top_k: int, max_dist: float,
+                    ef_search: int | None, probes: int | None, filters: SearchFilters | None,
+                    stream: bool = False):
+    set_search_params(db, top_k, ef_search, probes)
+    mode = _iterative_scan(filters)
+    if mode:
+        db.execute(SET_ITERATIVE_SCAN, {"mode": mode})
+    where, filter_params = filters.clauses() if filters else ("", {})
+    # A re-ranked search has to see every candidate before the nearest is known, so it cannot stream.
+    if stream and settings.SEARCH_QUANTIZATION not in COARSE_ORDER:
+        sql = STREAM_SQL.format(where=where)
+    else:
+        sql = search_sql(where=where)
+    params = [
+        bindparam("qvec", query_vec, type_=Vector(settings.EMBEDDING_DIM)),
+        bindparam("k", int(top_k)),
+    ]
+    if ":max_dist" in sql:
+        params.append(bindparam("max_dist", float(max_dist)))
+    if ":candidates" in sql:
+        params.append(bindparam("candidates", _candidates(top_k)))
+    return text(sql).bindparams(*params), filter_params
+
+
+def search_by_vector(db: Session, query_vec: list[float], top_k: int = 10, max_dist: float = 1.2,
+                     ef_search: int | None = None, probes: int | None = None,
+                     filters: SearchFilters | None = None):
     if not query_vec:
         return []
-    stmt = (
-        text("""
-            SELECT
-              h.id,
-              h.video_id,
-              h.start_sec,
-              h.end_sec,
-              h.title,
-              h.summary,
-              v.filename,
-              (h.embedding <-> :qvec) AS dist
-            FROM highlights AS h
-            JOIN videos     AS v ON v.id = h.video_id
-            WHERE (h.embedding <-> :qvec) <= :max_dist
-            ORDER BY dist ASC
-            LIMIT :k
-        """)
-        .bindparams(
-            bindparam("qvec", query_vec, type_=Vector(384)),
-            bindparam("max_dist", float(max_dist)),
-            bindparam("k", int(top_k)),
-        )
+    stmt, params = _prepare_search(db, query_vec, top_k, max_dist, ef_search, probes, filters)
+    return db.execute(stmt, params).mappings().all()
+
+
+def iter_search_by_vector(db: Session, query_vec: list[float], top_k: int = 10, max_dist: float = 1.2,
+                          ef_search: int | None = None, probes: int | None = None,
+                          filters: SearchFilters | None = None):
+    """search_by_vector over a server-side cursor, yielding rows as Postgres sends them: nearest first,
+    though only approximately once an iterative scan runs with relaxed_order."""
+    if not query_vec:
+        return
+    stmt, params = _prepare_search(db, query_vec, top_k, max_dist, ef_search, probes, filters, stream=True)
+    result = db.execute(stmt, params, execution_options={"stream_results": True, "yield_per": 1})
+    try:
+        for row in result.mappings():
+            if row["dist"] <= max_dist:
+                yield row
+    finally:
+        result.close()
+
+
+# Many queries in one statement: unnest the query vectors and run the single-query inner search
+# LATERAL per row, so each one still gets its own ORDER BY distance LIMIT k index scan.
+BATCH_SQL = """
+    SELECT
+      q.ord,
+      nn.id,
+      nn.video_id,
+      nn.start_sec,
+      nn.end_sec,
+      nn.title,
+      nn.summary,
+      v.filename,
+      nn.dist
+    FROM unnest(CAST(:qvecs AS vector[]), CAST(:ks AS int[])) WITH ORDINALITY AS q(qvec, k, ord)
+    CROSS JOIN LATERAL ({inner}) AS nn
+    JOIN videos AS v ON v.id = nn.video_id
+    WHERE nn.dist <= :max_dist
+    ORDER BY q.ord, nn.dist ASC
+"""
+
+
+def batch_search_sql(quantization: str | None = None) -> str:
+    quantization = quantization or settings.SEARCH_QUANTIZATION
+    if quantization in COARSE_ORDER:
+        inner = RERANK_SQL.format(order=COARSE_ORDER[quantization], where="")
+        inner = inner.replace(":candidates", "q.k * :rerank")
+    else:
+        inner = NEAREST_SQL.format(where="")
+    return BATCH_SQL.format(inner=inner.replace(":qvec", "q.qvec").replace(":k", "q.k"))
+
+
+def search_by_vectors(db: Session, query_vecs: list[list[float]], top_ks: list[int], max_dist: float = 1.2,
+                      ef_search: int | None = None, probes: int | None = None) -> list[list]:
+    """search_by_vector for many queries in one round trip; returns one row list per query, in input order."""
+    if not query_vecs:
+        return []
+    set_search_params(db, max(top_ks), ef_search, probes)
+    stmt = text(batch_search_sql()).bindparams(
+        bindparam("qvecs", list(query_vecs), type_=ARRAY(Vector(settings.EMBEDDING_DIM))),
+        bindparam("ks", [int(k) for k in top_ks], type_=ARRAY(Integer)),
+        bindparam("max_dist", float(max_dist)),
     )
-    return db.execute(stmt).mappings().all()
\ No newline at end of file
+    params = {"rerank": max(1, settings.RERANK_FACTOR)} if "q.k * :rerank" in stmt.text else {}
+    out: list[list] = [[] for _ in query_vecs]
+    for r in db.execute(stmt, params).mappings():
+        out[r["ord"] - 1].append(r)
+    return out
+
+
+async def search_by_vector_async(conn, query_vec: list[float], top_k: int = 10, max_dist: float = 1.2,
+                                 ef_search: int | None = None, probes: int | None = None,
+                                 filters: SearchFilters | None = None):
+    """search_by_vector on an AsyncConnection; runs inside the caller's transaction."""
+    if not query_vec:
+        return []
+    await conn.execute(SET_SEARCH_PARAMS, _search_param_values(top_k, ef_search, probes))
+    mode = _iterative_scan(filters)
+    if mode:
+        await conn.execute(SET_ITERATIVE_SCAN, {"mode": mode})
+    where, filter_params = filters.clauses() if filters else ("", {})
+    # The asyncpg connection has pgvector's binary codec registered, so the raw list is bound untyped.
+    sql = search_sql(where=where)
+    params = {"qvec": list(query_vec), "k": int(top_k), "max_dist": float(max_dist), **filter_params}
+    if ":candidates" in sql:
+        params["candidates"] = _candidates(top_k)
+    res = await conn.execute(text(sql), params)
+    return res.mappings().all()
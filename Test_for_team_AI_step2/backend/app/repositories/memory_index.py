@@ -0,0 +1,281 @@
+"""In-process replica of highlights.embedding for exact top-k search without a Postgres round trip.
+
+    SEARCH_BACKEND=memory                       # answer_query searches the replica
+    python -m app.repositories.memory_index     # write a snapshot (MEMORY_INDEX_SNAPSHOT) for workers to mmap
+
+Vectors live in one contiguous (N, EMBEDDING_DIM) matrix. A background refresher polls the
+highlights_changes counters (migration 005): when only inserts moved, rows past a created_at
+watermark are appended in small in-memory blocks; any update or delete (or a row count that does
+not add up) triggers a full reload. When the replica has not refreshed within
+MEMORY_INDEX_MAX_STALE_S, `search` returns None and the caller falls back to pgvector.
+"""
+import json, os, threading, time
+from itertools import chain
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import text
+from pgvector.sqlalchemy import Vector
+
+from ..core.config import settings
+from ..db.session import engine
+from .highlights_repository import change_version
+
+DIM = settings.EMBEDDING_DIM
+_CHUNK_ROWS = 65536  # float16 has no BLAS path, so it is scored in float32 chunks of this many rows
+
+ROWS_SQL = """
+    SELECT h.id, h.video_id, h.start_sec, h.end_sec, h.title, h.summary, h.created_at, v.filename, h.embedding
+    FROM highlights AS h JOIN videos AS v ON v.id = h.video_id
+"""
+
+def _snapshot():
+    """A connection whose statements share one snapshot, so the change version matches the rows read."""
+    return engine.connect().execution_options(isolation_level="REPEATABLE READ")
+
+class _Block:
+    """One immutable slab of rows: a vector matrix plus the side arrays needed to build an answer."""
+    __slots__ = ("vecs", "norms", "start", "end", "video_idx", "ids", "titles", "summaries")
+
+    def __init__(self, vecs, norms, start, end, video_idx, ids, titles, summaries):
+        self.vecs, self.norms, self.start, self.end = vecs, norms, start, end
+        self.video_idx, self.ids, self.titles, self.summaries = video_idx, ids, titles, summaries
+
+    def __len__(self):
+        return len(self.ids)
+
+    def scores(self, q: np.ndarray) -> np.ndarray:
+        """Squared L2 distance minus |q|^2 (the constant term is added back for the survivors)."""
+        if self.vecs.dtype == np.float32:
+            return self.norms - 2.0 * (self.vecs @ q)
+        out = np.empty(len(self), dtype=np.float32)
+        for i in range(0, len(self), _CHUNK_ROWS):
+            out[i:i + _CHUNK_ROWS] = self.vecs[i:i + _CHUNK_ROWS].astype(np.float32) @ q
+        return self.norms - 2.0 * out
+
+class MemoryIndex:
+    def __init__(self, dtype: str = "float32"):
+        self.dtype = np.dtype(dtype)
+        self.blocks: list[_Block] = []
+        self.filenames: list[str] = []
+        self.video_ids: list[str] = []
+        self._video_pos: dict[str, int] = {}
+        self.watermark: datetime | None = None
+        self._recent: dict[str, datetime] = {}  # ids inside the overlap window, to skip re-reads
+        self.version: tuple | None = None  # change_version() the rows correspond to
+        self.refreshed_at = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(b) for b in self.blocks)
+
+    def fresh(self) -> bool:
+        return bool(self.blocks) and time.monotonic() - self.refreshed_at <= settings.MEMORY_INDEX_MAX_STALE_S
+
+    def _video(self, video_id: str, filename: str) -> int:
+        pos = self._video_pos.get(video_id)
+        if pos is None:
+            pos = self._video_pos[video_id] = len(self.filenames)
+            self.filenames.append(filename)
+            self.video_ids.append(video_id)
+        return pos
+
+    def _block(self, rows) -> _Block:
+        vecs = np.asarray([r.embedding for r in rows], dtype=np.float32).reshape(-1, DIM)
+        return _Block(vecs.astype(self.dtype), np.einsum("ij,ij->i", vecs, vecs),
+                      np.array([r.start_sec for r in rows], dtype=np.float32),
+                      np.array([r.end_sec for r in rows], dtype=np.float32),
+                      np.array([self._video(str(r.video_id), r.filename) for r in rows], dtype=np.int32),
+                      [str(r.id) for r in rows], [r.title for r in rows], [r.summary for r in rows])
+
+    def _advance(self, rows) -> None:
+        overlap = timedelta(seconds=settings.MEMORY_INDEX_OVERLAP_S)
+        for r in rows:
+            if r.created_at is not None:
+                self.watermark = max(self.watermark or r.created_at, r.created_at)
+                self._recent[str(r.id)] = r.created_at
+        if self.watermark is not None:
+            self._recent = {i: ts for i, ts in self._recent.items() if ts > self.watermark - overlap}
+
+    def _fetch(self, conn, where: str = "", params: dict | None = None, batch: int = 50000):
+        stmt = text(ROWS_SQL + where).columns(embedding=Vector(DIM))
+        result = conn.execution_options(stream_results=True, yield_per=batch).execute(stmt, params or {})
+        for part in result.partitions():
+            yield part
+
+    def load(self) -> None:
+        """Full (re)load from Postgres."""
+        fresh = MemoryIndex(self.dtype.name)
+        with _snapshot() as conn:
+            fresh.version = change_version(conn)
+            for part in fresh._fetch(conn):
+                fresh.blocks.append(fresh._block(part))
+                fresh._advance(part)
+        fresh.blocks = [fresh._concat(fresh.blocks)] if fresh.blocks else []
+        self._swap(fresh)
+
+    def _concat(self, blocks: list[_Block]) -> _Block:
+        return _Block(np.concatenate([b.vecs for b in blocks]), np.concatenate([b.norms for b in blocks]),
+                      np.concatenate([b.start for b in blocks]), np.concatenate([b.end for b in blocks]),
+                      np.concatenate([b.video_idx for b in blocks]), list(chain.from_iterable(b.ids for b in blocks)),
+                      list(chain.from_iterable(b.titles for b in blocks)),
+                      list(chain.from_iterable(b.summaries for b in blocks)))
+
+    def _swap(self, other: "MemoryIndex") -> None:
+        with self._lock:
+            self.blocks, self.filenames, self.video_ids = other.blocks, other.filenames, other.video_ids
+            self._video_pos, self.watermark, self._recent = other._video_pos, other.watermark, other._recent
+            self.version = other.version
+            self.refreshed_at = time.monotonic()
+
+    def refresh(self) -> int:
+        """Catch up with highlights: nothing when the change counters are unchanged, appended rows when
+        there were only inserts, otherwise a full reload. Returns rows added."""
+        with _snapshot() as conn:
+            version = change_version(conn)
+            if version == self.version:
+                self.refreshed_at = time.monotonic()
+                return 0
+            # The fallback version (no highlights_changes table) cannot tell inserts from updates.
+            reload = self.version is None or version[0] is None or version[1] != self.version[1]
+            if not reload:
+                added = self._append(conn)
+                # Rows the watermark cannot see (NULL or skewed created_at) show up as a count mismatch.
+                total = conn.execute(text("SELECT count(*) FROM highlights")).scalar()
+                reload = total != len(self) + sum(len(b) for b in added)
+        if reload:
+            self.load()
+            return len(self)
+        with self._lock:
+            self.blocks = self.blocks + added
+            self.version = version
+        if len(self.blocks) > 8:
+            merged = self._concat(self.blocks[1:])
+            with self._lock:
+                self.blocks = [self.blocks[0], merged]
+        self.refreshed_at = time.monotonic()
+        return sum(len(b) for b in added)
+
+    def _append(self, conn) -> list[_Block]:
+        """Blocks of rows created after the watermark (less the overlap window) that are not loaded yet."""
+        if self.watermark is None:
+            where, params = "", {}
+        else:
+            where = " WHERE h.created_at > :since ORDER BY h.created_at"
+            params = {"since": self.watermark - timedelta(seconds=settings.MEMORY_INDEX_OVERLAP_S)}
+        blocks = []
+        for part in self._fetch(conn, where, params):
+            new = [r for r in part if str(r.id) not in self._recent]
+            if new:
+                blocks.append(self._block(new))
+            self._advance(part)
+        return blocks
+
+    def search(self, query_vec, top_k: int = 10, max_dist: float = 1.2) -> list[dict] | None:
+        """Exact L2 top-k shaped like search_by_vector's rows, or None when the replica is stale."""
+        if not self.fresh():
+            return None
+        blocks, filenames, video_ids = self.blocks, self.filenames, self.video_ids
+        q = np.asarray(query_vec, dtype=np.float32)
+        qq = float(q @ q)
+        cand = []
+        for b in blocks:
+            s = b.scores(q)
+            k = min(top_k, len(s))
+            if k == 0:
+                continue
+            idx = np.argpartition(s, k - 1)[:k] if k < len(s) else np.arange(len(s))
+            cand += [(float(s[i]) + qq, b, int(i)) for i in idx]
+        cand.sort(key=lambda c: c[0])
+        rows = []
+        for d2, b, i in cand[:top_k]:
+            dist = float(np.sqrt(max(d2, 0.0)))
+            if dist > max_dist:
+                break
+            v = int(b.video_idx[i])
+            rows.append({"id": b.ids[i], "video_id": video_ids[v], "start_sec": float(b.start[i]),
+                         "end_sec": float(b.end[i]), "title": b.titles[i], "summary": b.summaries[i],
+                         "filename": filenames[v], "dist": dist})
+        return rows
+
+    def save(self, path: str) -> None:
+        """Snapshot as <path>.npy (the matrix, mmap-able) + <path>.npz (side arrays) + <path>.json (text)."""
+        block = self._concat(self.blocks)
+        for suffix, write in ((".npy", lambda f: np.save(f, block.vecs)),
+                              (".npz", lambda f: np.savez(f, norms=block.norms, start=block.start, end=block.end,
+                                                          video_idx=block.video_idx)),
+                              (".json", lambda f: f.write(json.dumps({
+                                  "ids": block.ids, "titles": block.titles, "summaries": block.summaries,
+                                  "filenames": self.filenames, "video_ids": self.video_ids,
+                                  "watermark": self.watermark.isoformat() if self.watermark else None,
+                                  "recent": {i: ts.isoformat() for i, ts in self._recent.items()},
+                                  # Only counters are portable; a fallback version forces a reload on open.
+                                  "version": list(self.version) if self.version and self.version[0] is not None
+                                  else None}).encode()))):
+            tmp = f"{path}{suffix}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                write(f)
+            os.replace(tmp, path + suffix)
+
+    @classmethod
+    def open(cls, path: str) -> "MemoryIndex":
+        """Map a snapshot read-only (pages are shared between workers), then catch up from its change version."""
+        vecs = np.load(path + ".npy", mmap_mode="r")
+        side = np.load(path + ".npz")
+        with open(path + ".json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(vecs.dtype.name)
+        index.blocks = [_Block(vecs, side["norms"], side["start"], side["end"], side["video_idx"],
+                               meta["ids"], meta["titles"], meta["summaries"])]
+        index.filenames, index.video_ids = meta["filenames"], meta["video_ids"]
+        index._video_pos = {v: i for i, v in enumerate(index.video_ids)}
+        index.watermark = datetime.fromisoformat(meta["watermark"]) if meta["watermark"] else None
+        index._recent = {i: datetime.fromisoformat(ts) for i, ts in meta["recent"].items()}
+        index.version = tuple(meta["version"]) if meta.get("version") else None
+        index.refresh()
+        return index
+
+_index: MemoryIndex | None = None
+_index_lock = threading.Lock()
+
+def _build() -> MemoryIndex:
+    path = settings.MEMORY_INDEX_SNAPSHOT
+    if path and os.path.exists(path + ".npy"):
+        return MemoryIndex.open(path)
+    index = MemoryIndex(settings.MEMORY_INDEX_DTYPE)
+    index.load()
+    if path:
+        index.save(path)
+    return index
+
+def _run():
+    global _index
+    while True:
+        try:
+            if _index is None:
+                _index = _build()
+            else:
+                _index.refresh()
+        except Exception as e:
+            print(f"memory index refresh failed: {e}")
+        time.sleep(settings.MEMORY_INDEX_REFRESH_S)
+
+_thread = None
+
+def get_memory_index() -> MemoryIndex | None:
+    """The shared replica; loading and refreshing happen on a background thread, so this is None until ready."""
+    global _thread
+    if _thread is None:
+        with _index_lock:
+            if _thread is None:
+                _thread = threading.Thread(target=_run, daemon=True, name="memory-index")
+                _thread.start()
+    return _index
+
+if __name__ == "__main__":
+    if not settings.MEMORY_INDEX_SNAPSHOT:
+        raise SystemExit("set MEMORY_INDEX_SNAPSHOT to the snapshot path (without extension)")
+    t0 = time.perf_counter()
+    idx = MemoryIndex(settings.MEMORY_INDEX_DTYPE)
+    idx.load()
+    idx.save(settings.MEMORY_INDEX_SNAPSHOT)
+    print(f"wrote {len(idx)} rows ({idx.dtype.name}) to {settings.MEMORY_INDEX_SNAPSHOT} in {time.perf_counter() - t0:.1f}s")
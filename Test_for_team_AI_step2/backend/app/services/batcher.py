@@ -0,0 +1,83 @@
+import asyncio, queue, threading, time
+from concurrent.futures import Future
+from typing import Callable, List, Sequence
+
+class MicroBatcher:
+    """Coalesces single-text encode calls from many threads into one batched `encode_fn` call.
+
+    A background thread takes the first waiting request, then keeps collecting for up to
+    `max_wait_s` or until `max_batch` texts are queued. Duplicate texts share one row.
+    """
+    def __init__(self, encode_fn: Callable[[List[str]], Sequence], max_batch: int = 64, max_wait_s: float = 0.005,
+                 on_batch: Callable[[int], None] | None = None):
+        self.encode_fn = encode_fn
+        self.on_batch = on_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait_s = max(0.0, max_wait_s)
+        self.batches = 0
+        self.items = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True, name="embed-batcher")
+                    self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        self._ensure_started()
+        fut: Future = Future()
+        self._queue.put((text, fut))
+        return fut
+
+    def embed(self, text: str) -> list:
+        return self.submit(text).result()
+
+    async def embed_async(self, text: str) -> list:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                self._serve(self._collect())
+            except Exception as e:
+                # Never let one bad batch end the thread: every later embed() would wait forever.
+                print(f"embed batcher: {e!r}")
+
+    def _serve(self, batch: list):
+        # Callers that gave up (a cancelled embed_async) are dropped; the rest can no longer be cancelled.
+        batch = [(t, fut) for t, fut in batch if fut.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        texts = list(dict.fromkeys(t for t, _ in batch))
+        try:
+            vecs = self.encode_fn(texts)
+            by_text = {t: (v.tolist() if hasattr(v, "tolist") else list(v)) for t, v in zip(texts, vecs)}
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        self.batches += 1
+        self.items += len(batch)
+        if self.on_batch:
+            self.on_batch(len(batch))
+        for t, fut in batch:
+            fut.set_result(by_text[t])
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "items": self.items,
+                "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0}
@@ -1,24 +1,57 @@
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, Iterator
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from ..repositories.highlights_repository import search_by_vector
-from .embeddings import embed_text
+from ..repositories.highlights_repository import (SearchFilters, search_by_vector, iter_search_by_vector,
+    search_by_vector_async, search_by_vectors, change_version, change_version_async, embedding_model,
+    embedding_model_async)
+from .embeddings import embed_text, embed_text_async, embed_texts, normalize_query, batcher_stats, cache_stats as embedding_cache_stats
+from ..core.cache import TTLCache, VersionGate
 from ..core.config import settings
+from ..core.metrics import phase
+from ..db.session import SessionLocal, get_async_engine
+
+_answer_cache = TTLCache(settings.ANSWER_CACHE_SIZE, settings.ANSWER_CACHE_TTL_S)
+# Cached answers are dropped whenever highlights (or their videos) are inserted, updated or deleted.
+_answer_gate = VersionGate(_answer_cache, settings.ANSWER_CACHE_WATERMARK_S)
 
 def sec_to_timestamp(sec: float) -> str:
     sec = max(0.0, float(sec))
     h = int(sec // 3600); m = int((sec % 3600) // 60); s = sec % 60
     return f"{h:02d}:{m:02d}:{s:06.3f}" if h else f"{m:02d}:{s:06.3f}"
 
-def answer_query(db: Session, query: str, top_k: int | None = None) -> Dict[str, Any]:
-    top_k = top_k or settings.TOP_K
-    matches = []
-    qvec = embed_text(query)
-    for r in search_by_vector(db, qvec, top_k=top_k):
-        matches.append({
-            "id": str(r.get("id")), "video_id": str(r.get("video_id")), "filename": r.get("filename"),
-            "start_sec": float(r.get("start_sec")), "end_sec": float(r.get("end_sec")),
-            "summary": r.get("summary"), "title": r.get("title")
-        })
+class EmbeddingModelChanged(RuntimeError):
+    """The stored vectors were re-embedded with another model than the one queries are encoded with."""
+
+_stored_model: list = [None]  # highlights.embedding's model, re-read whenever the change counters move
+
+def stale_embedding_model() -> str | None:
+    """The model the stored vectors now come from, if it is not EMBEDDING_MODEL (the API needs a restart)."""
+    model = _stored_model[0]
+    return model if model and model != settings.EMBEDDING_MODEL else None
+
+def _require_current_model() -> None:
+    model = stale_embedding_model()
+    if model:
+        raise EmbeddingModelChanged(f"highlights were re-embedded with {model}; restart the API with "
+                                    f"EMBEDDING_MODEL={model} and its EMBEDDING_DIM")
+
+def _check_changes(db: Session) -> int:
+    """Re-read the change counters when due; returns the generation to store answers under."""
+    if _answer_gate.due() and _answer_gate.observe(change_version(db)):
+        _stored_model[0] = embedding_model(db)
+    _require_current_model()
+    return _answer_gate.generation
+
+def match_from_row(r) -> Dict[str, Any]:
+    return {
+        "id": str(r.get("id")), "video_id": str(r.get("video_id")), "filename": r.get("filename"),
+        "start_sec": float(r.get("start_sec")), "end_sec": float(r.get("end_sec")),
+        "summary": r.get("summary"), "title": r.get("title")
+    }
+
+def build_answer(rows) -> Dict[str, Any]:
+    matches = [match_from_row(r) for r in rows]
     if not matches:
         return {"answer":"I couldn't find any highlights matching your question in the database.","matches":[]}
     matches.sort(key=lambda m: (m["filename"], m["start_sec"]))
@@ -28,3 +61,124 @@ def answer_query(db: Session, query: str, top_k: int | None = None) -> Dict[str,
         txt = m['summary'] or m['title'] or "(no summary)"
         bullets.append(f"• {m['filename']} [{span}]: {txt}")
     return {"answer":"", "matches": matches}
+
+def _memory_search(qvec, top_k: int):
+    """Rows from the in-process replica, or None to use pgvector (backend off, loading, or stale).
+    Filtered searches always go to pgvector."""
+    if settings.SEARCH_BACKEND != "memory":
+        return None
+    from ..repositories.memory_index import get_memory_index
+    index = get_memory_index()
+    return index.search(qvec, top_k=top_k) if index is not None else None
+
+def answer_query(db: Session, query: str, top_k: int | None = None,
+                 ef_search: int | None = None, probes: int | None = None,
+                 filters: SearchFilters | None = None) -> Dict[str, Any]:
+    top_k = top_k or settings.TOP_K
+    generation = _check_changes(db)
+    key = (normalize_query(query), top_k, ef_search, probes, filters.key() if filters else None)
+    cached = _answer_cache.get(key)
+    if cached is not None:
+        return cached
+    with phase("embed"):
+        qvec = embed_text(query)
+    with phase("search"):
+        rows = _memory_search(qvec, top_k) if filters is None else None
+        if rows is None:
+            rows = search_by_vector(db, qvec, top_k=top_k, ef_search=ef_search, probes=probes, filters=filters)
+    with phase("build"):
+        result = build_answer(rows)
+    _answer_gate.put(key, result, generation)
+    return result
+
+def stream_answer(query: str, top_k: int | None = None, ef_search: int | None = None,
+                  probes: int | None = None, filters: SearchFilters | None = None) -> Iterator[Dict[str, Any]]:
+    """answer_query as events: {"type": "match", ...} nearest first as rows arrive, then one
+    {"type": "done", "answer", "count"}. The session lives inside the generator, so it stays open
+    for exactly as long as the response is being streamed."""
+    top_k = top_k or settings.TOP_K
+    key = (normalize_query(query), top_k, ef_search, probes, filters.key() if filters else None)
+    db = SessionLocal()
+    try:
+        generation = _check_changes(db)
+        cached = _answer_cache.get(key)
+        if cached is not None:
+            for m in cached["matches"]:
+                yield {"type": "match", **m}
+            yield {"type": "done", "answer": cached["answer"], "count": len(cached["matches"])}
+            return
+        qvec = embed_text(query)
+        rows = _memory_search(qvec, top_k) if filters is None else None
+        if rows is None:
+            rows = iter_search_by_vector(db, qvec, top_k=top_k, ef_search=ef_search, probes=probes, filters=filters)
+        seen = []
+        for r in rows:
+            seen.append(r)
+            yield {"type": "match", **match_from_row(r)}
+        result = build_answer(seen)
+        _answer_gate.put(key, result, generation)
+        yield {"type": "done", "answer": result["answer"], "count": len(seen)}
+    finally:
+        db.close()
+
+def answer_batch(db: Session, items: list[tuple[str, int | None]],
+                 ef_search: int | None = None, probes: int | None = None) -> list[Dict[str, Any]]:
+    """answer_query for many (query, top_k) pairs: one encode() for all uncached queries and one
+    SQL statement per ASK_BATCH_CHUNK searches. Results are in input order."""
+    generation = _check_changes(db)
+    keys = [(normalize_query(q), k or settings.TOP_K, ef_search, probes, None) for q, k in items]
+    results: list = [_answer_cache.get(key) for key in keys]
+    todo = [i for i, r in enumerate(results) if r is None]
+    with phase("embed"):
+        vecs = embed_texts([items[i][0] for i in todo])
+    step = max(1, settings.ASK_BATCH_CHUNK)
+    for start in range(0, len(todo), step):
+        chunk = todo[start:start + step]
+        with phase("search"):
+            rows = search_by_vectors(db, vecs[start:start + step], [keys[i][1] for i in chunk],
+                                     ef_search=ef_search, probes=probes)
+        with phase("build"):
+            for i, r in zip(chunk, rows):
+                results[i] = build_answer(r)
+                _answer_gate.put(keys[i], results[i], generation)
+    return results
+
+async def answer_query_async(query: str, top_k: int | None = None,
+                             ef_search: int | None = None, probes: int | None = None,
+                             filters: SearchFilters | None = None) -> Dict[str, Any]:
+    """answer_query for DB_ASYNC: a pooled asyncpg connection is only checked out for the SQL itself."""
+    top_k = top_k or settings.TOP_K
+    engine = get_async_engine()
+    if _answer_gate.due():
+        async with engine.connect() as conn:
+            if _answer_gate.observe(await change_version_async(conn)):
+                _stored_model[0] = await embedding_model_async(conn)
+    _require_current_model()
+    generation = _answer_gate.generation
+    key = (normalize_query(query), top_k, ef_search, probes, filters.key() if filters else None)
+    cached = _answer_cache.get(key)
+    if cached is not None:
+        return cached
+    with phase("embed"):
+        qvec = await embed_text_async(query)
+    rows = None
+    if settings.SEARCH_BACKEND == "memory" and filters is None:
+        with phase("search"):
+            rows = await asyncio.to_thread(_memory_search, qvec, top_k)
+    if rows is None:
+        with phase("db_checkout"):
+            conn = await engine.connect()
+        try:
+            with phase("search"):
+                async with conn.begin():
+                    rows = await search_by_vector_async(conn, qvec, top_k=top_k, ef_search=ef_search, probes=probes,
+                                                        filters=filters)
+        finally:
+            await conn.close()
+    with phase("build"):
+        result = build_answer(rows)
+    _answer_gate.put(key, result, generation)
+    return result
+
+def cache_stats() -> Dict[str, Any]:
+    return {"embedding": embedding_cache_stats(), "answer": _answer_cache.stats(), "batcher": batcher_stats()}
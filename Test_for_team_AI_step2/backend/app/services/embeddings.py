@@ -1,14 +1,87 @@
-from sentence_transformers import SentenceTransformer
+import os, sys, threading, time
 from ..core.config import settings
+from ..core.cache import TTLCache
+from ..core import metrics
+from .batcher import MicroBatcher
+
+try:
+    from embedding_models import load_model  # shared with step 1; re-exported for bench and tools
+except ImportError:  # a checkout rather than the image: shared/ is at the repository root
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "shared"))
+    from embedding_models import load_model
 
 _model = None
+_model_lock = threading.Lock()
+model_load_seconds = None
+_query_cache = TTLCache(settings.EMBED_CACHE_SIZE, settings.EMBED_CACHE_TTL_S)
 
 def get_embedder():
-    global _model
+    global _model, model_load_seconds
     if _model is None:
-        _model = SentenceTransformer(settings.EMBEDDING_MODEL)
+        with _model_lock:
+            if _model is None:
+                t0 = time.perf_counter()
+                _model = load_model(settings.EMBEDDING_MODEL, settings.EMBEDDING_BACKEND, settings.MODEL_CACHE_DIR,
+                                    settings.EMBEDDING_QUANT_CONFIG)
+                model_load_seconds = time.perf_counter() - t0
     return _model
 
-def embed_text(text: str) -> list[float]:
+def warmup() -> None:
+    """Load (exporting if needed) the model and run it once at a few batch sizes, so the first
+    real requests do not pay for graph setup and allocator growth."""
+    for n in sorted({1, 8, settings.EMBED_BATCH_MAX_SIZE}):
+        encode_batch(["warm up the embedding model"] * n)
+
+def encode_batch(texts: list[str]):
+    return get_embedder().encode(texts, batch_size=max(len(texts), 1))
+
+EMBED_BATCH_SIZE = metrics.histogram("embed_batch_size", "Texts per batched encode() call.", metrics.SIZE_BUCKETS)
+_batcher = MicroBatcher(encode_batch, settings.EMBED_BATCH_MAX_SIZE, settings.EMBED_BATCH_MAX_WAIT_MS / 1000.0,
+                        on_batch=EMBED_BATCH_SIZE.observe)
+
+def normalize_query(text: str) -> str:
+    # Whitespace only: case is left alone so a cased EMBEDDING_MODEL still sees the original text.
+    return " ".join(text.split())
+
+def _encode_one(text: str) -> list[float]:
     vec = get_embedder().encode(text)
     return vec.tolist() if hasattr(vec, "tolist") else list(vec)
+
+def embed_text(text: str) -> list[float]:
+    key = normalize_query(text)
+    cached = _query_cache.get(key)
+    if cached is not None:
+        return cached
+    vec = _batcher.embed(key) if settings.EMBED_BATCHING else _encode_one(key)
+    _query_cache.put(key, vec)
+    return vec
+
+def embed_texts(texts: list[str]) -> list[list[float]]:
+    """Embed many texts with one encode() over the cache misses; output order matches input."""
+    keys = [normalize_query(t) for t in texts]
+    found = {k: v for k in dict.fromkeys(keys) if (v := _query_cache.get(k)) is not None}
+    missing = [k for k in dict.fromkeys(keys) if k not in found]
+    if missing:
+        for k, vec in zip(missing, encode_batch(missing)):
+            found[k] = vec.tolist() if hasattr(vec, "tolist") else list(vec)
+            _query_cache.put(k, found[k])
+    return [found[k] for k in keys]
+
+async def embed_text_async(text: str) -> list[float]:
+    key = normalize_query(text)
+    cached = _query_cache.get(key)
+    if cached is not None:
+        return cached
+    if settings.EMBED_BATCHING:
+        vec = await _batcher.embed_async(key)
+    else:
+        import asyncio
+        vec = await asyncio.to_thread(_encode_one, key)
+    _query_cache.put(key, vec)
+    return vec
+
+def cache_stats() -> dict:
+    return _query_cache.stats()
+
+def batcher_stats() -> dict:
+    return _batcher.stats()
@@ -0,0 +1,166 @@
+"""Re-embed every highlight with a new EMBEDDING_MODEL, without taking search offline.
+
+    python -m app.tools.reembed --model sentence-transformers/all-mpnet-base-v2 --processes 4
+    python -m app.tools.reembed --swap-only          # finish a run whose vectors are all written
+
+1. `embedding_next vector(D)` is added next to `embedding`. D comes from the new model.
+2. Highlights are streamed in id order from a server-side cursor (yield_per). `title. summary`
+   (the text step 1 embeds) is encoded in large batches, using a multi-process pool when
+   --processes > 1. Results go in with one `UPDATE ... FROM unnest(...)` per batch.
+3. After each batch the last id is written to the checkpoint file, so a rerun resumes there.
+   Rows ingested meanwhile are picked up by a final `embedding_next IS NULL` pass.
+4. The columns are swapped under a short ACCESS EXCLUSIVE lock. The old column and every index on it
+   go away, including the halfvec/bit expression indexes, and the ANN indexes are rebuilt CONCURRENTLY.
+   The same transaction records the model as the column's comment and bumps highlights_changes, so
+   running APIs drop their caches and memory replicas and answer 503 until restarted with the new model.
+Backfill writes set app.skip_change_log: the shadow column is invisible to search, so they change nothing
+that is cached. Afterwards, deploy the API and step 1 with the new EMBEDDING_MODEL and EMBEDDING_DIM.
+"""
+import argparse, json, os, time
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from pgvector.sqlalchemy import Vector
+from ..core.config import settings
+from ..db.session import engine
+from ..db import migrate
+from ..services.embeddings import load_model
+
+SHADOW = "embedding_next"
+
+def _texts(rows) -> list[str]:
+    return [f"{r.title}. {r.summary}" for r in rows]
+
+class Checkpoint:
+    def __init__(self, path: str, model: str, dim: int):
+        self.path, self.model, self.dim = path, model, dim
+        self.last_id, self.done = None, 0
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state.get("model") == model and state.get("dim") == dim:
+                self.last_id, self.done = state.get("last_id"), state.get("done", 0)
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"model": self.model, "dim": self.dim, "last_id": self.last_id, "done": self.done}, f)
+        os.replace(tmp, self.path)
+
+class Encoder:
+    def __init__(self, model_name: str, processes: int):
+        self.model = load_model(model_name, settings.EMBEDDING_BACKEND, settings.MODEL_CACHE_DIR,
+                                settings.EMBEDDING_QUANT_CONFIG)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.pool = self.model.start_multi_process_pool(["cpu"] * processes) if processes > 1 else None
+
+    def encode(self, texts: list[str], batch_size: int):
+        if self.pool is not None:
+            return self.model.encode_multi_process(texts, self.pool, batch_size=batch_size)
+        return self.model.encode(texts, batch_size=batch_size)
+
+    def close(self):
+        if self.pool is not None:
+            self.model.stop_multi_process_pool(self.pool)
+
+def _write(conn, dim: int, ids: list, vecs) -> None:
+    conn.execute(text("SET LOCAL app.skip_change_log = 'on'"))
+    conn.execute(text(f"""
+        UPDATE highlights AS h SET {SHADOW} = v.e
+        FROM unnest(CAST(:ids AS uuid[]), CAST(:vecs AS vector[])) AS v(id, e)
+        WHERE h.id = v.id
+    """).bindparams(bindparam("vecs", [list(map(float, v)) for v in vecs], type_=ARRAY(Vector(dim)))),
+        {"ids": [str(i) for i in ids]})
+
+def prepare(dim: int) -> None:
+    with engine.begin() as conn:
+        current = conn.execute(text(
+            "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = 'highlights'::regclass AND attname = :c AND NOT attisdropped"), {"c": SHADOW}).scalar()
+        if current is not None and current != f"vector({dim})":
+            conn.execute(text(f"ALTER TABLE highlights DROP COLUMN {SHADOW}"))  # left over from another model
+        conn.execute(text(f"ALTER TABLE highlights ADD COLUMN IF NOT EXISTS {SHADOW} vector({dim})"))
+
+def backfill(enc: Encoder, ckpt: Checkpoint, batch: int, encode_batch: int, where: str = "") -> int:
+    """Encode and write rows after the checkpoint; returns rows written."""
+    with engine.connect() as conn:
+        total = conn.execute(text(f"SELECT count(*) FROM highlights WHERE {SHADOW} IS NULL")).scalar()
+    written, t0 = 0, time.perf_counter()
+    cond = ["h.id > CAST(:after AS uuid)"] if ckpt.last_id and not where else []
+    cond += [where] if where else []
+    sql = text("SELECT h.id, h.title, h.summary FROM highlights AS h "
+               + ("WHERE " + " AND ".join(cond) if cond else "") + " ORDER BY h.id")
+    with engine.connect() as reader:
+        result = reader.execution_options(stream_results=True, yield_per=batch).execute(
+            sql, {"after": ckpt.last_id} if ckpt.last_id and not where else {})
+        for rows in result.partitions():
+            vecs = enc.encode(_texts(rows), encode_batch)
+            with engine.begin() as writer:
+                _write(writer, enc.dim, [r.id for r in rows], vecs)
+            written += len(rows)
+            ckpt.last_id, ckpt.done = str(rows[-1].id), ckpt.done + len(rows)
+            ckpt.save()
+            rate = written / (time.perf_counter() - t0)
+            eta = (total - written) / rate if rate else 0
+            print(f"{ckpt.done:,} rows ({written:,} this run, {rate:,.0f} rows/s, ~{eta / 60:.1f} min left)", flush=True)
+    return written
+
+def swap(enc: Encoder, model: str, dim: int, keep_old: bool, encode_batch: int) -> None:
+    """Fill any last rows and exchange the columns in one short transaction, then rebuild indexes."""
+    with engine.begin() as conn:
+        conn.execute(text("LOCK TABLE highlights IN ACCESS EXCLUSIVE MODE"))
+        rest = conn.execute(text(f"SELECT id, title, summary FROM highlights WHERE {SHADOW} IS NULL")).all()
+        if rest:
+            _write(conn, dim, [r.id for r in rest], enc.encode(_texts(rest), encode_batch))
+        conn.execute(text("ALTER TABLE highlights DROP COLUMN IF EXISTS embedding_old"))  # from a --keep-old run
+        conn.execute(text("ALTER TABLE highlights RENAME COLUMN embedding TO embedding_old"))
+        conn.execute(text(f"ALTER TABLE highlights RENAME COLUMN {SHADOW} TO embedding"))
+        conn.execute(text("ALTER TABLE highlights ALTER COLUMN embedding SET NOT NULL"))
+        if keep_old:
+            # Old-model indexes would only slow writes down; the column stays for a rollback.
+            for (name,) in conn.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = 'highlights' "
+                                             "AND indexdef LIKE '%embedding_old%'")).all():
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            conn.execute(text("ALTER TABLE highlights ALTER COLUMN embedding_old DROP NOT NULL"))
+        else:
+            conn.execute(text("ALTER TABLE highlights DROP COLUMN embedding_old"))  # drops its indexes too
+        migrate.ensure_table(conn)
+        conn.execute(text("DELETE FROM schema_migrations WHERE id LIKE '001_%' OR id LIKE '003_%'"))
+        model_sql = model.replace("'", "''")
+        conn.execute(text(f"COMMENT ON COLUMN highlights.embedding IS '{model_sql}'"))
+        if conn.execute(text("SELECT to_regclass('highlights_changes') IS NOT NULL")).scalar():
+            conn.execute(text("UPDATE highlights_changes SET mutations = mutations + 1, changed_at = NOW()"))
+    t0 = time.perf_counter()
+    print("\n".join(f"applied {m}" for m in migrate.migrate(dim)) or "indexes up to date")
+    print(f"index rebuild took {time.perf_counter() - t0:.1f}s")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    ap.add_argument("--processes", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    ap.add_argument("--batch", type=int, default=8192, help="rows fetched and written per round trip")
+    ap.add_argument("--encode-batch", type=int, default=256)
+    ap.add_argument("--checkpoint", default="reembed.checkpoint.json")
+    ap.add_argument("--swap-only", action="store_true")
+    ap.add_argument("--no-swap", action="store_true")
+    ap.add_argument("--keep-old", action="store_true", help="keep the old vectors as embedding_old")
+    args = ap.parse_args()
+
+    enc = Encoder(args.model, 1 if args.swap_only else args.processes)
+    try:
+        if not args.swap_only:
+            prepare(enc.dim)
+            ckpt = Checkpoint(args.checkpoint, args.model, enc.dim)
+            t0 = time.perf_counter()
+            n = backfill(enc, ckpt, args.batch, args.encode_batch)
+            n += backfill(enc, ckpt, args.batch, args.encode_batch, where=f"h.{SHADOW} IS NULL")  # rows ingested meanwhile
+            print(f"re-embedded {n:,} rows in {time.perf_counter() - t0:.1f}s")
+        if not args.no_swap:
+            swap(enc, args.model, enc.dim, args.keep_old, args.encode_batch)
+            if os.path.exists(args.checkpoint):
+                os.remove(args.checkpoint)
+            print(f"done: set EMBEDDING_MODEL={args.model} EMBEDDING_DIM={enc.dim} for the API and step 1")
+    finally:
+        enc.close()
+
+if __name__ == "__main__":
+    main()
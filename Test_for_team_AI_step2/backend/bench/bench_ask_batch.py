@@ -0,0 +1,48 @@
+"""Queries/sec: one /chat/ask call per question vs. /chat/ask_batch, against a running API.
+
+Each run uses fresh question texts, so neither the embedding nor the answer cache helps:
+    python -m bench.bench_ask_batch --url http://localhost:8000 --queries 500 --batch 16,64,256
+"""
+import argparse, http.client, json, time
+from urllib.parse import urlparse
+from bench.corpus import queries
+
+def _post(conn, path: str, body: dict) -> dict:
+    conn.request("POST", path, json.dumps(body), {"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    data = resp.read()
+    if resp.status != 200:
+        raise RuntimeError(f"{path}: HTTP {resp.status} {data[:200]!r}")
+    return json.loads(data)
+
+def loop(conn, texts: list, top_k: int) -> float:
+    t0 = time.perf_counter()
+    for q in texts:
+        _post(conn, "/chat/ask", {"query": q, "top_k": top_k})
+    return len(texts) / (time.perf_counter() - t0)
+
+def batched(conn, texts: list, top_k: int, size: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(0, len(texts), size):
+        res = _post(conn, "/chat/ask_batch", {"queries": [{"query": q, "top_k": top_k} for q in texts[i:i + size]]})
+        assert len(res["results"]) == len(texts[i:i + size])
+    return len(texts) / (time.perf_counter() - t0)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--batch", default="16,64,256")
+    ap.add_argument("--top-k", type=int, default=10)
+    args = ap.parse_args()
+    u = urlparse(args.url)
+    conn = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=120)  # keep-alive for both modes
+    seed = int(time.time())
+    print(f"{'mode':<16} {'queries/s':>10}")
+    print(f"{'ask loop':<16} {loop(conn, queries(args.queries, seed), args.top_k):>10.1f}")
+    for i, size in enumerate(int(b) for b in args.batch.split(",")):
+        qps = batched(conn, queries(args.queries, seed + i + 1), args.top_k, size)
+        print(f"{'ask_batch ' + str(size):<16} {qps:>10.1f}")
+
+if __name__ == "__main__":
+    main()
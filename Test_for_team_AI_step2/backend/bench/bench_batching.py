@@ -0,0 +1,54 @@
+"""QPS and latency of per-request encode() vs. the MicroBatcher under concurrent callers.
+
+Each client thread embeds unique queries (so the query cache never helps) the way
+/chat/ask does, once with the model called directly and once through the batcher:
+    python -m bench.bench_batching --clients 32,64,128,256 --requests 2000
+"""
+import argparse, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from sentence_transformers import SentenceTransformer
+from app.core.config import settings
+from app.services.batcher import MicroBatcher
+from bench.corpus import queries
+
+
+def run(embed, texts: list, clients: int):
+    lat = []
+    lock = threading.Lock()
+
+    def _one(t):
+        t0 = time.perf_counter()
+        embed(t)
+        ms = (time.perf_counter() - t0) * 1000.0
+        with lock:
+            lat.append(ms)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(_one, texts))
+    wall = time.perf_counter() - t0
+    lat.sort()
+    return len(texts) / wall, lat[len(lat) // 2], lat[min(len(lat) - 1, int(0.99 * len(lat)))]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", default="32,64,128,256")
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--max-batch", type=int, default=settings.EMBED_BATCH_MAX_SIZE)
+    ap.add_argument("--max-wait-ms", type=float, default=settings.EMBED_BATCH_MAX_WAIT_MS)
+    args = ap.parse_args()
+
+    model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    model.encode(["warm up"] * 8)
+    batcher = MicroBatcher(lambda ts: model.encode(ts, batch_size=len(ts)), args.max_batch, args.max_wait_ms / 1000.0)
+    modes = {"direct": lambda t: model.encode(t), "batched": batcher.embed}
+
+    print(f"{'clients':>7} {'mode':<8} {'qps':>8} {'p50_ms':>8} {'p99_ms':>8}")
+    for i, clients in enumerate(int(c) for c in args.clients.split(",")):
+        for j, (name, embed) in enumerate(modes.items()):
+            qps, p50, p99 = run(embed, queries(args.requests, seed=10 * i + j), clients)
+            print(f"{clients:>7} {name:<8} {qps:>8.1f} {p50:>8.1f} {p99:>8.1f}")
+    print(f"batcher: {batcher.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Parity and speed of the embedding backends (torch / onnx / int8) on this CPU.
+
+Parity is the cosine similarity of each backend's vectors to torch's on the same texts; a
+backend is flagged (and the run exits 1) when the minimum drops below --min-cosine. Throughput is texts/s at a few
+batch sizes, and latency is single-text encode() p50/p99:
+    python -m bench.bench_embed_backends --texts 2000 --backends torch,onnx,int8
+"""
+import argparse, time
+import numpy as np
+from app.core.config import settings
+from app.services.embeddings import load_model
+from bench.corpus import queries
+
+def _unit(x: np.ndarray) -> np.ndarray:
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backends", default="torch,onnx,int8")
+    ap.add_argument("--texts", type=int, default=2000)
+    ap.add_argument("--batch-sizes", default="1,32,128")
+    ap.add_argument("--min-cosine", type=float, default=0.99)
+    args = ap.parse_args()
+    texts = queries(args.texts, seed=7)
+    torch_model = load_model(settings.EMBEDDING_MODEL, "torch", settings.MODEL_CACHE_DIR)
+    reference = _unit(torch_model.encode(texts, batch_size=64))
+    del torch_model
+    failed = []
+    print(f"{'backend':<8} {'load_s':>7} {'cos_min':>8} {'cos_mean':>9} "
+          + " ".join(f"{'tps@' + b:>9}" for b in args.batch_sizes.split(",")) + f" {'p50_ms':>7} {'p99_ms':>7}")
+    for backend in args.backends.split(","):
+        t0 = time.perf_counter()
+        model = load_model(settings.EMBEDDING_MODEL, backend, settings.MODEL_CACHE_DIR, settings.EMBEDDING_QUANT_CONFIG)
+        load_s = time.perf_counter() - t0
+        model.encode(texts[:64])
+        vecs = _unit(model.encode(texts, batch_size=64))
+        cos = np.einsum("ij,ij->i", vecs, reference)
+        tps = []
+        for b in (int(x) for x in args.batch_sizes.split(",")):
+            n = min(len(texts), max(b * 20, 200))
+            t0 = time.perf_counter()
+            model.encode(texts[:n], batch_size=b)
+            tps.append(n / (time.perf_counter() - t0))
+        lat = []
+        for t in texts[:300]:
+            t0 = time.perf_counter()
+            model.encode(t)
+            lat.append((time.perf_counter() - t0) * 1000)
+        flag = ""
+        if cos.min() < args.min_cosine:
+            flag = "  < parity"
+            failed.append(backend)
+        print(f"{backend:<8} {load_s:>7.1f} {cos.min():>8.4f} {cos.mean():>9.4f} "
+              + " ".join(f"{x:>9.0f}" for x in tps)
+              + f" {np.percentile(lat, 50):>7.2f} {np.percentile(lat, 99):>7.2f}{flag}")
+    if failed:
+        raise SystemExit(f"cosine to torch below {args.min_cosine} for: {', '.join(failed)}")
+
+if __name__ == "__main__":
+    main()
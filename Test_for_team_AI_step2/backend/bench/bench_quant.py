@@ -0,0 +1,75 @@
+"""Index size, latency and recall@k: float32 HNSW vs. halfvec / bit HNSW with exact re-ranking.
+
+Reuses bench_ann's scratch table (bench_highlights), so the real highlights table is untouched:
+    python -m bench.bench_quant --size 1000000 --rerank 1,2,4,10
+"""
+import argparse, time
+import numpy as np
+from sqlalchemy import text
+from app.db.session import engine
+from bench.bench_ann import synthetic_vectors, load, exact, _vec_literal
+
+INDEXES = {
+    "vector": ("embedding", "vector_l2_ops", "embedding <-> CAST(:q AS vector)"),
+    "halfvec": ("(embedding::halfvec(384))", "halfvec_l2_ops",
+                "embedding::halfvec(384) <-> CAST(:q AS vector)::halfvec(384)"),
+    "bit": ("(binary_quantize(embedding)::bit(384))", "bit_hamming_ops",
+            "binary_quantize(embedding)::bit(384) <~> binary_quantize(CAST(:q AS vector))"),
+}
+
+def build(kind: str) -> tuple:
+    expr, ops, _ = INDEXES[kind]
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text("SET maintenance_work_mem = '1GB'"))
+        conn.execute(text(f"CREATE INDEX bench_ix_{kind} ON bench_highlights USING hnsw ({expr} {ops})"))
+        conn.execute(text("ANALYZE bench_highlights"))
+        size = conn.execute(text(f"SELECT pg_relation_size('bench_ix_{kind}')")).scalar()
+    return time.perf_counter() - t0, size
+
+def drop(kind: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP INDEX IF EXISTS bench_ix_{kind}"))
+
+def run(kind: str, queries, truth, k: int, factor: int):
+    order = INDEXES[kind][2]
+    cand = k * factor
+    sql = text(f"""SELECT c.id FROM (SELECT id FROM bench_highlights ORDER BY {order} LIMIT :cand) AS c
+                   JOIN bench_highlights AS b ON b.id = c.id
+                   ORDER BY b.embedding <-> CAST(:q AS vector) LIMIT :k""")
+    lat, hits = [], 0
+    with engine.begin() as conn:
+        conn.execute(text(f"SET LOCAL hnsw.ef_search = {max(40, cand)}"))
+        for q, t in zip(queries, truth):
+            t0 = time.perf_counter()
+            ids = {r[0] for r in conn.execute(sql, {"q": q, "k": k, "cand": cand})}
+            lat.append((time.perf_counter() - t0) * 1000)
+            hits += len(ids & t)
+    lat = np.array(lat)
+    return hits / (k * len(queries)), float(np.percentile(lat, 50)), float(np.percentile(lat, 95))
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--size", type=int, default=1000000)
+    p.add_argument("--rerank", default="1,2,4,10")
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--queries", type=int, default=50)
+    args = p.parse_args()
+    queries = [_vec_literal(v) for v in synthetic_vectors(args.queries, seed=10**9)]
+    load(args.size)
+    with engine.begin() as conn:
+        heap = conn.execute(text("SELECT pg_total_relation_size('bench_highlights')")).scalar()
+    truth = exact(queries, args.k)
+    print(f"N={args.size:,} table+toast {heap / 2**20:.0f} MiB")
+    print(f"{'index':<8} {'MiB':>7} {'build_s':>8} {'rerank':>7} {'recall@' + str(args.k):>10} {'p50_ms':>8} {'p95_ms':>8}")
+    for kind in INDEXES:
+        t_build, size = build(kind)
+        for factor in ([1] if kind == "vector" else [int(f) for f in args.rerank.split(",")]):
+            recall, p50, p95 = run(kind, queries, truth, args.k, factor)
+            print(f"{kind:<8} {size / 2**20:>7.0f} {t_build:>8.1f} {factor:>7} {recall:>10.3f} {p50:>8.2f} {p95:>8.2f}")
+        drop(kind)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS bench_highlights"))
+
+if __name__ == "__main__":
+    main()
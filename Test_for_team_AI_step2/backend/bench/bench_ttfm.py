@@ -0,0 +1,54 @@
+"""Time to first match: buffered /chat/ask vs. NDJSON /chat/ask_stream, against a running API.
+
+For /chat/ask the first match is usable only once the whole JSON body is parsed; for
+/chat/ask_stream it is the first "match" line. Fresh question texts keep the caches cold:
+    python -m bench.bench_ttfm --url http://localhost:8080/api --requests 200
+"""
+import argparse, http.client, json, time
+from urllib.parse import urlparse
+import numpy as np
+from bench.corpus import queries
+
+def _send(conn, prefix: str, path: str, q: str, top_k: int):
+    conn.request("POST", prefix + path, json.dumps({"query": q, "top_k": top_k}), {"Content-Type": "application/json"})
+    return conn.getresponse()
+
+def buffered(conn, prefix: str, q: str, top_k: int) -> tuple:
+    t0 = time.perf_counter()
+    data = json.loads(_send(conn, prefix, "/chat/ask", q, top_k).read())
+    t = (time.perf_counter() - t0) * 1000
+    return (t if data["matches"] else None), t
+
+def streamed(conn, prefix: str, q: str, top_k: int) -> tuple:
+    t0 = time.perf_counter()
+    resp = _send(conn, prefix, "/chat/ask_stream", q, top_k)
+    first = None
+    while line := resp.readline():
+        ev = json.loads(line)
+        if ev["type"] == "match" and first is None:
+            first = (time.perf_counter() - t0) * 1000
+    return first, (time.perf_counter() - t0) * 1000
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--top-k", type=int, default=10)
+    args = ap.parse_args()
+    u = urlparse(args.url)
+    conn = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=120)
+    seed = int(time.time())
+    print(f"{'endpoint':<12} {'ttfm_p50':>9} {'ttfm_p95':>9} {'total_p50':>10} {'no_match':>9}")
+    for i, (name, fn) in enumerate((("ask", buffered), ("ask_stream", streamed))):
+        first, total = [], []
+        for q in queries(args.requests, seed + i):
+            f, t = fn(conn, u.path.rstrip("/"), q, args.top_k)
+            total.append(t)
+            if f is not None:
+                first.append(f)
+        p = lambda xs, q: float(np.percentile(xs, q)) if xs else float("nan")
+        print(f"{name:<12} {p(first, 50):>9.1f} {p(first, 95):>9.1f} {p(total, 50):>10.1f} "
+              f"{args.requests - len(first):>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Synthetic videos/highlights corpus and query mix for load tests.
+
+Rows go into the real `videos` / `highlights` tables (filenames under `synthetic/`, so they
+can be removed again with --reset) through COPY:
+    python -m bench.corpus --size 1000000               # grow the synthetic corpus to 1M highlights
+    python -m bench.corpus --size 100000 --encode       # embed generated text with EMBEDDING_MODEL instead
+    python -m bench.corpus --reset
+"""
+import argparse, io, time, uuid
+import numpy as np
+from sqlalchemy import text
+from app.db.session import engine
+from bench.bench_ann import synthetic_vectors, _vec_literal
+
+PREFIX = "synthetic/"
+PER_VIDEO = 50
+
+WORDS = ("goal crowd rocket launch speaker stage crash race dog ball kick jump fireworks drone "
+         "sunset wave surfer concert guitar solo interview laugh").split()
+
+def queries(n: int, seed: int = 0) -> list:
+    """n distinct questions (numbered so no cache can answer them)."""
+    rng = np.random.default_rng(seed)
+    return [f"{' '.join(rng.choice(WORDS, 6))} #{i}" for i in range(n)]
+
+def query_mix(n: int, hot: int = 50, hot_share: float = 0.3, seed: int = 0) -> list:
+    """n questions where `hot_share` of them repeat from a small Zipf-distributed hot set, like real traffic."""
+    rng = np.random.default_rng(seed)
+    hot_set = queries(hot, seed + 1)
+    cold = iter(queries(n, seed + 2))
+    ranks = np.minimum(rng.zipf(1.3, n), hot) - 1
+    return [hot_set[r] if rng.random() < hot_share else next(cold) for r in ranks]
+
+def _sentences(rng, n: int) -> list:
+    return [" ".join(rng.choice(WORDS, 8)).capitalize() + "." for _ in range(n)]
+
+def synthetic_count() -> int:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT count(*) FROM highlights AS h JOIN videos AS v ON v.id = h.video_id "
+                                 "WHERE v.filename LIKE :p"), {"p": PREFIX + "%"}).scalar()
+
+def reset() -> None:
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM videos WHERE filename LIKE :p"), {"p": PREFIX + "%"})  # highlights cascade
+
+def grow(size: int, encode: bool = False, chunk: int = 20000, seed: int = 0) -> int:
+    """Add synthetic highlights until there are `size` of them; returns how many were added."""
+    have = synthetic_count()
+    todo = max(0, size - have)
+    model = None
+    if encode and todo:
+        from sentence_transformers import SentenceTransformer
+        from app.core.config import settings
+        model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    rng = np.random.default_rng(seed + have)
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        for start in range(0, todo, chunk):
+            n = min(chunk, todo - start)
+            summaries = _sentences(rng, n)
+            vecs = (model.encode(summaries, batch_size=256, normalize_embeddings=True) if model is not None
+                    else synthetic_vectors(n, seed=seed + have + start))
+            video_ids = [uuid.uuid4() for _ in range((n + PER_VIDEO - 1) // PER_VIDEO)]
+            cur.copy_expert("COPY videos (id, filename, duration_sec) FROM STDIN", io.StringIO("".join(
+                f"{v}\t{PREFIX}{v}.mp4\t{PER_VIDEO * 12.0}\n" for v in video_ids)))
+            rows = []
+            for i in range(n):
+                slot = i % PER_VIDEO
+                title = " ".join(summaries[i].split()[:3])
+                rows.append(f"{uuid.uuid4()}\t{video_ids[i // PER_VIDEO]}\t{slot * 12.0}\t{slot * 12.0 + 8.0}\t"
+                            f"{title}\t{summaries[i]}\t{_vec_literal(vecs[i])}\n")
+            cur.copy_expert("COPY highlights (id, video_id, start_sec, end_sec, title, summary, embedding) FROM STDIN",
+                            io.StringIO("".join(rows)))
+            raw.commit()
+    finally:
+        raw.close()
+    if todo:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE videos"))
+            conn.execute(text("ANALYZE highlights"))
+    return todo
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size", type=int, default=100000)
+    ap.add_argument("--encode", action="store_true")
+    ap.add_argument("--reset", action="store_true")
+    args = ap.parse_args()
+    if args.reset:
+        reset()
+        print("removed synthetic corpus")
+        return
+    t0 = time.perf_counter()
+    added = grow(args.size, encode=args.encode)
+    print(f"added {added:,} highlights in {time.perf_counter() - t0:.1f}s; synthetic corpus now {synthetic_count():,}")
+
+if __name__ == "__main__":
+    main()
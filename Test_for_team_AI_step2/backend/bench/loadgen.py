@@ -0,0 +1,96 @@
+"""Async load generator for the chat API.
+
+Closed loop (`--concurrency N`): N clients each send the next question as soon as the previous
+answer arrives. Open loop (`--rate R`): questions arrive as a Poisson process at R/s whatever the
+server does, and latency is measured from the scheduled arrival time so queueing is not hidden.
+    python -m bench.loadgen --url http://localhost:8000 --concurrency 64 --duration 30
+    python -m bench.loadgen --url http://localhost:8000 --rate 200 --duration 30
+"""
+import argparse, asyncio, itertools, json, random, time
+from dataclasses import dataclass, field
+import httpx
+from bench.corpus import query_mix
+
+@dataclass
+class RunResult:
+    latencies_ms: list = field(default_factory=list)
+    errors: int = 0
+    elapsed_s: float = 0.0
+
+async def _ask(client: httpx.AsyncClient, path: str, question: str, top_k: int) -> bool:
+    try:
+        resp = await client.post(path, json={"query": question, "top_k": top_k})
+        return resp.status_code == 200
+    except httpx.HTTPError:
+        return False
+
+async def closed_loop(url: str, questions: list, concurrency: int, duration_s: float,
+                      path: str = "/chat/ask", top_k: int = 10) -> RunResult:
+    res = RunResult()
+    it = itertools.count()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        t_end = time.perf_counter() + duration_s
+
+        async def _client():
+            while time.perf_counter() < t_end:
+                q = questions[next(it) % len(questions)]
+                t0 = time.perf_counter()
+                ok = await _ask(client, path, q, top_k)
+                res.latencies_ms.append((time.perf_counter() - t0) * 1000)
+                res.errors += not ok
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(_client() for _ in range(concurrency)))
+        res.elapsed_s = time.perf_counter() - t0
+    return res
+
+async def open_loop(url: str, questions: list, rate: float, duration_s: float,
+                    path: str = "/chat/ask", top_k: int = 10, max_in_flight: int = 1024, seed: int = 0) -> RunResult:
+    res = RunResult()
+    rng = random.Random(seed)
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=256)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        tasks = []
+
+        async def _one(q: str, scheduled: float):
+            ok = await _ask(client, path, q, top_k)
+            res.latencies_ms.append((time.perf_counter() - scheduled) * 1000)
+            res.errors += not ok
+
+        t0 = time.perf_counter()
+        next_at, i = t0, 0
+        while next_at < t0 + duration_s:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(_one(questions[i % len(questions)], next_at)))
+            i += 1
+            next_at += rng.expovariate(rate)
+        await asyncio.gather(*tasks)
+        res.elapsed_s = time.perf_counter() - t0
+    return res
+
+def run(url: str, concurrency: int | None = None, rate: float | None = None, duration_s: float = 30.0,
+        path: str = "/chat/ask", top_k: int = 10, questions: list | None = None, seed: int = 0) -> RunResult:
+    questions = questions or query_mix(50000, seed=seed)
+    if rate:
+        return asyncio.run(open_loop(url, questions, rate, duration_s, path, top_k, seed=seed))
+    return asyncio.run(closed_loop(url, questions, concurrency or 32, duration_s, path, top_k))
+
+def main():
+    from bench.report import summarize
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--path", default="/chat/ask")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--concurrency", type=int)
+    mode.add_argument("--rate", type=float, help="requests/s (open loop)")
+    ap.add_argument("--duration", type=float, default=30.0)
+    ap.add_argument("--top-k", type=int, default=10)
+    args = ap.parse_args()
+    res = run(args.url, args.concurrency, args.rate, args.duration, args.path, args.top_k)
+    print(json.dumps(summarize(res), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark /chat/ask across corpus sizes and write the numbers as JSON for regression checks.
+
+For each size the synthetic corpus is grown (never shrunk) and the load generator is run
+against the API, which must point at the same database:
+    python -m bench.report --url http://localhost:8000 --sizes 10000,100000,1000000 \
+        --concurrency 32 --duration 30 --out results/run.json
+    python -m bench.report --compare results/before.json results/run.json
+"""
+import argparse, datetime, json, os, platform, subprocess
+import numpy as np
+from bench import corpus, loadgen
+
+def summarize(res: "loadgen.RunResult") -> dict:
+    lat = np.array(res.latencies_ms or [float("nan")])
+    n = len(res.latencies_ms)
+    return {"requests": n, "errors": res.errors, "error_rate": round(res.errors / n, 4) if n else 0.0,
+            "qps": round((n - res.errors) / res.elapsed_s, 2) if res.elapsed_s else 0.0,
+            "p50_ms": round(float(np.percentile(lat, 50)), 2), "p95_ms": round(float(np.percentile(lat, 95)), 2),
+            "p99_ms": round(float(np.percentile(lat, 99)), 2)}
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(before_path: str, after_path: str, tolerance: float = 0.1) -> int:
+    """Print per-size deltas; returns the number of metrics that regressed by more than `tolerance`."""
+    with open(before_path) as f:
+        before = {r["corpus_size"]: r for r in json.load(f)["runs"]}
+    with open(after_path) as f:
+        after = {r["corpus_size"]: r for r in json.load(f)["runs"]}
+    regressions = 0
+    print(f"{'size':>10} {'metric':<10} {'before':>10} {'after':>10} {'change':>8}")
+    for size in sorted(before.keys() & after.keys()):
+        for metric, higher_is_better in (("qps", True), ("p50_ms", False), ("p95_ms", False),
+                                         ("p99_ms", False), ("error_rate", False)):
+            a, b = before[size][metric], after[size][metric]
+            change = (b - a) / a if a else 0.0
+            bad = (change < -tolerance) if higher_is_better else (change > tolerance and b - a > 0.001)
+            regressions += bad
+            print(f"{size:>10,} {metric:<10} {a:>10} {b:>10} {change:>+7.1%}{'  !' if bad else ''}")
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--path", default="/chat/ask")
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--rate", type=float, help="open-loop requests/s instead of fixed concurrency")
+    ap.add_argument("--duration", type=float, default=30.0)
+    ap.add_argument("--encode", action="store_true", help="embed corpus text with the real model")
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = ap.parse_args()
+    if args.compare:
+        raise SystemExit(1 if compare(*args.compare) else 0)
+
+    runs = []
+    for size in sorted(int(s) for s in args.sizes.split(",")):
+        corpus.grow(size, encode=args.encode)
+        res = loadgen.run(args.url, args.concurrency, args.rate, args.duration, args.path, seed=size)
+        row = {"corpus_size": corpus.synthetic_count(), **summarize(res)}
+        runs.append(row)
+        print(json.dumps(row))
+    report = {"timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(), "git": _git_rev(),
+              "host": platform.node(), "url": args.url, "path": args.path,
+              "mode": {"rate": args.rate} if args.rate else {"concurrency": args.concurrency},
+              "duration_s": args.duration, "runs": runs}
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
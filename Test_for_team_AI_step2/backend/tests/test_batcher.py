@@ -0,0 +1,45 @@
+import asyncio, threading
+import pytest
+from app.services.batcher import MicroBatcher
+
+def _vectors(texts):
+    return [[float(len(t))] for t in texts]
+
+def test_concurrent_calls_share_one_encode():
+    calls = []
+    batcher = MicroBatcher(lambda texts: calls.append(list(texts)) or _vectors(texts), max_batch=8, max_wait_s=0.05)
+    futures = [batcher.submit(t) for t in ("a", "bb", "a", "ccc")]
+    assert [f.result(timeout=2) for f in futures] == [[1.0], [2.0], [1.0], [3.0]]
+    assert calls == [["a", "bb", "ccc"]]
+    assert batcher.stats() == {"batches": 1, "items": 4, "avg_batch": 4.0}
+
+def test_encode_error_reaches_every_caller_and_the_thread_survives():
+    def encode(texts):
+        if "boom" in texts:
+            raise RuntimeError("boom")
+        return _vectors(texts)
+    batcher = MicroBatcher(encode, max_wait_s=0.0)
+    with pytest.raises(RuntimeError):
+        batcher.embed("boom")
+    assert batcher.embed("ok") == [2.0]
+
+def test_cancelled_caller_does_not_kill_the_batcher():
+    release = threading.Event()
+    def encode(texts):
+        release.wait(2)
+        return _vectors(texts)
+    batcher = MicroBatcher(encode, max_batch=1, max_wait_s=0.0)
+
+    async def cancel_while_queued():
+        busy = asyncio.ensure_future(batcher.embed_async("first"))  # holds the thread inside encode
+        await asyncio.sleep(0.05)
+        waiting = asyncio.ensure_future(batcher.embed_async("second"))
+        await asyncio.sleep(0.01)
+        waiting.cancel()  # a client disconnect while the text is still queued
+        release.set()
+        assert await busy == [5.0]
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    asyncio.run(cancel_while_queued())
+    assert batcher.submit("third").result(timeout=2) == [5.0]
@@ -0,0 +1,49 @@
+import time
+from app.core.cache import TTLCache, VersionGate
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(maxsize=10, ttl_s=0.05)
+    cache.put("q", 1)
+    assert cache.get("q") == 1
+    time.sleep(0.06)
+    assert cache.get("q") is None
+    assert cache.stats() == {"size": 0, "maxsize": 10, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(maxsize=2, ttl_s=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+
+def test_zero_size_disables_caching():
+    cache = TTLCache(maxsize=0, ttl_s=60)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+def test_gate_reads_version_at_most_once_per_interval():
+    gate = VersionGate(TTLCache(10, 60), interval_s=0.05)
+    assert gate.due() and not gate.due()
+    time.sleep(0.06)
+    assert gate.due()
+
+def test_any_change_clears_the_cache():
+    cache = TTLCache(10, 60)
+    gate = VersionGate(cache, interval_s=0)
+    gate.observe((5, 0))
+    gate.put("q", "answer", gate.generation)
+    assert not gate.observe((5, 0)) and cache.get("q") == "answer"
+    assert gate.observe((5, 1))  # an update or delete, not just a new row
+    assert cache.get("q") is None
+
+def test_answer_computed_before_a_change_is_not_stored():
+    cache = TTLCache(10, 60)
+    gate = VersionGate(cache, interval_s=0)
+    gate.observe((1, 0))
+    started = gate.generation
+    gate.observe((2, 0))  # rows changed while the old answer was being computed
+    gate.put("q", "stale", started)
+    assert cache.get("q") is None
+    gate.put("q", "fresh", gate.generation)
+    assert cache.get("q") == "fresh"
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("sentence_transformers")
+
+from app.core.config import settings
+from app.services.embeddings import load_model
+
+TEXTS = ["Crowd cheers as the striker scores in the last minute.",
+         "Launch countdown reaches zero and the rocket lifts off.",
+         "A dog chases a frisbee across the park.",
+         "Guitar solo during the encore of the concert.",
+         "how long was the countdown"]
+MIN_COSINE = 0.99  # bench_embed_backends' default --min-cosine
+
+def _unit(x) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+@pytest.fixture(scope="module")
+def torch_vectors():
+    try:
+        model = load_model(settings.EMBEDDING_MODEL, "torch", settings.MODEL_CACHE_DIR)
+    except Exception as e:  # offline, or the model is not cached
+        pytest.skip(f"{settings.EMBEDDING_MODEL} unavailable: {e}")
+    return _unit(model.encode(TEXTS))
+
+@pytest.mark.parametrize("backend", ["onnx", "int8"])
+def test_onnx_backends_match_torch(torch_vectors, backend):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("optimum")
+    model = load_model(settings.EMBEDDING_MODEL, backend, settings.MODEL_CACHE_DIR, settings.EMBEDDING_QUANT_CONFIG)
+    cos = np.einsum("ij,ij->i", _unit(model.encode(TEXTS)), torch_vectors)
+    assert cos.min() >= MIN_COSINE, f"{backend} cosine to torch: {cos.round(4).tolist()}"
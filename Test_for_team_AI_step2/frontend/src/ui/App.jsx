@@ -12,15 +12,35 @@ export default function App() {
     e.preventDefault()
     setLoading(true); setError(''); setAnswer(''); setMatches([])
     try {
-      const res = await fetch(`${API_BASE}/chat/ask`, {
+      const res = await fetch(`${API_BASE}/chat/ask_stream`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ query, top_k: 10 })
       })
       if (!res.ok) throw new Error(`HTTP ${res.status}`)
-      const data = await res.json()
-      setAnswer(data.answer)
-      setMatches(data.matches || [])
+      // NDJSON: render each match as its line arrives; the final "done" line carries the answer.
+      // Matches arrive nearest first but are listed like /chat/ask's: by file, then start time.
+      const reader = res.body.getReader()
+      const decoder = new TextDecoder()
+      let buf = ''
+      let finished = false
+      const handle = (line) => {
+        if (!line.trim()) return
+        const ev = JSON.parse(line)
+        if (ev.type === 'match') setMatches((prev) => [...prev, ev].sort(byFileAndStart))
+        else if (ev.type === 'done') { finished = true; setAnswer(ev.answer) }
+        else if (ev.type === 'error') throw new Error(ev.detail || 'search failed')
+      }
+      for (;;) {
+        const { value, done } = await reader.read()
+        if (done) break
+        buf += decoder.decode(value, { stream: true })
+        const lines = buf.split('\n')
+        buf = lines.pop()
+        lines.forEach(handle)
+      }
+      handle(buf + decoder.decode())
+      if (!finished) throw new Error('the answer stream ended early; the matches shown may be incomplete')
     } catch (err) { setError(String(err)) }
     finally { setLoading(false) }
   }
@@ -50,6 +70,9 @@ export default function App() {
     </div>
   )
 }
+function byFileAndStart(a, b){
+  return a.filename < b.filename ? -1 : a.filename > b.filename ? 1 : a.start_sec - b.start_sec
+}
 function sec(s){
   const h = Math.floor(s/3600), m = Math.floor((s%3600)/60), ss = (s%60).toFixed(3).padStart(6,'0')
   return h ? `${h.toString().padStart(2,'0')}:${m.toString().padStart(2,'0')}:${ss}` : `${m.toString().padStart(2,'0')}:${ss}`
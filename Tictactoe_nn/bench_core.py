@@ -0,0 +1,91 @@
+"""Boards/sec of the bitboard engine against the original list-based functions.
+
+    python bench_core.py --boards 200000
+"""
+import argparse, json, random, time
+import numpy as np
+
+import core
+from train import generate_all_positions
+
+# ---------- The list-based implementations core.py replaced ----------
+def legacy_check_winner(board):
+    for a,b,c in core.WIN_LINES:
+        s = board[a]+board[b]+board[c]
+        if s==3: return 1
+        if s==-3: return -1
+    if 0 not in board: return 0
+    return None
+
+def legacy_legal_moves(board):
+    return [i for i,v in enumerate(board) if v==0]
+
+def legacy_encode_state(board):
+    b = np.array(board, dtype=np.int8)
+    return np.concatenate([(b==1).astype(np.float32), (b==-1).astype(np.float32)], axis=0)
+
+def legacy_heuristic_move(board, player):
+    for p in (player, -player):
+        for m in legacy_legal_moves(board):
+            b2 = board[:]
+            b2[m] = p
+            if legacy_check_winner(b2) == p: return m
+    if board[4]==0: return 4
+    corners = [i for i in [0,2,6,8] if board[i]==0]
+    if corners: return random.choice(corners)
+    moves = legacy_legal_moves(board)
+    return random.choice(moves) if moves else None
+
+def _rate(fn, n, repeat=3):
+    best = min(_timed(fn) for _ in range(repeat))
+    return n / best
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+def check(boards):
+    """The new engine must agree with the old one on every board."""
+    codes = core.check_winner_batch(np.asarray(boards, dtype=np.int8))
+    for b, c in zip(boards, codes):
+        old = legacy_check_winner(b)
+        assert core.check_winner(b) == old and c == (core.ONGOING if old is None else old), b
+        assert core.legal_moves(b) == legacy_legal_moves(b), b
+        assert np.array_equal(core.encode_state(b), legacy_encode_state(b)), b
+    assert np.array_equal(core.encode_batch(np.asarray(boards)), np.stack([legacy_encode_state(b) for b in boards]))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--boards', type=int, default=100000)
+    args = ap.parse_args()
+
+    positions = generate_all_positions()  # every reachable position, 5478 of them
+    check(positions)
+    boards = [positions[i % len(positions)] for i in range(args.boards)]
+    arr = np.asarray(boards, dtype=np.int8)
+    n = len(boards)
+    to_move = [1 if sum(b) == 0 else -1 for b in boards]
+
+    rows = {
+        "check_winner": (lambda: [legacy_check_winner(b) for b in boards],
+                         lambda: [core.check_winner(b) for b in boards],
+                         lambda: core.check_winner_batch(arr)),
+        "legal_moves": (lambda: [legacy_legal_moves(b) for b in boards],
+                        lambda: [core.legal_moves(b) for b in boards],
+                        lambda: core.legal_mask_batch(arr)),
+        "encode_state": (lambda: np.stack([legacy_encode_state(b) for b in boards]),
+                         lambda: np.stack([core.encode_state(b) for b in boards]),
+                         lambda: core.encode_batch(arr)),
+        "heuristic_move": (lambda: [legacy_heuristic_move(b, p) for b, p in zip(boards, to_move)],
+                           lambda: [core.heuristic_move(b, p) for b, p in zip(boards, to_move)],
+                           None),
+    }
+    for name, (old, new, batch) in rows.items():
+        out = {"op": name, "legacy_boards_per_s": round(_rate(old, n)), "list_boards_per_s": round(_rate(new, n))}
+        if batch is not None:
+            out["batch_boards_per_s"] = round(_rate(batch, n))
+        print(json.dumps(out))
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import random
+from itertools import product
 import numpy as np
 import torch
 import torch.nn as nn
@@ -9,35 +10,64 @@ WIN_LINES = [
     (0,4,8),(2,4,6),
 ]
 
-def check_winner(board):
-    for a,b,c in WIN_LINES:
-        s = board[a]+board[b]+board[c]
-        if s==3: return 1
-        if s==-3: return -1
-    if 0 not in board: return 0
+# ---------- Bitboards ----------
+# A position is a pair of 9-bit ints (x, o): bit i is set when that side holds cell i.
+FULL = 0x1FF
+ONGOING = 2  # check_winner_batch code for "no result yet" (check_winner returns None)
+WIN_MASKS = tuple(sum(1 << i for i in line) for line in WIN_LINES)
+_CELLS = np.arange(9)
+_WEIGHTS = (1 << _CELLS).astype(np.int16)
+
+# Indexed by a 9-bit mask: does it contain a full line, its set cells, its 9 cells as floats.
+WIN_TABLE = np.array([any(m & w == w for w in WIN_MASKS) for m in range(FULL + 1)])
+_IS_WIN = tuple(bool(v) for v in WIN_TABLE)
+MOVES_TABLE = tuple(tuple(i for i in range(9) if m >> i & 1) for m in range(FULL + 1))
+BITS_TABLE = ((np.arange(FULL + 1)[:, None] >> _CELLS) & 1).astype(np.float32)
+
+# Every 3^9 cell assignment -> (x, o), so list boards convert with one tuple hash. Filled on the
+# first to_bits call (~60 ms) rather than at import, which only the game-playing paths need.
+_BITS_OF = {}
+
+def _fill_bits_of():
+    _BITS_OF.update({b: (sum(1 << i for i, v in enumerate(b) if v == 1), sum(1 << i for i, v in enumerate(b) if v == -1))
+                     for b in product((0, 1, -1), repeat=9)})
+
+def to_bits(board):
+    try:
+        return _BITS_OF[tuple(board)]
+    except KeyError:
+        if _BITS_OF:
+            raise ValueError(f"board cells must be -1, 0 or 1: {board!r}") from None
+        _fill_bits_of()
+        return _BITS_OF[tuple(board)]
+
+def winner_bits(x, o):
+    if _IS_WIN[x]: return 1
+    if _IS_WIN[o]: return -1
+    if x | o == FULL: return 0
     return None
 
+def check_winner(board):
+    return winner_bits(*to_bits(board))
+
 def legal_moves(board):
-    return [i for i,v in enumerate(board) if v==0]
+    x, o = to_bits(board)
+    return list(MOVES_TABLE[FULL & ~(x | o)])
 
 def encode_state(board):
-    b = np.array(board, dtype=np.int8)
-    x = (b==1).astype(np.float32)
-    o = (b==-1).astype(np.float32)
-    return np.concatenate([x,o], axis=0)
+    x, o = to_bits(board)
+    return np.concatenate([BITS_TABLE[x], BITS_TABLE[o]], axis=0)
 
 def heuristic_move(board, player):
-    opp = -player
+    x, o = to_bits(board)
+    me, opp = (x, o) if player == 1 else (o, x)
+    moves = MOVES_TABLE[FULL & ~(x | o)]
     # win
-    for m in legal_moves(board):
-        b2 = board[:]
-        b2[m] = player
-        if check_winner(b2) == player: return m
+    for m in moves:
+        if _IS_WIN[me | 1 << m]: return m
     # block
-    for m in legal_moves(board):
-        b2 = board[:]
-        b2[m] = opp
-        if check_winner(b2) == opp: return m
+    for m in moves:
+        if _IS_WIN[opp | 1 << m]: return m
     # center
     if board[4]==0: return 4
     # corners
@@ -45,9 +75,31 @@ def heuristic_move(board, player):
     if corners: 
         return random.choice(corners)
     # random
-    moves = legal_moves(board)
     return random.choice(moves) if moves else None
 
+# ---------- Batch APIs: boards are an (N, 9) array of -1/0/+1 ----------
+def to_bits_batch(boards):
+    b = np.asarray(boards)
+    return (b == 1).astype(np.int16) @ _WEIGHTS, (b == -1).astype(np.int16) @ _WEIGHTS
+
+def check_winner_batch(boards):
+    """int8 per board: 1 / -1 winner, 0 draw, ONGOING otherwise."""
+    x, o = to_bits_batch(boards)
+    out = np.full(len(x), ONGOING, dtype=np.int8)
+    out[(x | o) == FULL] = 0
+    out[WIN_TABLE[o]] = -1
+    out[WIN_TABLE[x]] = 1
+    return out
+
+def legal_mask_batch(boards):
+    """(N, 9) bool, True on empty cells."""
+    return np.asarray(boards) == 0
+
+def encode_batch(boards):
+    """(N, 18) float32, the encode_state layout for every board."""
+    x, o = to_bits_batch(boards)
+    return np.concatenate([BITS_TABLE[x], BITS_TABLE[o]], axis=1)
+
 class PolicyNet(nn.Module):
     def __init__(self, in_dim=18, hidden=256, out_dim=9):
         super().__init__()
@@ -7,10 +7,7 @@ import torch.optim as optim
 import matplotlib.pyplot as plt
 import numpy as np
 
-from core import PolicyNet, check_winner, encode_state
-
-def legal_moves(board): 
-    return [i for i,v in enumerate(board) if v == 0]
+from core import PolicyNet, check_winner, legal_moves, encode_batch, to_bits, winner_bits, FULL, MOVES_TABLE
 
 def _to_move_from_board(board):
     x = sum(1 for v in board if v==1)
@@ -18,21 +15,18 @@ def _to_move_from_board(board):
     return 1 if x == o else -1
 
 @lru_cache(maxsize=None)
-def _minimax_score(state_tuple, player):
+def _minimax_bits(me, opp):
     """
-    Return best outcome for 'player' on 'state_tuple':
+    Return best outcome for the side to move, holding bitboard 'me' against 'opp':
       +1 win, 0 draw, -1 loss
     """
-    b = list(state_tuple)
-    term = check_winner(b)
+    term = winner_bits(opp, me)  # from the side of opp, who just moved
     if term is not None:
-        return 0 if term == 0 else (1 if term == player else -1)
+        return -term
 
     best = -2
-    for a in legal_moves(b):
-        b[a] = player
-        s = -_minimax_score(tuple(b), -player)
-        b[a] = 0
+    for a in MOVES_TABLE[FULL & ~(me | opp)]:
+        s = -_minimax_bits(opp, me | 1 << a)
         if s > best:
             best = s
             if best == 1:
@@ -41,11 +35,11 @@ def _minimax_score(state_tuple, player):
 
 def optimal_moves_minimax(board, player):
     """(optimal_actions, best_score) for 'player' on 'board'."""
+    x, o = to_bits(board)
+    me, opp = (x, o) if player == 1 else (o, x)
     best, acts = -2, []
-    for a in legal_moves(board):
-        board[a] = player
-        s = -_minimax_score(tuple(board), -player)
-        board[a] = 0
+    for a in MOVES_TABLE[FULL & ~(me | opp)]:
+        s = -_minimax_bits(opp, me | 1 << a)
         if s > best:
             best, acts = s, [a]
         elif s == best:
@@ -89,16 +83,15 @@ def build_dataset():
         if not opts:
             continue
 
-        x = encode_state(bb)                      # np.ndarray shape (18,)
         y = np.zeros(9, dtype=np.float32)         # np.ndarray shape (9,)
         w = 1.0 / len(opts)
         for a in opts:
             y[a] = w
 
-        X_list.append(x)
+        X_list.append(bb)
         Y_list.append(y)
 
-    X = torch.from_numpy(np.asarray(X_list, dtype=np.float32))  # shape [N, 18]
+    X = torch.from_numpy(encode_batch(np.asarray(X_list, dtype=np.int8)))  # shape [N, 18]
     Y = torch.from_numpy(np.asarray(Y_list, dtype=np.float32))  # shape [N, 9]
     return X, Y
 
@@ -0,0 +1,29 @@
+"""Embedding model loading shared by step 1 (writes highlight vectors) and the chat API (embeds queries).
+
+Both sides must build the model the same way, and ONNX exports are cached under the same directory
+layout, so this is the one copy. The Docker images copy this directory to /shared and put it on
+PYTHONPATH. From a checkout, each side adds it to sys.path itself.
+"""
+import os
+
+def export_dir(name: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, "onnx-" + name.replace("/", "--"))
+
+def load_model(name: str, backend: str, cache_dir: str, quant_config: str = "avx2"):
+    """SentenceTransformer for EMBEDDING_BACKEND torch | onnx | int8. ONNX exports (and their int8
+    variants) are written once under cache_dir and loaded from there afterwards."""
+    from sentence_transformers import SentenceTransformer
+    if backend == "torch":
+        return SentenceTransformer(name, cache_folder=cache_dir)
+    if backend not in ("onnx", "int8"):
+        raise ValueError(f"unknown EMBEDDING_BACKEND {backend!r}")
+    export = export_dir(name, cache_dir)
+    if not os.path.exists(os.path.join(export, "onnx", "model.onnx")):
+        SentenceTransformer(name, backend="onnx", cache_folder=cache_dir).save_pretrained(export)
+    if backend == "onnx":
+        return SentenceTransformer(export, backend="onnx")
+    file_name = f"model_qint8_{quant_config}.onnx"
+    if not os.path.exists(os.path.join(export, "onnx", file_name)):
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+        export_dynamic_quantized_onnx_model(SentenceTransformer(export, backend="onnx"), quant_config, export)
+    return SentenceTransformer(export, backend="onnx", model_kwargs={"file_name": f"onnx/{file_name}"})